@@ -0,0 +1,4 @@
+"""
+Benchmarks de performance pour Shopify
+Lancer un benchmark avec: python -m benchmarks.<nom_du_module>
+"""
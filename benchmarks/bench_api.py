@@ -0,0 +1,69 @@
+"""
+Benchmark: API JSON des produits, corps pré-sérialisés contre sérialisation
+
+Sur 10 000 produits, compare la sérialisation à chaque appel (`to_dict` puis
+`json.dumps`) à la lecture d'un corps en cache, puis mesure les routes
+/api/products (page, produit, lot de 20) via le client de test Flask : sans
+cache, avec cache, et en revalidation (If-None-Match, réponse 304).
+"""
+
+import json
+from functools import partial
+
+from benchmarks.common import measure, seed_products, temp_database
+from shopify import app as shopify_app
+from shopify.cache import ProductJSONCache
+from shopify.instrumentation import InstrumentationSettings
+
+
+PRODUCTS = 10_000
+ITERATIONS = 2_000
+BATCH = ",".join(str(product_id) for product_id in range(1, 201, 10))
+
+ROUTES = {
+    "page de 24": "/api/products",
+    "produit": "/api/products/42",
+    "lot de 20": f"/api/products/batch?ids={BATCH}",
+}
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    with temp_database(instrumentation=InstrumentationSettings(enabled=False)) as db:
+        seed_products(db, PRODUCTS)
+        print(f"📊 {PRODUCTS:,} produits\n")
+
+        product = db.get_product_by_id(42)
+        assert product is not None
+        cache = ProductJSONCache(db)
+        cache.product(42)
+        fresh = measure(lambda: json.dumps(product.to_dict()).encode(), ITERATIONS)
+        cached = measure(partial(cache.product, 42), ITERATIONS)
+        print("   sérialisation d'un produit        appels / s")
+        print(f"   to_dict + json.dumps       : {fresh:>14,.0f}")
+        print(f"   corps en cache             : {cached:>14,.0f}\n")
+
+        client = shopify_app.app.test_client()
+        original = shopify_app.db
+        print("   requêtes / s               sans cache   avec cache          304")
+        try:
+            for label, url in ROUTES.items():
+                shopify_app.use_database(db, cache=False)
+                cold = measure(partial(client.get, url), ITERATIONS)
+                shopify_app.use_database(db)
+                etag = client.get(url).headers["ETag"]
+                warm = measure(partial(client.get, url), ITERATIONS)
+                revalidated = measure(
+                    partial(client.get, url, headers={"If-None-Match": etag}),
+                    ITERATIONS,
+                )
+                print(
+                    f"   {label:<22}: "
+                    f"{cold:>12,.0f} {warm:>12,.0f} {revalidated:>12,.0f}"
+                )
+        finally:
+            shopify_app.use_database(original)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,117 @@
+"""
+Benchmark: archivage des anciennes commandes
+
+Remplit trois ans d'historique, archive les commandes de plus d'un an par lots
+et affiche le débit d'archivage, la taille utile de la base principale et la
+latence de l'historique paginé avant et après (première page servie par la
+base principale, dernières pages par l'archive).
+"""
+
+import random
+import sqlite3
+import time
+from collections.abc import Callable
+from datetime import datetime
+
+from benchmarks.common import temp_database
+from shopify.database import Database
+from shopify.instrumentation import InstrumentationSettings
+from shopify.mapping import to_epoch
+
+
+USERS = 1_000
+ORDERS = 300_000
+HISTORY_DAYS = 3 * 365
+ITEMS_PER_ORDER = 3
+MAX_AGE_DAYS = 365
+REPEAT = 200
+
+
+def insert_history(db: Database) -> None:
+    """Insère ORDERS commandes réparties sur HISTORY_DAYS jours (SQL direct)."""
+    rng = random.Random(42)
+    now = to_epoch(datetime.now())
+    orders = []
+    items = []
+    for order_id in range(1, ORDERS + 1):
+        created_at = now - rng.randrange(HISTORY_DAYS * 86_400)
+        user_id = rng.randint(1, USERS)
+        orders.append(
+            (order_id, user_id, 29.97, "paid", "Paris", created_at, created_at)
+        )
+        for index in range(ITEMS_PER_ORDER):
+            items.append((order_id, index + 1, f"Produit {index}", 9.99, "", 1))
+    with db.connection() as conn, conn:
+        conn.executemany(
+            "INSERT INTO orders (id, user_id, total, status, shipping_address, "
+            "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            orders,
+        )
+        conn.executemany(
+            "INSERT INTO order_items (order_id, product_id, product_name, "
+            "product_price, product_image, quantity) VALUES (?, ?, ?, ?, ?, ?)",
+            items,
+        )
+
+
+def used_mb(conn: sqlite3.Connection, schema: str) -> float:
+    """Pages occupées (hors pages libres) d'une base, en Mo."""
+    pages = conn.execute(f"PRAGMA {schema}.page_count").fetchone()[0]
+    free = conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+    size = conn.execute(f"PRAGMA {schema}.page_size").fetchone()[0]
+    return float((pages - free) * size / 1_000_000)
+
+
+def latency_ms(func: Callable[[], object], repeat: int = REPEAT) -> float:
+    """Latence moyenne d'un appel, en millisecondes."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def history_latencies(db: Database, user_id: int) -> tuple[float, float]:
+    """Latence de la première et de la dernière page de l'historique."""
+    cursors: list[str | None] = [None]
+    while True:
+        page = db.get_user_orders_page(user_id, 20, cursors[-1])
+        if page.next_cursor is None:
+            break
+        cursors.append(page.next_cursor)
+    first = latency_ms(lambda: db.get_user_orders_page(user_id, 20))
+    last = latency_ms(lambda: db.get_user_orders_page(user_id, 20, cursors[-1]))
+    return first, last
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    with temp_database(instrumentation=InstrumentationSettings(enabled=False)) as db:
+        insert_history(db)
+        with db.connection() as conn:
+            main_before = used_mb(conn, "main")
+        first_before, last_before = history_latencies(db, 1)
+
+        start = time.perf_counter()
+        moved = db.archive_orders(MAX_AGE_DAYS)
+        elapsed = time.perf_counter() - start
+
+        with db.connection() as conn:
+            main_after = used_mb(conn, "main")
+            archive_size = used_mb(conn, "archive")
+        first_after, last_after = history_latencies(db, 1)
+
+        print(f"📊 {ORDERS:,} commandes sur {HISTORY_DAYS} jours, {USERS} clients")
+        print(
+            f"   archivées            : {moved:,} en {elapsed:.2f} s "
+            f"({moved / elapsed:,.0f} commandes/s)"
+        )
+        print(f"   base principale      : {main_before:.1f} Mo -> {main_after:.1f} Mo")
+        print(f"   archive              : {archive_size:.1f} Mo")
+        print(
+            f"   1re page historique  : {first_before:.3f} ms -> {first_after:.3f} ms"
+        )
+        print(f"   dernière page        : {last_before:.3f} ms -> {last_after:.3f} ms")
+
+
+if __name__ == "__main__":
+    run()
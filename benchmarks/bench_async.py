@@ -0,0 +1,139 @@
+"""
+Benchmark: AsyncDatabase contre Database sous 200 clients concurrents
+
+Chaque client (coroutine) enchaîne des lectures de fiches produit, de pages du
+catalogue et quelques commandes. En mode synchrone, les requêtes bloquent la
+boucle asyncio ; en mode asynchrone, elles tournent sur les threads lecteurs et
+le thread écrivain. Affiche le débit, la latence p99 et le retard maximal de la
+boucle d'événements (mesuré par un battement de cœur de 1 ms).
+"""
+
+import asyncio
+import contextlib
+import random
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+from benchmarks.common import seed_products, temp_database
+from shopify.async_database import AsyncDatabase
+from shopify.database import Database, OutOfStockError
+from shopify.models import CartItem, Order, OrderStatus
+
+
+CLIENTS = 200
+REQUESTS_PER_CLIENT = 50
+PRODUCTS = 5_000
+ORDER_EVERY = 10  # une commande toutes les N requêtes
+
+
+def make_order(product_id: int) -> Order:
+    """Commande d'une unité d'un produit."""
+    item = CartItem(
+        product_id=product_id,
+        product_name=f"Produit {product_id}",
+        product_price=9.99,
+        product_image="https://example.com/image.jpg",
+        quantity=1,
+    )
+    return Order(
+        id=0,
+        user_id=1,
+        items=[item],
+        total=item.subtotal(),
+        status=OrderStatus.PAID,
+        shipping_address="1 rue de la Paix, Paris",
+    )
+
+
+def sync_request(db: Database, step: int, rng: random.Random) -> Callable[[], object]:
+    """Requête `step` d'un client, sous forme d'appel bloquant."""
+    product_id = rng.randint(1, PRODUCTS)
+    if step % ORDER_EVERY == ORDER_EVERY - 1:
+        return lambda: db.place_order(make_order(product_id))
+    if step % 2:
+        return lambda: db.get_products_page(24)
+    return lambda: db.get_product_by_id(product_id)
+
+
+def async_request(
+    adb: AsyncDatabase, step: int, rng: random.Random
+) -> Awaitable[object]:
+    """Requête `step` d'un client, sous forme de coroutine."""
+    product_id = rng.randint(1, PRODUCTS)
+    if step % ORDER_EVERY == ORDER_EVERY - 1:
+        return adb.place_order(make_order(product_id))
+    if step % 2:
+        return adb.get_products_page(24)
+    return adb.get_product_by_id(product_id)
+
+
+async def heartbeat(lags: list[float], stop: asyncio.Event) -> None:
+    """Mesure le retard de la boucle sur des réveils attendus toutes les 1 ms."""
+    while not stop.is_set():
+        expected = time.perf_counter() + 0.001
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - expected)
+
+
+async def sync_client(db: Database, seed: int, latencies: list[float]) -> None:
+    """Client qui appelle directement la base synchrone depuis la boucle."""
+    rng = random.Random(seed)
+    for step in range(REQUESTS_PER_CLIENT):
+        call = sync_request(db, step, rng)
+        start = time.perf_counter()
+        with contextlib.suppress(OutOfStockError):
+            call()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0)  # rend la main comme le ferait un serveur
+
+
+async def async_client(adb: AsyncDatabase, seed: int, latencies: list[float]) -> None:
+    """Client qui passe par AsyncDatabase."""
+    rng = random.Random(seed)
+    for step in range(REQUESTS_PER_CLIENT):
+        start = time.perf_counter()
+        with contextlib.suppress(OutOfStockError):
+            await async_request(adb, step, rng)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_mode(db: Database, use_async: bool) -> None:
+    """Lance CLIENTS clients concurrents et affiche les mesures."""
+    latencies: list[float] = []
+    lags: list[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(heartbeat(lags, stop))
+    adb = AsyncDatabase(db) if use_async else None
+
+    start = time.perf_counter()
+    if adb is not None:
+        clients = [async_client(adb, seed, latencies) for seed in range(CLIENTS)]
+    else:
+        clients = [sync_client(db, seed, latencies) for seed in range(CLIENTS)]
+    await asyncio.gather(*clients)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await ticker
+    if adb is not None:
+        await adb.close()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    label = "AsyncDatabase" if use_async else "Database (bloquant)"
+    print(f"   {label:<20}: {len(latencies) / elapsed:>8,.0f} req/s  ", end="")
+    print(f"p99 {quantiles[98] * 1000:>7.2f} ms  ", end="")
+    print(f"retard boucle max {max(lags, default=0.0) * 1000:>7.2f} ms")
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    print(f"📊 {CLIENTS} clients x {REQUESTS_PER_CLIENT} requêtes, {PRODUCTS} produits")
+    for use_async in (False, True):
+        with temp_database() as db:
+            seed_products(db, PRODUCTS)
+            asyncio.run(run_mode(db, use_async))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,63 @@
+"""
+Benchmark: tier web sur SQLite contre le moteur en mémoire
+
+Sert les mêmes routes (/products, /product/<id>, recherche) avec `Database` puis
+avec `MemoryDatabase`. L'écart donne la part de la base dans le temps de
+réponse ; le débit en mémoire est celui du tier web seul (Flask + templates).
+"""
+
+import random
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+
+from benchmarks.common import measure, seed_products, temp_database
+from shopify import app as shopify_app
+from shopify.memory import MemoryDatabase
+from shopify.repository import Repository
+
+
+PRODUCTS = 2_000
+ITERATIONS = 500
+
+
+@contextmanager
+def memory_database() -> Iterator[Repository]:
+    """Moteur en mémoire (même interface que temp_database)."""
+    yield MemoryDatabase()
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    client = shopify_app.app.test_client()
+    original = shopify_app.db
+    rng = random.Random(42)
+    backends: dict[str, Callable[[], AbstractContextManager[Repository]]] = {
+        "SQLite": temp_database,
+        "mémoire": memory_database,
+    }
+
+    print(f"📊 {PRODUCTS} produits, {ITERATIONS} requêtes par route (sans cache)\n")
+    try:
+        for label, open_backend in backends.items():
+            with open_backend() as db:
+                seed_products(db, PRODUCTS)
+                shopify_app.use_database(db, cache=False)
+
+                listing = measure(lambda: client.get("/products"), ITERATIONS)
+                detail = measure(
+                    lambda: client.get(f"/product/{rng.randint(1, PRODUCTS)}"),
+                    ITERATIONS,
+                )
+                search = measure(
+                    lambda: client.get("/products?search=produit+12"), ITERATIONS
+                )
+
+            print(f"{label:>10} | /products        {listing:8.1f} req/s")
+            print(f"{'':>10} | /product/<id>    {detail:8.1f} req/s")
+            print(f"{'':>10} | recherche        {search:8.1f} req/s")
+    finally:
+        shopify_app.use_database(original)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,106 @@
+"""
+Benchmark: sauvegarde à chaud pendant des commandes
+
+Des threads passent des commandes en continu. On mesure leur débit seul, puis
+pendant une sauvegarde avec différents réglages (taille des pas, pause,
+compression) : débit de copie en Mo/s et ralentissement des écrivains.
+"""
+
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from functools import partial
+
+from benchmarks.bench_orders import seed_orders
+from benchmarks.common import seed_products, temp_database
+from shopify.backup import BackupResult, BackupSettings, backup_database
+from shopify.database import Database
+from shopify.instrumentation import InstrumentationSettings
+
+
+PRODUCTS = 100_000
+WRITERS = 4
+BASELINE_SECONDS = 2.0
+
+SCENARIOS = [
+    ("d'un bloc", BackupSettings(pages_per_step=-1, pause=0)),
+    ("pas de 1024 p.", BackupSettings(pages_per_step=1024, pause=0)),
+    ("pas de 256 p. + 2 ms", BackupSettings()),
+    ("pas de 256 p. + gzip", BackupSettings(compress=True)),
+]
+
+
+class Writers:
+    """Threads qui passent des commandes jusqu'à l'arrêt et les comptent."""
+
+    def __init__(self, db: Database) -> None:
+        """Démarre les écrivains."""
+        self.orders = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._run, args=(db, user_id))
+            for user_id in range(1, WRITERS + 1)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _run(self, db: Database, user_id: int) -> None:
+        """Une commande à la fois, jusqu'à l'arrêt."""
+        while not self._stop.is_set():
+            seed_orders(db, user_id, 1)
+            with self._lock:
+                self.orders += 1
+
+    def rate_during(self, func: Callable[[], object]) -> tuple[float, object]:
+        """Commandes par seconde pendant l'exécution de `func`."""
+        before, start = self.orders, time.perf_counter()
+        result = func()
+        return (self.orders - before) / (time.perf_counter() - start), result
+
+    def stop(self) -> None:
+        """Arrête les écrivains."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    with (
+        temp_database(instrumentation=InstrumentationSettings(enabled=False)) as db,
+        tempfile.TemporaryDirectory() as backups,
+    ):
+        seed_products(db, PRODUCTS)
+        writers = Writers(db)
+        try:
+            baseline, _ = writers.rate_during(lambda: time.sleep(BASELINE_SECONDS))
+            print(f"📊 {PRODUCTS} produits, {WRITERS} écrivains")
+            print(f"   sans sauvegarde : {baseline:,.0f} commandes/s\n")
+            print(
+                f"{'réglage':<22} | {'Mo':>6} | {'Mo/s':>7} | "
+                f"{'commandes/s':>11} | {'ralentissement':>14}"
+            )
+            for label, scenario in SCENARIOS:
+                settings = BackupSettings(
+                    backups,
+                    scenario.pages_per_step,
+                    scenario.pause,
+                    scenario.compress,
+                )
+                rate, result = writers.rate_during(
+                    partial(backup_database, db, settings)
+                )
+                assert isinstance(result, BackupResult)
+                slowdown = (1 - rate / baseline) * 100
+                print(
+                    f"{label:<22} | {result.bytes_copied / 1_000_000:6.1f} | "
+                    f"{result.mb_per_s():7.1f} | {rate:11,.0f} | {slowdown:13.0f} %"
+                )
+        finally:
+            writers.stop()
+
+
+if __name__ == "__main__":
+    run()
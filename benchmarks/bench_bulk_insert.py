@@ -0,0 +1,41 @@
+"""
+Benchmark: insertion en masse du catalogue
+
+Compare add_product (une transaction par ligne) à add_products_bulk
+(executemany par lots) puis charge un catalogue d'un million de produits.
+"""
+
+import sys
+import time
+
+from benchmarks.common import make_product, temp_database
+
+
+SINGLE_ROWS = 10_000
+BULK_ROWS = 1_000_000
+
+
+def run(bulk_rows: int = BULK_ROWS) -> None:
+    """Lance le benchmark et affiche les résultats."""
+    with temp_database() as db:
+        start = time.perf_counter()
+        for index in range(SINGLE_ROWS):
+            db.add_product(make_product(index))
+        single = SINGLE_ROWS / (time.perf_counter() - start)
+        print(
+            f"add_product       : {single:12,.0f} produits/s ({SINGLE_ROWS:,} lignes)"
+        )
+
+    with temp_database() as db:
+        start = time.perf_counter()
+        ids = db.add_products_bulk(make_product(index) for index in range(bulk_rows))
+        elapsed = time.perf_counter() - start
+        assert len(ids) == bulk_rows == db.count_products()
+        print(
+            f"add_products_bulk : {bulk_rows / elapsed:12,.0f} produits/s "
+            f"({bulk_rows:,} lignes en {elapsed:.1f} s)"
+        )
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else BULK_ROWS)
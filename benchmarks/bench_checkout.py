@@ -0,0 +1,89 @@
+"""
+Benchmark: vente flash sur un produit unique
+
+Plusieurs threads passent des commandes en parallèle sur le même produit
+via Database.place_order. Affiche le débit de commandes, la latence p50/p99
+et vérifie que le stock n'est jamais survendu.
+"""
+
+import statistics
+import threading
+import time
+
+from benchmarks.common import make_product, temp_database
+from shopify.database import Database, OutOfStockError
+from shopify.models import CartItem, Order, OrderStatus
+
+
+THREADS = 16
+ORDERS_PER_THREAD = 200
+STOCK = THREADS * ORDERS_PER_THREAD // 2  # la moitié des commandes échoue
+
+
+def buyer(
+    db: Database,
+    product_id: int,
+    latencies: list[float],
+    outcomes: list[bool],
+) -> None:
+    """Passe ORDERS_PER_THREAD commandes d'une unité du produit."""
+    item = CartItem(
+        product_id=product_id,
+        product_name="Produit vedette",
+        product_price=9.99,
+        product_image="https://example.com/image.jpg",
+        quantity=1,
+    )
+    for _ in range(ORDERS_PER_THREAD):
+        order = Order(
+            id=0,
+            user_id=1,
+            items=[item],
+            total=item.subtotal(),
+            status=OrderStatus.PAID,
+            shipping_address="1 rue de la Paix, Paris",
+        )
+        start = time.perf_counter()
+        try:
+            db.place_order(order)
+            outcomes.append(True)
+        except OutOfStockError:
+            outcomes.append(False)
+        latencies.append(time.perf_counter() - start)
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    with temp_database() as db:
+        product = make_product(0)
+        product.stock = STOCK
+        product_id = db.add_product(product)
+
+        latencies: list[float] = []
+        outcomes: list[bool] = []
+        threads = [
+            threading.Thread(target=buyer, args=(db, product_id, latencies, outcomes))
+            for _ in range(THREADS)
+        ]
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        remaining = db.get_product_by_id(product_id)
+        sold = sum(outcomes)
+        assert remaining is not None and remaining.stock == STOCK - sold == 0
+
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(f"📊 {THREADS} threads x {ORDERS_PER_THREAD} commandes, stock {STOCK}")
+        print(f"   commandes acceptées : {sold} / refusées : {len(outcomes) - sold}")
+        print(f"   débit               : {len(outcomes) / elapsed:,.0f} commandes/s")
+        print(f"   latence p50         : {quantiles[49] * 1000:.2f} ms")
+        print(f"   latence p99         : {quantiles[98] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,111 @@
+"""
+Benchmark: index en colonnes (NumPy) contre SQLite pour /products
+
+Sur 1 000 000 produits, mesure la construction de l'index, puis pour quelques
+combinaisons de filtres et chaque tri la latence d'une page (première et
+profonde) et des comptes par facette, via SQL et via l'index. Mesure enfin le
+patch de l'index après la mise à jour d'un produit, et une page triée sans puis
+avec l'ordre de tri précalculé.
+"""
+
+import time
+from collections.abc import Callable
+from functools import partial
+
+from benchmarks.common import seed_products, temp_database
+from shopify.columnar import ColumnarCatalog
+from shopify.database import Database
+from shopify.instrumentation import InstrumentationSettings
+from shopify.models import ProductFilters, ProductSort, Review
+
+
+PRODUCTS = 1_000_000
+REPEAT = 5
+DEEP_PAGE = 20
+
+SCENARIOS = {
+    "tout le catalogue": ProductFilters(),
+    "catégorie": ProductFilters(category="Mode"),
+    "prix 25-100 en stock": ProductFilters(
+        min_price=25.0, max_price=100.0, in_stock=True
+    ),
+    "catégorie + note ≥ 4": ProductFilters(category="Sport", min_rating=4),
+}
+
+Source = Database | ColumnarCatalog
+
+
+def elapsed_ms(func: Callable[[], object], repeat: int = REPEAT) -> float:
+    """Durée moyenne d'un appel de `func`, en ms."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def page_ms(source: Source, filters: ProductFilters) -> tuple[float, float]:
+    """Latence de la première page et de la page `DEEP_PAGE`, en ms."""
+    first = elapsed_ms(lambda: source.get_filtered_products_page(filters))
+    cursor = None
+    for _ in range(DEEP_PAGE - 1):
+        cursor = source.get_filtered_products_page(filters, cursor=cursor).next_cursor
+    deep = elapsed_ms(lambda: source.get_filtered_products_page(filters, cursor=cursor))
+    return first, deep
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    with temp_database(instrumentation=InstrumentationSettings(enabled=False)) as db:
+        seed_products(db, PRODUCTS)
+        with db.connection() as conn:
+            conn.execute("ANALYZE")
+        columnar = ColumnarCatalog(db)
+        start = time.perf_counter()
+        index = columnar.index  # attend la première construction (thread)
+        build_ms = (time.perf_counter() - start) * 1000
+        print(
+            f"📊 {PRODUCTS:,} produits : index construit en {build_ms:.0f} ms "
+            f"({index.nbytes() / 1e6:.0f} Mo)\n"
+        )
+
+        sorts = "".join(f"{sort.value:>24}" for sort in ProductSort)
+        print(f"   première / page {DEEP_PAGE} (ms){sorts}")
+        for label, filters in SCENARIOS.items():
+            for name, source in (("SQL", db), ("colonnes", columnar)):
+                timings = [
+                    page_ms(source, ProductFilters(**{**vars(filters), "sort": sort}))
+                    for sort in ProductSort
+                ]
+                cells = "".join(
+                    f"{first:>12.2f}/{deep:<11.2f}" for first, deep in timings
+                )
+                print(f"   {label:<22} {name:<9}{cells}")
+
+        print("\n   comptes par facette (ms)       SQL   colonnes")
+        for label, filters in SCENARIOS.items():
+            sql = elapsed_ms(partial(db.get_facet_counts, filters))
+            vectorized = elapsed_ms(partial(columnar.get_facet_counts, filters))
+            assert db.get_facet_counts(filters) == columnar.get_facet_counts(filters)
+            print(f"   {label:<26}: {sql:>8.2f} {vectorized:>10.2f}")
+
+        db.add_review(Review(0, 1, 1, "Bench", 5, "Patch de l'index"))
+        start = time.perf_counter()
+        columnar.wait_for_refresh()  # patch appliqué par le thread de l'index
+        patch_ms = (time.perf_counter() - start) * 1000
+        print(f"\n   patch après un avis : {patch_ms:.1f} ms")
+
+        # La note patchée invalide l'ordre de tri par note : tri partiel
+        best = ProductFilters(category="Sport", sort=ProductSort.RATING)
+        partial_ms = page_ms(columnar, best)
+        columnar.refresh()
+        walk_ms = page_ms(columnar, best)
+        print(
+            "   tri par note, première / page profonde (ms) : "
+            f"tri partiel {partial_ms[0]:.2f}/{partial_ms[1]:.2f}, "
+            f"ordre précalculé {walk_ms[0]:.2f}/{walk_ms[1]:.2f}"
+        )
+        columnar.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,53 @@
+"""
+Benchmark: pool de connexions + WAL contre une connexion par appel
+
+Compare le nombre de requêtes par seconde servies par /products et
+/product/<id> avec les deux comportements de `Database`.
+"""
+
+import random
+
+from benchmarks.common import measure, seed_products, temp_database
+from shopify import app as shopify_app
+from shopify.connection import SQLiteSettings
+
+
+PRODUCTS = 200
+ITERATIONS = 500
+
+SCENARIOS = {
+    "connexion par appel": SQLiteSettings(
+        pooled=False, journal_mode="DELETE", synchronous="FULL"
+    ),
+    "pool + WAL": SQLiteSettings(),
+}
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    client = shopify_app.app.test_client()
+    original = shopify_app.db
+    rng = random.Random(42)
+
+    print(f"📊 {PRODUCTS} produits, {ITERATIONS} requêtes par route\n")
+    try:
+        for label, settings in SCENARIOS.items():
+            with temp_database(settings) as db:
+                seed_products(db, PRODUCTS)
+                # Sans cache : on mesure l'accès à la base lui-même
+                shopify_app.use_database(db, cache=False)
+
+                listing = measure(lambda: client.get("/products"), ITERATIONS)
+                detail = measure(
+                    lambda: client.get(f"/product/{rng.randint(1, PRODUCTS)}"),
+                    ITERATIONS,
+                )
+
+            print(f"{label:>20} | /products      {listing:8.1f} req/s")
+            print(f"{'':>20} | /product/<id>  {detail:8.1f} req/s")
+    finally:
+        shopify_app.use_database(original)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,96 @@
+"""
+Benchmark: export en flux de 5 millions de commandes
+
+Exporte une période récente (filtre par dates) puis l'historique complet, en
+CSV et en NDJSON, vers un puits qui ne garde rien. Chaque export tourne dans un
+processus neuf dont on relève le pic de mémoire résidente (tas Python et
+SQLite, mmap désactivé) : sa hausse pendant l'export doit rester sous
+MEMORY_CEILING_MB, quelle que soit la taille de l'export.
+"""
+
+import multiprocessing
+import resource
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from benchmarks.bench_sales import HISTORY_DAYS, insert_history
+from benchmarks.common import temp_database
+from shopify.connection import SQLiteSettings
+from shopify.database import Database
+from shopify.export import DateRange, export_chunks
+from shopify.instrumentation import InstrumentationSettings
+
+
+ORDERS = 5_000_000
+MEMORY_CEILING_MB = 32
+
+
+def drain(chunks: Iterator[str]) -> tuple[int, int]:
+    """Consomme un export ; retourne (octets, lignes)."""
+    size = lines = 0
+    for chunk in chunks:
+        size += len(chunk)
+        lines += chunk.count("\n")
+    return size, lines
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus, en Mo (Linux : ru_maxrss en Kio)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def export_worker(
+    db_path: str, fmt: str, since: date | None
+) -> tuple[int, int, float, float]:
+    """Exporte les commandes dans ce processus.
+
+    Retourne (octets, lignes, secondes, hausse du pic de mémoire en Mo).
+    """
+    db = Database(
+        db_path,
+        SQLiteSettings(mmap_size=0),
+        InstrumentationSettings(enabled=False),
+    )
+    try:
+        baseline = peak_rss_mb()
+        start = time.perf_counter()
+        size, lines = drain(export_chunks(db, "orders", fmt, DateRange(since)))
+        elapsed = time.perf_counter() - start
+        return size, lines, elapsed, peak_rss_mb() - baseline
+    finally:
+        db.close()
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    with temp_database(instrumentation=InstrumentationSettings(enabled=False)) as db:
+        start = time.perf_counter()
+        insert_history(db, 1, ORDERS, 0)
+        print(
+            f"📊 {ORDERS:,} commandes sur {HISTORY_DAYS} jours "
+            f"(insérées en {time.perf_counter() - start:.0f} s)"
+        )
+
+        recent = date.today() - timedelta(days=HISTORY_DAYS // 10)
+        context = multiprocessing.get_context("spawn")
+        for since in (recent, None):
+            for fmt in ("csv", "ndjson"):
+                with ProcessPoolExecutor(1, mp_context=context) as pool:
+                    size, lines, elapsed, growth = pool.submit(
+                        export_worker, db.db_path, fmt, since
+                    ).result()
+                period = f"depuis {since}" if since else "tout l'historique"
+                print(
+                    f"   {fmt:<6} {period:<18}: {lines:>11,} lignes, "
+                    f"{size / 1_000_000:7.1f} Mo en {elapsed:5.1f} s "
+                    f"({lines / elapsed:,.0f} lignes/s), "
+                    f"mémoire +{growth:.1f} Mo"
+                )
+                assert growth < MEMORY_CEILING_MB, f"mémoire +{growth:.1f} Mo"
+        print(f"   ✅ hausse mémoire < {MEMORY_CEILING_MB} Mo pour chaque export")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,100 @@
+"""
+Benchmark: navigation par facettes sur un grand catalogue
+
+Sur 500 000 produits, mesure pour quelques combinaisons de filtres le calcul
+des comptes par facette (requête groupée, puis depuis FacetCache) et la
+latence de la première page et d'une page profonde, pour chaque tri. Les
+pages sont mesurées avec et sans les index de la migration 8.
+"""
+
+import time
+from collections.abc import Callable
+from functools import partial
+
+from benchmarks.common import seed_products, temp_database
+from shopify.cache import FacetCache
+from shopify.database import Database
+from shopify.instrumentation import InstrumentationSettings
+from shopify.models import ProductFilters, ProductSort
+
+
+PRODUCTS = 500_000
+CACHED_READS = 10_000
+DEEP_PAGE = 20
+FACET_INDEXES = (
+    "idx_products_facets",
+    "idx_products_category_rating",
+    "idx_products_price",
+    "idx_products_rating",
+)
+
+SCENARIOS = {
+    "tout le catalogue": ProductFilters(),
+    "catégorie": ProductFilters(category="Mode"),
+    "prix 25-100 en stock": ProductFilters(
+        min_price=25.0, max_price=100.0, in_stock=True
+    ),
+    "catégorie + note ≥ 4": ProductFilters(category="Sport", min_rating=4),
+}
+
+
+def elapsed_ms(func: Callable[[], object], repeat: int = 1) -> float:
+    """Durée moyenne d'un appel de `func`, en ms."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def deep_page_ms(db: Database, filters: ProductFilters) -> tuple[float, float]:
+    """Latence de la première page et de la page `DEEP_PAGE`, en ms."""
+    first = elapsed_ms(lambda: db.get_filtered_products_page(filters))
+    cursor = None
+    for _ in range(DEEP_PAGE - 1):
+        cursor = db.get_filtered_products_page(filters, cursor=cursor).next_cursor
+    deep = elapsed_ms(lambda: db.get_filtered_products_page(filters, cursor=cursor))
+    return first, deep
+
+
+def show_pages(db: Database) -> None:
+    """Latences des pages filtrées, pour chaque tri."""
+    print(f"                              première / page {DEEP_PAGE} (ms)")
+    for label, filters in SCENARIOS.items():
+        timings = [
+            deep_page_ms(db, ProductFilters(**{**vars(filters), "sort": sort}))
+            for sort in ProductSort
+        ]
+        cells = "  ".join(f"{first:6.2f}/{deep:6.2f}" for first, deep in timings)
+        print(f"   {label:<24}: {cells}")
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    with temp_database(instrumentation=InstrumentationSettings(enabled=False)) as db:
+        seed_products(db, PRODUCTS)
+        with db.connection() as conn:
+            conn.execute("ANALYZE")
+        cache = FacetCache(db)
+
+        print(f"📊 {PRODUCTS:,} produits\n")
+        print("   comptes par facette     requête (ms)   cache (µs)")
+        for label, filters in SCENARIOS.items():
+            cold = elapsed_ms(partial(db.get_facet_counts, filters))
+            cache.get_facet_counts(filters)
+            cached = elapsed_ms(partial(cache.get_facet_counts, filters), CACHED_READS)
+            print(f"   {label:<24}: {cold:>10.2f}   {cached * 1000:>10.2f}")
+
+        sorts = "  ".join(f"{sort.value:>13}" for sort in ProductSort)
+        print(f"\n   pages filtrées (avec index)   {sorts}")
+        show_pages(db)
+
+        with db.connection() as conn:
+            for index in FACET_INDEXES:
+                conn.execute(f"DROP INDEX {index}")
+            conn.execute("ANALYZE")
+        print("\n   pages filtrées (sans index de facettes)")
+        show_pages(db)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,113 @@
+"""
+Benchmark: import nocturne d'un flux fournisseur
+
+Génère un flux CSV de 100 000 produits identifiés par SKU, l'importe une
+première fois (ajouts) puis une seconde fois avec des prix et stocks modifiés,
+2 % de nouveaux produits et quelques lignes invalides (mise à jour par SKU).
+Affiche la durée et le débit de chaque passe, en CSV puis en NDJSON, et vérifie
+le nombre de produits et le contenu des rejets.
+"""
+
+import csv
+import json
+import random
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import CATEGORIES, temp_database
+from shopify.database import Database
+from shopify.importer import ImportReport, import_products
+from shopify.instrumentation import InstrumentationSettings
+
+
+ROWS = 100_000
+NEW_ROWS = 2_000
+BAD_ROWS = 100
+FIELDS = ("sku", "name", "description", "price", "image_url", "category", "stock")
+
+
+def feed(first: int, count: int, seed: int) -> list[dict[str, object]]:
+    """Lignes du flux pour les SKU first..first+count-1."""
+    rng = random.Random(seed)
+    return [
+        {
+            "sku": f"SKU-{index:07d}",
+            "name": f"Article fournisseur {index}",
+            "description": f"Description de l'article {index} du fournisseur. " * 3,
+            "price": round(rng.uniform(1, 500), 2),
+            "image_url": f"https://cdn.example.com/{index}.jpg",
+            "category": CATEGORIES[index % len(CATEGORIES)],
+            "stock": rng.randrange(200),
+        }
+        for index in range(first, first + count)
+    ]
+
+
+def write_feed(path: Path, rows: list[dict[str, object]], fmt: str) -> None:
+    """Écrit le flux au format `fmt` (CSV avec en-tête ou NDJSON)."""
+    with path.open("w", encoding="utf-8", newline="") as output:
+        if fmt == "csv":
+            writer = csv.DictWriter(output, FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            output.writelines(json.dumps(row) + "\n" for row in rows)
+
+
+def import_file(db: Database, path: Path, fmt: str, rejects_path: Path) -> ImportReport:
+    """Importe un fichier et retourne son bilan."""
+    with (
+        path.open(encoding="utf-8", newline="") as lines,
+        rejects_path.open("w", encoding="utf-8") as rejects,
+    ):
+        return import_products(db, lines, fmt, rejects)
+
+
+def show(label: str, report: ImportReport) -> None:
+    """Affiche le bilan d'une passe."""
+    print(
+        f"   {label:<22}: {report.inserted:>7,} ajouts, {report.updated:>7,} "
+        f"mises à jour, {report.rejected:>4,} rejets en {report.seconds:5.2f} s "
+        f"({report.rows_per_s():,.0f} lignes/s, {report.chunks} lots)"
+    )
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    initial = feed(0, ROWS, 1)
+    nightly = feed(0, ROWS - NEW_ROWS, 2) + feed(ROWS, NEW_ROWS, 2)
+    rng = random.Random(3)
+    # Lignes invalides parmi les produits déjà connus
+    for row in rng.sample(nightly[: ROWS - NEW_ROWS], BAD_ROWS):
+        row["price"] = "N/A"
+
+    print(f"📊 Flux de {ROWS:,} produits, puis flux nocturne ({NEW_ROWS:,} nouveaux)")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        directory = Path(tmp_dir)
+        for fmt in ("csv", "ndjson"):
+            first, second = directory / f"initial.{fmt}", directory / f"nightly.{fmt}"
+            write_feed(first, initial, fmt)
+            write_feed(second, nightly, fmt)
+            rejects = directory / "rejects.ndjson"
+
+            with temp_database(
+                instrumentation=InstrumentationSettings(enabled=False)
+            ) as db:
+                report = import_file(db, first, fmt, rejects)
+                show(f"{fmt} import initial", report)
+                assert report.inserted == ROWS and not report.rejected
+
+                report = import_file(db, second, fmt, rejects)
+                show(f"{fmt} flux nocturne", report)
+                assert report.inserted == NEW_ROWS, report
+                assert report.updated == ROWS - NEW_ROWS - BAD_ROWS, report
+                assert db.count_products() == ROWS + NEW_ROWS
+                with rejects.open(encoding="utf-8") as lines:
+                    errors = [json.loads(line)["error"] for line in lines]
+                assert len(errors) == BAD_ROWS and "price" in errors[0], errors[:1]
+
+    print("   ✅ nombres de produits et rejets conformes")
+
+
+if __name__ == "__main__":
+    run()
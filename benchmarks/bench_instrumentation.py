@@ -0,0 +1,38 @@
+"""
+Benchmark: coût de l'instrumentation des requêtes
+
+Compare le débit de lectures simples (fiche produit, page du catalogue) sans
+instrumentation, avec instrumentation complète et avec échantillonnage à 10 %.
+"""
+
+from functools import partial
+
+from benchmarks.common import measure, seed_products, temp_database
+from shopify.instrumentation import InstrumentationSettings
+
+
+PRODUCTS = 10_000
+ITERATIONS = 20_000
+
+MODES = {
+    "désactivée": InstrumentationSettings(enabled=False),
+    "complète": InstrumentationSettings(),
+    "échantillon 10 %": InstrumentationSettings(sample_rate=0.1),
+}
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    print(f"📊 {ITERATIONS} lectures par mode, {PRODUCTS} produits")
+    for label, settings in MODES.items():
+        with temp_database(instrumentation=settings) as db:
+            seed_products(db, PRODUCTS)
+            by_id = measure(partial(db.get_product_by_id, PRODUCTS // 2), ITERATIONS)
+            page = measure(partial(db.get_products_page, 24), ITERATIONS // 10)
+            print(
+                f"   {label:<17}: fiche {by_id:>9,.0f} req/s   page {page:>8,.0f} req/s"
+            )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,70 @@
+"""
+Benchmark: décodage des lignes produits
+
+Compare, sur 100 000 produits, l'ancien décodage (SELECT *, sqlite3.Row,
+10 accès par nom et décodage immédiat de la date) à la couche
+shopify.mapping (projection, tuples positionnels, dates paresseuses).
+"""
+
+import sqlite3
+import time
+
+from benchmarks.common import seed_products, temp_database
+from shopify.mapping import (
+    PRODUCT_LIST,
+    fetch_rows,
+    parse_timestamp,
+    products_from_rows,
+)
+from shopify.models import Product
+
+
+ROWS = 100_000
+REPEAT = 3
+
+
+def decode_legacy(conn: sqlite3.Connection) -> list[Product]:
+    """Décodage d'origine : sqlite3.Row et Product(...) nommé."""
+    rows = conn.execute("SELECT * FROM products ORDER BY created_at DESC").fetchall()
+    return [
+        Product(
+            id=row["id"],
+            name=row["name"],
+            description=row["description"],
+            price=row["price"],
+            image_url=row["image_url"],
+            category=row["category"],
+            stock=row["stock"],
+            rating=row["rating"],
+            reviews_count=row["reviews_count"],
+            created_at=parse_timestamp(row["created_at"]),
+        )
+        for row in rows
+    ]
+
+
+def decode_mapped(conn: sqlite3.Connection) -> list[Product]:
+    """Décodage via shopify.mapping (projection de liste)."""
+    rows = fetch_rows(
+        conn, f"SELECT {PRODUCT_LIST.select()} FROM products ORDER BY created_at DESC"
+    )
+    return products_from_rows(rows)
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    with temp_database() as db:
+        seed_products(db, ROWS)
+        with db.connection() as conn:
+            for label, decode in (("avant", decode_legacy), ("après", decode_mapped)):
+                best = float("inf")
+                for _ in range(REPEAT):
+                    start = time.perf_counter()
+                    products = decode(conn)
+                    best = min(best, time.perf_counter() - start)
+                assert len(products) == ROWS
+                print(f"{label:>6} : {ROWS / best:12,.0f} lignes/s")
+
+
+if __name__ == "__main__":
+    run()
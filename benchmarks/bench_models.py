@@ -0,0 +1,183 @@
+"""
+Benchmark: empreinte mémoire des modèles à __slots__
+
+Compare chaque modèle (Product, User, CartItem, Order, Review) à la même
+dataclass sans slots (un `__dict__` par instance) et à sa variante à slots non
+figée : octets par instance (tracemalloc) et constructions par seconde (un
+modèle figé affecte ses champs par `object.__setattr__`, plus lent). Mesure
+ensuite le pic de RSS d'un listing de 1 000 000 produits construits depuis des
+lignes SQL, comme `get_all_products`, chaque variante dans son propre processus.
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections.abc import Iterator
+from dataclasses import MISSING, Field, fields, make_dataclass
+from datetime import datetime
+from functools import partial
+from typing import Any
+
+from benchmarks.common import CATEGORIES, measure
+from shopify.mapping import LazyProduct, products_from_rows, to_epoch
+from shopify.models import (
+    CartItem,
+    Order,
+    OrderStatus,
+    Product,
+    Review,
+    User,
+    UserRole,
+)
+
+
+INSTANCES = 100_000
+CONSTRUCTIONS = 500_000
+LISTING = 1_000_000
+
+NOW = datetime(2024, 6, 1, 12, 0)
+ITEM = CartItem(1, "Produit 1", 19.99, "https://example.com/images/1.jpg", 2)
+SAMPLES: dict[type, tuple[Any, ...]] = {
+    Product: (
+        1,
+        "Produit 1",
+        "Description détaillée du produit numéro 1.",
+        19.99,
+        "https://example.com/images/1.jpg",
+        "Mode",
+        12,
+        4.5,
+        37,
+        NOW,
+        "SKU-0000001",
+    ),
+    User: (1, "client@example.com", "0" * 64, "Jean", "Dupont", UserRole.CUSTOMER, NOW),
+    CartItem: (1, "Produit 1", 19.99, "https://example.com/images/1.jpg", 2),
+    Order: (1, 1, [ITEM], 39.98, OrderStatus.PAID, "1 rue de la Paix", NOW, NOW),
+    Review: (1, 1, 1, "Jean D.", 5, "Très bon produit", NOW),
+}
+
+
+def field_spec(model_field: Field[Any]) -> tuple[Any, ...]:
+    """Déclaration d'un champ pour `make_dataclass`."""
+    if model_field.default_factory is not MISSING:
+        return model_field.name, model_field.type, model_field
+    if model_field.default is not MISSING:
+        return model_field.name, model_field.type, model_field.default
+    return model_field.name, model_field.type
+
+
+def model_variant(model: type, slots: bool) -> type:
+    """La même dataclass, non figée, avec ou sans slots."""
+    methods = {
+        name: value
+        for name, value in vars(model).items()
+        if callable(value) and not name.startswith("__")
+    }
+    specs = [field_spec(model_field) for model_field in fields(model)]
+    name = f"{model.__name__}{'Slots' if slots else 'Dict'}"
+    return make_dataclass(name, specs, namespace=methods, slots=slots)
+
+
+def bytes_per_instance(model: type, args: tuple[Any, ...]) -> float:
+    """Mémoire allouée par instance (valeurs des champs partagées)."""
+    instances: list[Any] = [None] * INSTANCES
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for index in range(INSTANCES):
+        instances[index] = model(*args)
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return allocated / INSTANCES
+
+
+def product_rows(count: int) -> Iterator[tuple[Any, ...]]:
+    """Lignes PRODUCT_DETAIL telles que lues en base (dates en epoch)."""
+    created = to_epoch(NOW)
+    for index in range(count):
+        yield (
+            index + 1,
+            f"Produit {index}",
+            f"Description détaillée du produit numéro {index}.",
+            round(5 + (index * 7.31) % 995, 2),
+            f"https://example.com/images/{index}.jpg",
+            CATEGORIES[index % len(CATEGORIES)],
+            index % 50,
+            round((index % 50) / 10, 1),
+            index % 300,
+            created - index,
+            f"SKU-{index:07d}",
+        )
+
+
+def listing(variant: str) -> None:
+    """Construit le listing dans ce processus et affiche ses mesures en JSON."""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if variant == "slots":
+        products = products_from_rows(product_rows(LISTING))
+    else:
+        # Même décodage paresseux de created_at, sur la variante à __dict__
+        lazy = type(
+            "LazyProductDict",
+            (model_variant(Product, slots=False),),
+            {"created_at": vars(LazyProduct)["created_at"]},
+        )
+        products = [lazy(*row) for row in product_rows(LISTING)]
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    assert len(products) == LISTING and products[-1].created_at < NOW
+    print(json.dumps({"seconds": seconds, "baseline": baseline, "peak": peak}))
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    print(f"📊 {INSTANCES:,} instances par modèle\n")
+    print(f"{'':16}{'octets / instance':>21}  {'constructions / s':>33}")
+    variants = ("dict", "slots", "modèle")
+    print(
+        f"{'':16}{''.join(f'{name:>7}' for name in variants)}"
+        f"  {''.join(f'{name:>11}' for name in variants)}"
+    )
+    for model, args in SAMPLES.items():
+        classes = (
+            model_variant(model, slots=False),
+            model_variant(model, slots=True),
+            model,
+        )
+        sizes = "".join(f"{bytes_per_instance(cls, args):>7.0f}" for cls in classes)
+        rates = "".join(
+            f"{measure(partial(cls, *args), CONSTRUCTIONS):>11,.0f}" for cls in classes
+        )
+        frozen = " (figé)" if vars(model)["__dataclass_params__"].frozen else ""
+        print(f"   {model.__name__:<10}:  {sizes}  {rates}{frozen}")
+
+    print(f"\n   listing de {LISTING:,} produits (un processus par variante)")
+    for variant in ("dict", "slots"):
+        command = [sys.executable, "-m", "benchmarks.bench_models", "--listing"]
+        output = subprocess.run(
+            [*command, variant],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        result = json.loads(output)
+        print(
+            f"   {variant:<10}: pic RSS {result['peak'] / 1024:>7.0f} Mo "
+            f"(+{(result['peak'] - result['baseline']) / 1024:.0f} Mo) "
+            f"en {result['seconds']:.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--listing", choices=("dict", "slots"))
+    options = parser.parse_args()
+    if options.listing:
+        listing(options.listing)
+    else:
+        run()
@@ -0,0 +1,68 @@
+"""
+Benchmark: historique des commandes sans requêtes N+1
+
+Mesure la latence de get_user_orders (historique complet) et de
+get_user_orders_page (20 commandes) quand le nombre de commandes d'un
+utilisateur augmente. La page doit rester à latence constante.
+"""
+
+import time
+from collections.abc import Callable
+from functools import partial
+
+from benchmarks.common import temp_database
+from shopify.database import Database
+from shopify.models import CartItem, Order, OrderStatus
+
+
+ORDER_COUNTS = [10, 100, 1_000, 5_000]
+ITEMS_PER_ORDER = 3
+REPEAT = 20
+
+
+def seed_orders(db: Database, user_id: int, count: int) -> None:
+    """Crée `count` commandes de ITEMS_PER_ORDER articles pour l'utilisateur."""
+    items = [
+        CartItem(
+            product_id=index + 1,
+            product_name=f"Produit {index}",
+            product_price=9.99,
+            product_image="https://example.com/image.jpg",
+            quantity=1,
+        )
+        for index in range(ITEMS_PER_ORDER)
+    ]
+    for _ in range(count):
+        db.create_order(
+            Order(
+                id=0,
+                user_id=user_id,
+                items=items,
+                total=9.99 * ITEMS_PER_ORDER,
+                status=OrderStatus.PAID,
+                shipping_address="1 rue de la Paix, Paris",
+            )
+        )
+
+
+def latency_ms(func: Callable[[], object], repeat: int = REPEAT) -> float:
+    """Latence moyenne d'un appel, en millisecondes."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    print(f"{'commandes':>10} | {'historique complet':>18} | {'page de 20':>10}")
+    with temp_database() as db:
+        for user_id, count in enumerate(ORDER_COUNTS, start=1):
+            seed_orders(db, user_id, count)
+            full = latency_ms(partial(db.get_user_orders, user_id))
+            page = latency_ms(partial(db.get_user_orders_page, user_id, 20))
+            print(f"{count:>10} | {full:15.2f} ms | {page:7.2f} ms")
+
+
+if __name__ == "__main__":
+    run()
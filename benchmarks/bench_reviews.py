@@ -0,0 +1,129 @@
+"""
+Benchmark: avis concentrés sur quelques produits vedettes
+
+Des threads écrivains publient des avis sur une poignée de produits pendant que
+des lecteurs parcourent les pages d'avis. Affiche le débit et la latence p99
+des deux côtés, puis vérifie que la note agrégée de chaque produit correspond
+exactement aux avis enregistrés.
+"""
+
+import random
+import statistics
+import threading
+import time
+
+from benchmarks.common import make_product, temp_database
+from shopify.database import Database
+from shopify.models import Review
+
+
+HOT_PRODUCTS = 4
+WRITERS = 8
+REVIEWS_PER_WRITER = 250
+READERS = 4
+PAGE_SIZE = 20
+
+
+def reviewer(
+    db: Database, product_ids: list[int], seed: int, latencies: list[float]
+) -> None:
+    """Publie REVIEWS_PER_WRITER avis sur les produits vedettes."""
+    rng = random.Random(seed)
+    for index in range(REVIEWS_PER_WRITER):
+        review = Review(
+            id=0,
+            product_id=rng.choice(product_ids),
+            user_id=seed,
+            user_name=f"Client {seed}",
+            rating=rng.randint(1, 5),
+            comment=f"Avis numéro {index}",
+        )
+        start = time.perf_counter()
+        db.add_review(review)
+        latencies.append(time.perf_counter() - start)
+
+
+def reader(
+    db: Database, product_ids: list[int], stop: threading.Event, latencies: list[float]
+) -> None:
+    """Parcourt les avis des produits vedettes, page par page, jusqu'à l'arrêt."""
+    while not stop.is_set():
+        for product_id in product_ids:
+            cursor: str | None = None
+            for _ in range(5):  # les premières pages, comme un visiteur
+                start = time.perf_counter()
+                page = db.get_reviews(product_id, PAGE_SIZE, cursor)
+                latencies.append(time.perf_counter() - start)
+                if page.next_cursor is None:
+                    break
+                cursor = page.next_cursor
+
+
+def p99_ms(latencies: list[float]) -> float:
+    """Latence p99 en millisecondes."""
+    return statistics.quantiles(latencies, n=100)[98] * 1000
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    with temp_database() as db:
+        seeds = [make_product(index) for index in range(HOT_PRODUCTS)]
+        product_ids = db.add_products_bulk(seeds)
+
+        write_latencies: list[float] = []
+        read_latencies: list[float] = []
+        stop = threading.Event()
+        writers = [
+            threading.Thread(
+                target=reviewer, args=(db, product_ids, seed, write_latencies)
+            )
+            for seed in range(WRITERS)
+        ]
+        readers = [
+            threading.Thread(
+                target=reader, args=(db, product_ids, stop, read_latencies)
+            )
+            for _ in range(READERS)
+        ]
+
+        start = time.perf_counter()
+        for thread in writers + readers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+        with db.connections.connection() as conn:
+            totals = {
+                row[0]: (row[1], row[2])
+                for row in conn.execute(
+                    "SELECT product_id, SUM(rating), COUNT(*) FROM reviews "
+                    "GROUP BY product_id"
+                )
+            }
+        for seed, product_id in zip(seeds, product_ids, strict=True):
+            product = db.get_product_by_id(product_id)
+            added_sum, added_count = totals.get(product_id, (0, 0))
+            count = seed.reviews_count + added_count
+            expected = round((seed.rating * seed.reviews_count + added_sum) / count, 2)
+            assert product is not None
+            assert product.reviews_count == count, (product.reviews_count, count)
+            assert product.rating == expected, (product.rating, expected)
+
+        total = WRITERS * REVIEWS_PER_WRITER
+        print(
+            f"📊 {WRITERS} écrivains x {REVIEWS_PER_WRITER} avis "
+            f"sur {HOT_PRODUCTS} produits, {READERS} lecteurs"
+        )
+        print(f"   écritures : {total / elapsed:,.0f} avis/s")
+        print(f"   p99 écriture : {p99_ms(write_latencies):.2f} ms")
+        print(f"   lectures  : {len(read_latencies) / elapsed:,.0f} pages/s")
+        print(f"   p99 lecture  : {p99_ms(read_latencies):.2f} ms")
+        print("   ✅ notes agrégées cohérentes avec les avis")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,156 @@
+"""
+Benchmark: tableau de bord des ventes sur un historique croissant
+
+Insère l'historique des commandes par paliers, reconstruit les tables de cumul
+(rattrapage), puis compare la latence de get_sales_report avec le même calcul
+fait directement sur orders/order_items. Le tableau de bord doit rester à
+latence constante ; le calcul direct grandit avec l'historique.
+"""
+
+import random
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from benchmarks.common import CATEGORIES, seed_products, temp_database
+from shopify.analytics import SALES_DAYS, TOP_PRODUCTS, report_since
+from shopify.database import Database
+from shopify.instrumentation import InstrumentationSettings
+from shopify.mapping import to_epoch
+from shopify.models import CartItem, Order, OrderStatus
+
+
+PRODUCTS = 1_000
+ORDER_STEPS = [10_000, 100_000, 1_000_000]
+HISTORY_DAYS = 730
+ITEMS_PER_ORDER = 3
+CHUNK = 50_000
+REPEAT = 20
+
+# Même tableau de bord calculé à chaque affichage sur les tables de commandes
+AD_HOC_QUERIES = [
+    """
+    SELECT date(created_at, 'unixepoch'), COUNT(*) FROM orders
+    WHERE created_at >= ? GROUP BY 1
+    """,
+    """
+    SELECT p.category, SUM(i.quantity), SUM(i.product_price * i.quantity)
+    FROM orders o JOIN order_items i ON i.order_id = o.id
+    JOIN products p ON p.id = i.product_id
+    WHERE o.created_at >= ? GROUP BY p.category
+    """,
+    """
+    SELECT product_id, SUM(quantity), SUM(product_price * quantity) AS revenue
+    FROM order_items GROUP BY product_id ORDER BY revenue DESC LIMIT ?
+    """,
+]
+
+
+def insert_history(db: Database, first_id: int, count: int, seed: int) -> None:
+    """Insère `count` commandes réparties sur HISTORY_DAYS jours (SQL direct)."""
+    rng = random.Random(seed)
+    now = to_epoch(datetime.now())
+    with db.connection() as conn:
+        for start in range(first_id, first_id + count, CHUNK):
+            order_ids = range(start, min(start + CHUNK, first_id + count))
+            orders = []
+            items = []
+            for order_id in order_ids:
+                created_at = now - rng.randrange(HISTORY_DAYS * 86_400)
+                orders.append(
+                    (order_id, 1, 0.0, "paid", "Paris", created_at, created_at)
+                )
+                for _ in range(ITEMS_PER_ORDER):
+                    product_id = rng.randint(1, PRODUCTS)
+                    items.append(
+                        (order_id, product_id, f"Produit {product_id}", 9.99, "", 1)
+                    )
+            with conn:
+                conn.executemany(
+                    "INSERT INTO orders (id, user_id, total, status, "
+                    "shipping_address, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    orders,
+                )
+                conn.executemany(
+                    "INSERT INTO order_items (order_id, product_id, product_name, "
+                    "product_price, product_image, quantity) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    items,
+                )
+
+
+def ad_hoc_report(db: Database) -> None:
+    """Calcule le tableau de bord en parcourant les commandes."""
+    since = to_epoch(datetime.combine(report_since(SALES_DAYS), datetime.min.time()))
+    with db.connection() as conn:
+        conn.execute(AD_HOC_QUERIES[0], (since,)).fetchall()
+        conn.execute(AD_HOC_QUERIES[1], (since,)).fetchall()
+        conn.execute(AD_HOC_QUERIES[2], (TOP_PRODUCTS,)).fetchall()
+
+
+def latency_ms(func: Callable[[], object], repeat: int = REPEAT) -> float:
+    """Latence moyenne d'un appel, en millisecondes."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def order_throughput(db: Database, count: int = 2_000) -> float:
+    """Commandes par seconde via create_order (cumuls mis à jour au passage)."""
+    items = [
+        CartItem(index + 1, f"Produit {index}", 9.99, "", 1)
+        for index in range(ITEMS_PER_ORDER)
+    ]
+    start = time.perf_counter()
+    for index in range(count):
+        db.create_order(
+            Order(
+                id=0,
+                user_id=1,
+                items=items,
+                total=9.99 * ITEMS_PER_ORDER,
+                status=OrderStatus.PAID,
+                shipping_address="Paris",
+                created_at=datetime.now() - timedelta(minutes=index),
+            )
+        )
+    return count / (time.perf_counter() - start)
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    # Chargements massifs : pas de journal des requêtes lentes
+    with temp_database(instrumentation=InstrumentationSettings(enabled=False)) as db:
+        seed_products(db, PRODUCTS)
+        print(f"📊 {PRODUCTS} produits, {len(CATEGORIES)} catégories")
+        print(
+            f"   create_order avec cumuls : {order_throughput(db):,.0f} commandes/s\n"
+        )
+        print(
+            f"{'commandes':>10} | {'rattrapage':>10} | "
+            f"{'tableau de bord':>15} | {'calcul direct':>13}"
+        )
+
+        total = 0
+        with db.connection() as conn:
+            next_id = conn.execute("SELECT MAX(id) FROM orders").fetchone()[0] + 1
+        for step, target in enumerate(ORDER_STEPS):
+            insert_history(db, next_id + total, target - total, step)
+            total = target
+
+            start = time.perf_counter()
+            db.rebuild_sales_rollups()
+            rebuild_s = time.perf_counter() - start
+
+            report = latency_ms(db.get_sales_report)
+            direct = latency_ms(lambda: ad_hoc_report(db), repeat=3)
+            print(
+                f"{total:>10,} | {rebuild_s:8.2f} s | "
+                f"{report:12.2f} ms | {direct:10.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    run()
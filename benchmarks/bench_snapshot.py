@@ -0,0 +1,88 @@
+"""
+Benchmark: lectures du catalogue via SQL, cache LRU et instantané en mémoire
+
+Mesure le coût par lecture de get_product_by_id et d'une page du catalogue pour
+les trois chemins, puis le temps de reconstruction complète de l'instantané et
+d'un patch après l'ajout d'un produit.
+"""
+
+import random
+import time
+from collections.abc import Callable
+
+from benchmarks.common import make_product, seed_products, temp_database
+from shopify.cache import CatalogCache
+from shopify.database import Database
+from shopify.snapshot import SnapshotCatalog
+
+
+PRODUCTS = 100_000
+LOOKUPS = 200_000
+PAGES = 20_000
+
+
+def per_call_us(func: Callable[[], None], calls: int) -> float:
+    """Durée moyenne d'un appel de `func` (qui fait `calls` lectures), en µs."""
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1_000_000 / calls
+
+
+def run() -> None:
+    """Lance le benchmark et affiche les résultats."""
+    rng = random.Random(42)
+    ids = [rng.randint(1, PRODUCTS) for _ in range(LOOKUPS)]
+
+    with temp_database() as db:
+        seed_products(db, PRODUCTS)
+        cache = CatalogCache(db, max_products=PRODUCTS)
+        snapshot = SnapshotCatalog(db)
+        # Cache chaud : chaque id demandé est déjà en cache
+        for product_id in set(ids):
+            cache.get_product_by_id(product_id)
+        cursor = db.get_products_page(24).next_cursor
+
+        print(f"📊 {PRODUCTS} produits\n")
+        print("                   fiche (µs)   page (µs)")
+        for label, source in (
+            ("SQL", db),
+            ("cache LRU", cache),
+            ("instantané", snapshot),
+        ):
+            lookups = LOOKUPS if source is not db else LOOKUPS // 20
+            pages = PAGES if source is not db else PAGES // 20
+
+            def lookup(
+                source: Database | CatalogCache | SnapshotCatalog = source,
+                n: int = lookups,
+            ) -> None:
+                for product_id in ids[:n]:
+                    source.get_product_by_id(product_id)
+
+            def page(
+                source: Database | CatalogCache | SnapshotCatalog = source,
+                n: int = pages,
+            ) -> None:
+                for _ in range(n):
+                    source.get_products_page(24, cursor)
+
+            print(
+                f"   {label:<12}: {per_call_us(lookup, lookups):>10.3f}"
+                f"  {per_call_us(page, pages):>10.3f}"
+            )
+
+        start = time.perf_counter()
+        snapshot.refresh()
+        full_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        db.add_product(make_product(PRODUCTS))
+        snapshot.wait_for_refresh()
+        patch_ms = (time.perf_counter() - start) * 1000
+        snapshot.close()
+
+        print(f"\n   reconstruction complète : {full_ms:8.1f} ms")
+        print(f"   ajout d'un produit      : {patch_ms:8.1f} ms (écriture + patch)")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,61 @@
+"""
+Outils partagés par les benchmarks Shopify
+"""
+
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from shopify.connection import SQLiteSettings
+from shopify.database import Database
+from shopify.instrumentation import InstrumentationSettings
+from shopify.models import Product
+from shopify.repository import Repository
+
+
+CATEGORIES = ["Électronique", "Mode", "Maison", "Sport", "Livres", "Beauté"]
+
+
+@contextmanager
+def temp_database(
+    settings: SQLiteSettings | None = None,
+    instrumentation: InstrumentationSettings | None = None,
+) -> Iterator[Database]:
+    """Crée une base de données jetable dans un répertoire temporaire."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(str(Path(tmp_dir) / "bench.db"), settings, instrumentation)
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+def make_product(index: int) -> Product:
+    """Construit un produit de démonstration déterministe."""
+    return Product(
+        id=0,
+        name=f"Produit {index}",
+        description=f"Description détaillée du produit numéro {index}. " * 4,
+        price=round(5 + (index * 7.31) % 995, 2),
+        image_url=f"https://example.com/images/{index}.jpg",
+        category=CATEGORIES[index % len(CATEGORIES)],
+        stock=index % 50,
+        rating=round((index % 50) / 10, 1),
+        reviews_count=index % 300,
+    )
+
+
+def seed_products(db: Repository, count: int) -> None:
+    """Remplit la base avec `count` produits."""
+    db.add_products_bulk(make_product(index) for index in range(count))
+
+
+def measure(func: Callable[[], object], iterations: int) -> float:
+    """Exécute `func` `iterations` fois et retourne le nombre d'appels par seconde."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed if elapsed else float("inf")
@@ -0,0 +1,340 @@
+"""
+Statistiques de ventes pour le tableau de bord admin
+Tables de cumul mises à jour à chaque commande : le tableau de bord ne lit qu'elles
+"""
+
+import heapq
+import sqlite3
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+from shopify.mapping import EPOCH, fetch_rows, to_epoch
+from shopify.models import (
+    CategorySales,
+    DailySales,
+    Order,
+    ProductSales,
+    SalesReport,
+)
+
+
+SALES_DAYS = 30
+TOP_PRODUCTS = 10
+UNKNOWN_CATEGORY = "Sans catégorie"
+
+DAILY_UPSERT = """
+    INSERT INTO sales_daily (day, orders, units, revenue) VALUES (?, 1, ?, ?)
+    ON CONFLICT (day) DO UPDATE SET
+        orders = orders + 1,
+        units = units + excluded.units,
+        revenue = revenue + excluded.revenue
+"""
+
+# La catégorie est lue dans products au moment de la vente ; WHERE true lève
+# l'ambiguïté entre INSERT ... SELECT et ON CONFLICT
+CATEGORY_UPSERT = """
+    INSERT INTO sales_by_category (day, category, units, revenue)
+    SELECT ?, COALESCE((SELECT category FROM products WHERE id = ?), ?), ?, ?
+    WHERE true
+    ON CONFLICT (day, category) DO UPDATE SET
+        units = units + excluded.units,
+        revenue = revenue + excluded.revenue
+"""
+
+PRODUCT_UPSERT = """
+    INSERT INTO sales_by_product (product_id, product_name, units, revenue)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (product_id) DO UPDATE SET
+        product_name = excluded.product_name,
+        units = units + excluded.units,
+        revenue = revenue + excluded.revenue
+"""
+
+
+def sales_day(value: datetime) -> str:
+    """Jour de vente (AAAA-MM-JJ), identique à date(created_at, 'unixepoch')."""
+    return (EPOCH + timedelta(seconds=to_epoch(value))).date().isoformat()
+
+
+def report_since(days: int) -> date:
+    """Premier jour d'une période de `days` jours se terminant aujourd'hui."""
+    return date.fromisoformat(sales_day(datetime.now())) - timedelta(days=days - 1)
+
+
+@dataclass
+class OrderSales:
+    """Ventes d'une commande regroupées par produit."""
+
+    day: str
+    units: dict[int, int] = field(default_factory=dict)
+    revenue: dict[int, float] = field(default_factory=dict)
+    names: dict[int, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_order(cls, order: Order) -> "OrderSales":
+        """Regroupe les articles d'une commande par produit."""
+        sales = cls(sales_day(order.created_at))
+        for item in order.items:
+            pid = item.product_id
+            sales.units[pid] = sales.units.get(pid, 0) + item.quantity
+            sales.revenue[pid] = sales.revenue.get(pid, 0.0) + item.subtotal()
+            sales.names[pid] = item.product_name
+        return sales
+
+
+def record_order_sales(conn: sqlite3.Connection, order: Order) -> None:
+    """Ajoute une commande aux tables de cumul (dans la transaction en cours)."""
+    sales = OrderSales.from_order(order)
+    conn.execute(
+        DAILY_UPSERT,
+        (sales.day, sum(sales.units.values()), sum(sales.revenue.values())),
+    )
+    conn.executemany(
+        CATEGORY_UPSERT,
+        [
+            (sales.day, pid, UNKNOWN_CATEGORY, units, sales.revenue[pid])
+            for pid, units in sales.units.items()
+        ],
+    )
+    conn.executemany(
+        PRODUCT_UPSERT,
+        [
+            (pid, sales.names[pid], units, sales.revenue[pid])
+            for pid, units in sales.units.items()
+        ],
+    )
+
+
+def create_sales_rollups(conn: sqlite3.Connection) -> None:
+    """Crée les tables de cumul et les remplit depuis l'historique."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sales_daily (
+            day TEXT PRIMARY KEY,
+            orders INTEGER NOT NULL,
+            units INTEGER NOT NULL,
+            revenue REAL NOT NULL
+        ) WITHOUT ROWID
+    """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sales_by_category (
+            day TEXT NOT NULL,
+            category TEXT NOT NULL,
+            units INTEGER NOT NULL,
+            revenue REAL NOT NULL,
+            PRIMARY KEY (day, category)
+        ) WITHOUT ROWID
+    """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sales_by_product (
+            product_id INTEGER PRIMARY KEY,
+            product_name TEXT NOT NULL,
+            units INTEGER NOT NULL,
+            revenue REAL NOT NULL
+        )
+    """
+    )
+    # Meilleures ventes : lecture des `top` premières entrées de l'index
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_sales_by_product_revenue "
+        "ON sales_by_product (revenue DESC, product_id)"
+    )
+    rebuild_sales_rollups(conn)
+
+
+def rebuild_sales_rollups(
+    conn: sqlite3.Connection, schemas: Sequence[str] = ("main",)
+) -> None:
+    """Recalcule les tables de cumul depuis orders/order_items (rattrapage).
+
+    `schemas` liste les bases (principale, archive attachée) dont les commandes
+    sont comptées. Parcourt tout l'historique : à lancer ponctuellement, dans
+    une transaction.
+    """
+    # UNION (et non UNION ALL) : une commande en double après un archivage
+    # interrompu n'est comptée qu'une fois
+    orders = " UNION ".join(
+        f"SELECT id, created_at FROM {schema}.orders" for schema in schemas
+    )
+    items = " UNION ".join(
+        f"SELECT id, order_id, product_id, product_name, product_price, quantity "
+        f"FROM {schema}.order_items"
+        for schema in schemas
+    )
+    conn.execute("DELETE FROM sales_daily")
+    conn.execute("DELETE FROM sales_by_category")
+    conn.execute("DELETE FROM sales_by_product")
+    conn.execute(
+        f"""
+        INSERT INTO sales_daily (day, orders, units, revenue)
+        SELECT date(o.created_at, 'unixepoch'), COUNT(DISTINCT o.id),
+               COALESCE(SUM(i.quantity), 0),
+               COALESCE(SUM(i.product_price * i.quantity), 0)
+        FROM ({orders}) o LEFT JOIN ({items}) i ON i.order_id = o.id
+        GROUP BY 1
+    """
+    )
+    conn.execute(
+        f"""
+        INSERT INTO sales_by_category (day, category, units, revenue)
+        SELECT date(o.created_at, 'unixepoch'), COALESCE(p.category, ?),
+               SUM(i.quantity), SUM(i.product_price * i.quantity)
+        FROM ({items}) i
+        JOIN ({orders}) o ON o.id = i.order_id
+        LEFT JOIN products p ON p.id = i.product_id
+        GROUP BY 1, 2
+    """,
+        (UNKNOWN_CATEGORY,),
+    )
+    # Nom du produit tel qu'il figure sur sa dernière vente (ligne du MAX(id))
+    conn.execute(
+        f"""
+        INSERT INTO sales_by_product (product_id, product_name, units, revenue)
+        SELECT product_id, product_name, units, revenue FROM (
+            SELECT product_id, product_name, MAX(id),
+                   SUM(quantity) AS units, SUM(product_price * quantity) AS revenue
+            FROM ({items})
+            GROUP BY product_id
+        )
+    """
+    )
+
+
+def load_sales_report(
+    conn: sqlite3.Connection, days: int = SALES_DAYS, top: int = TOP_PRODUCTS
+) -> SalesReport:
+    """Lit le tableau de bord dans les tables de cumul.
+
+    Le coût dépend de `days`, du nombre de catégories et de `top`, pas du
+    nombre de commandes.
+    """
+    since = report_since(days)
+    daily_rows = fetch_rows(
+        conn,
+        "SELECT day, orders, units, revenue FROM sales_daily WHERE day >= ?",
+        (since.isoformat(),),
+    )
+    category_rows = fetch_rows(
+        conn,
+        "SELECT category, SUM(units), SUM(revenue) FROM sales_by_category "
+        "WHERE day >= ? GROUP BY category",
+        (since.isoformat(),),
+    )
+    product_rows = fetch_rows(
+        conn,
+        "SELECT product_id, product_name, units, revenue FROM sales_by_product "
+        "ORDER BY revenue DESC, product_id LIMIT ?",
+        (top,),
+    )
+    return build_report(
+        since,
+        days,
+        {row[0]: (row[1], row[2], row[3]) for row in daily_rows},
+        {row[0]: (row[1], row[2]) for row in category_rows},
+        [
+            ProductSales(row[0], row[1], row[2], round(row[3], 2))
+            for row in product_rows
+        ],
+    )
+
+
+def build_report(
+    since: date,
+    days: int,
+    daily: dict[str, tuple[int, int, float]],
+    categories: dict[str, tuple[int, float]],
+    top_products: list[ProductSales],
+) -> SalesReport:
+    """Assemble le rapport (jours sans vente à zéro, catégories par CA)."""
+    day_list = []
+    for offset in range(days):
+        day = since + timedelta(days=offset)
+        orders, units, revenue = daily.get(day.isoformat(), (0, 0, 0.0))
+        day_list.append(DailySales(day, orders, units, round(revenue, 2)))
+    category_list = [
+        CategorySales(category, units, round(revenue, 2))
+        for category, (units, revenue) in categories.items()
+    ]
+    category_list.sort(key=lambda sales: (-sales.revenue, sales.category))
+    return SalesReport(since, day_list, category_list, top_products)
+
+
+class SalesRollups:
+    """Mêmes tables de cumul en dictionnaires (moteur en mémoire)."""
+
+    def __init__(self) -> None:
+        """Crée des cumuls vides."""
+        self.daily: dict[str, tuple[int, int, float]] = {}
+        self.categories: dict[tuple[str, str], tuple[int, float]] = {}
+        self.products: dict[int, ProductSales] = {}
+
+    def add(self, order: Order, categories: dict[int, str]) -> None:
+        """Ajoute une commande ; `categories` donne la catégorie de chaque produit."""
+        sales = OrderSales.from_order(order)
+        orders, units, revenue = self.daily.get(sales.day, (0, 0, 0.0))
+        self.daily[sales.day] = (
+            orders + 1,
+            units + sum(sales.units.values()),
+            revenue + sum(sales.revenue.values()),
+        )
+        for pid, quantity in sales.units.items():
+            key = (sales.day, categories.get(pid, UNKNOWN_CATEGORY))
+            units, revenue = self.categories.get(key, (0, 0.0))
+            self.categories[key] = (units + quantity, revenue + sales.revenue[pid])
+
+            product = self.products.get(pid)
+            if product is None:
+                product = self.products[pid] = ProductSales(pid, "", 0, 0.0)
+            product.product_name = sales.names[pid]
+            product.units += quantity
+            product.revenue += sales.revenue[pid]
+
+    def report(self, days: int = SALES_DAYS, top: int = TOP_PRODUCTS) -> SalesReport:
+        """Tableau de bord sur les `days` derniers jours."""
+        since = report_since(days)
+        first_day = since.isoformat()
+        categories: dict[str, tuple[int, float]] = {}
+        for (day, category), (units, revenue) in self.categories.items():
+            if day >= first_day:
+                total_units, total_revenue = categories.get(category, (0, 0.0))
+                categories[category] = (total_units + units, total_revenue + revenue)
+        best = heapq.nsmallest(
+            top,
+            self.products.values(),
+            key=lambda sales: (-sales.revenue, sales.product_id),
+        )
+        return build_report(
+            since,
+            days,
+            self.daily,
+            categories,
+            [
+                ProductSales(s.product_id, s.product_name, s.units, round(s.revenue, 2))
+                for s in best
+            ],
+        )
+
+
+def main() -> None:
+    """Reconstruit les tables de cumul de la base par défaut."""
+    from shopify.database import Database
+
+    db = Database()
+    try:
+        db.rebuild_sales_rollups()
+        report = db.get_sales_report()
+    finally:
+        db.close()
+    print(
+        f"✅ Agrégats de ventes reconstruits ({report.total_orders()} commandes "
+        f"sur les {SALES_DAYS} derniers jours)"
+    )
+
+
+if __name__ == "__main__":
+    main()
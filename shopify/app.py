@@ -3,23 +3,63 @@ Shopify - Application E-Commerce Flask
 Intégrée avec le système CI/CD
 """
 
+import atexit
 import hashlib
 import os
+import tempfile
+from collections.abc import Iterator
+from contextlib import suppress
+from dataclasses import replace
 from typing import Any
 
 from flask import (
     Flask,
     flash,
+    g,
+    jsonify,
     redirect,
     render_template,
     request,
     session,
+    stream_with_context,
     url_for,
 )
+from markupsafe import Markup, escape
 from werkzeug.wrappers.response import Response
 
-from shopify.database import Database
-from shopify.models import CartItem, Order, OrderStatus, Product, User, UserRole
+from shopify.backup import BackupJob, BackupSettings
+from shopify.cache import (
+    CatalogCache,
+    FacetCache,
+    JSONBody,
+    LRUCache,
+    ProductJSONCache,
+)
+from shopify.columnar import NUMPY_AVAILABLE, ColumnarCatalog
+from shopify.database import (
+    HIGHLIGHT_END,
+    HIGHLIGHT_START,
+    Database,
+    OutOfStockError,
+)
+from shopify.export import MEDIA_TYPES, DateRange, export_chunks
+from shopify.facets import parse_filters
+from shopify.importer import SOURCE_ERRORS, import_format, progress_lines
+from shopify.init_data import init_demo_data
+from shopify.instrumentation import begin_request, current_request_queries, end_request
+from shopify.memory import MemoryDatabase
+from shopify.models import (
+    CartItem,
+    Order,
+    OrderStatus,
+    Product,
+    ProductSort,
+    Review,
+    User,
+    UserRole,
+)
+from shopify.repository import Repository
+from shopify.snapshot import SnapshotCatalog
 
 
 # Obtenir le chemin du répertoire parent (racine du projet)
@@ -33,8 +73,101 @@ app = Flask(
 app.secret_key = "shopify-secret-key-change-in-production"
 app.config["SESSION_TYPE"] = "filesystem"
 
-# Initialiser la base de données
-db = Database()
+
+def create_repository(backend: str | None = None) -> Repository:
+    """Crée le moteur de stockage : "sqlite" (défaut) ou "memory".
+
+    Le choix par défaut vient de la variable d'environnement SHOPIFY_BACKEND.
+    """
+    backend = backend or os.environ.get("SHOPIFY_BACKEND", "sqlite")
+    if backend == "sqlite":
+        return Database()
+    if backend == "memory":
+        memory = MemoryDatabase()
+        init_demo_data(memory)
+        return memory
+    raise ValueError(f"Moteur de stockage inconnu: {backend!r}")
+
+
+def create_catalog(database: Repository) -> CatalogCache | SnapshotCatalog:
+    """Lectures du catalogue : instantané en mémoire devant SQLite, LRU sinon."""
+    if isinstance(database, Database):
+        return SnapshotCatalog(database)
+    return CatalogCache(database)
+
+
+def create_filtered(database: Repository) -> ColumnarCatalog | Repository:
+    """Pages filtrées : index en colonnes devant SQLite (avec NumPy), la base sinon."""
+    if NUMPY_AVAILABLE and isinstance(database, Database):
+        return ColumnarCatalog(database)
+    return database
+
+
+# Initialiser la base de données (pool de connexions fermé à l'arrêt)
+db = create_repository()
+atexit.register(db.close)
+
+# Lectures du catalogue servies sans SQL (instantané ou cache devant la base)
+catalog: CatalogCache | SnapshotCatalog | Repository = create_catalog(db)
+
+# Pages filtrées et triées de /products (index en colonnes ou SQL)
+filtered: ColumnarCatalog | Repository = create_filtered(db)
+
+# Comptes de la navigation par facettes, en cache par combinaison de filtres
+facets: FacetCache | Repository = FacetCache(db, source=filtered)
+
+# Corps JSON de l'API produits, sérialisés une fois (avec leur ETag)
+api_cache = ProductJSONCache(db, source=filtered)
+
+# Utilisateurs connectés par email de session (expiration courte)
+USER_CACHE_SIZE = 10_000
+USER_CACHE_TTL = 30.0
+users: LRUCache[str, User] = LRUCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+# Sauvegarde à chaud lancée depuis l'admin (une seule à la fois)
+backup_job: BackupJob | None = None
+
+# Tailles de page du catalogue (/products, /admin) et de /orders
+PRODUCTS_PER_PAGE = 24
+ORDERS_PER_PAGE = 20
+REVIEWS_PER_PAGE = 10
+
+# Bornes de l'API JSON : produits par page et par lot
+API_PAGE_MAX = 100
+API_BATCH_MAX = 100
+
+# Tris proposés sur /products
+PRODUCT_SORTS = {
+    ProductSort.NEWEST: "Nouveautés",
+    ProductSort.PRICE_ASC: "Prix croissant",
+    ProductSort.PRICE_DESC: "Prix décroissant",
+    ProductSort.RATING: "Mieux notés",
+}
+
+
+@app.before_request
+def start_query_count() -> None:
+    """Démarre le comptage des requêtes SQL de la requête HTTP."""
+    g.query_token = begin_request()
+
+
+@app.after_request
+def report_query_count(response: Response) -> Response:
+    """Enregistre le nombre de requêtes SQL de la page (en-tête X-Query-Count)."""
+    queries = current_request_queries()
+    if queries is not None:
+        response.headers["X-Query-Count"] = str(queries.count)
+        if isinstance(db, Database):
+            db.queries.record_request(request.endpoint or request.path, queries)
+    return response
+
+
+@app.teardown_request
+def stop_query_count(exc: BaseException | None) -> None:
+    """Arrête le comptage des requêtes SQL."""
+    token = g.pop("query_token", None)
+    if token is not None:
+        end_request(token)
 
 
 @app.context_processor
@@ -50,20 +183,67 @@ def inject_globals() -> dict[str, Any]:
     }
 
 
+@app.template_filter("highlight")
+def highlight_filter(snippet: str) -> Markup:
+    """Convertit les marqueurs d'un extrait de recherche en balises <mark>."""
+    escaped = str(escape(snippet))
+    return Markup(
+        escaped.replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_END, "</mark>")
+    )
+
+
+def use_database(database: Repository, cache: bool = True) -> None:
+    """Branche l'application sur une autre base (benchmarks, scripts)."""
+    global db, catalog, filtered, facets, api_cache, users
+    if isinstance(catalog, SnapshotCatalog):
+        catalog.close()
+    if isinstance(filtered, ColumnarCatalog):
+        filtered.close()
+    db = database
+    catalog = create_catalog(database) if cache else database
+    filtered = create_filtered(database) if cache else database
+    facets = FacetCache(database, source=filtered) if cache else database
+    api_cache = (
+        ProductJSONCache(database, source=filtered)
+        if cache
+        else ProductJSONCache(database, max_products=0, max_pages=0)
+    )
+    users = LRUCache(USER_CACHE_SIZE if cache else 0, USER_CACHE_TTL)
+
+
 def hash_password(password: str) -> str:
     """Hash un mot de passe avec SHA-256."""
     return hashlib.sha256(password.encode()).hexdigest()
 
 
 def get_current_user() -> User | None:
-    """Récupère l'utilisateur connecté."""
-    if "user_email" in session:
-        return db.get_user_by_email(session["user_email"])
-    return None
+    """Récupère l'utilisateur connecté (une fois par requête HTTP)."""
+    if "current_user" not in g:
+        g.current_user = load_session_user()
+    user: User | None = g.current_user
+    return user
+
+
+def load_session_user() -> User | None:
+    """Utilisateur de la session, depuis le cache des utilisateurs si possible."""
+    email = session.get("user_email")
+    if email is None:
+        return None
+
+    user = users.get(email)
+    if user is None:
+        user = db.get_user_by_email(email)
+        if user is not None:
+            users.put(email, user)
+    return user
 
 
 def get_cart() -> list[CartItem]:
-    """Récupère le panier de la session."""
+    """Récupère le panier de la session (décodé une fois par requête HTTP)."""
+    if "cart" in g:
+        cached: list[CartItem] = g.cart
+        return cached
+
     if "cart" not in session:
         session["cart"] = []
 
@@ -81,12 +261,14 @@ def get_cart() -> list[CartItem]:
             )
         )
 
+    g.cart = cart
     return cart
 
 
 def save_cart(cart: list[CartItem]) -> None:
     """Sauvegarde le panier dans la session."""
     session["cart"] = [item.to_dict() for item in cart]
+    g.cart = cart
 
 
 def calculate_cart_total(cart: list[CartItem]) -> float:
@@ -97,84 +279,144 @@ def calculate_cart_total(cart: list[CartItem]) -> float:
 @app.route("/")
 def index() -> str:
     """Page d'accueil."""
-    products = db.get_all_products()
-    user = get_current_user()
-    cart = get_cart()
-
+    products = catalog.get_products_page(limit=8).items
     return render_template(
         "shopify/index.html",
-        products=products[:8],  # Afficher les 8 derniers produits
-        user=user,
-        cart_count=sum(item.quantity for item in cart),
+        products=products,  # Les 8 derniers produits
     )
 
 
 @app.route("/products")
-def products() -> str:
-    """Page catalogue de produits."""
-    category = request.args.get("category")
+def products() -> str | Response:
+    """Page catalogue de produits (filtres, tris et facettes)."""
     search = request.args.get("search")
-
-    if search:
-        products_list = db.search_products(search)
-    elif category:
-        products_list = db.get_products_by_category(category)
-    else:
-        products_list = db.get_all_products()
-
-    user = get_current_user()
-    cart = get_cart()
+    cursor = request.args.get("cursor")
+
+    snippets: dict[int, str] = {}
+    counts = None
+    try:
+        filters = parse_filters(request.args)
+        if search:
+            hits = db.search_products_page(search, PRODUCTS_PER_PAGE, cursor)
+            products_list = [hit.product for hit in hits.items]
+            snippets = {hit.product.id: hit.snippet for hit in hits.items}
+            next_cursor = hits.next_cursor
+        else:
+            if not filters.is_plain():
+                page = filtered.get_filtered_products_page(
+                    filters, PRODUCTS_PER_PAGE, cursor
+                )
+            elif filters.category:
+                page = catalog.get_products_by_category_page(
+                    filters.category, PRODUCTS_PER_PAGE, cursor
+                )
+            else:
+                page = catalog.get_products_page(PRODUCTS_PER_PAGE, cursor)
+            products_list = page.items
+            next_cursor = page.next_cursor
+            counts = facets.get_facet_counts(filters)
+    except ValueError:
+        # Curseur ou filtre invalide : retour à la première page
+        return redirect(
+            url_for("products", category=request.args.get("category"), search=search)
+        )
 
     return render_template(
         "shopify/products.html",
         products=products_list,
-        user=user,
-        cart_count=sum(item.quantity for item in cart),
-        current_category=category,
+        current_category=filters.category,
         search_query=search,
+        snippets=snippets,
+        cursor=cursor,
+        next_cursor=next_cursor,
+        filters=filters,
+        facets=counts,
+        sorts=PRODUCT_SORTS,
     )
 
 
 @app.route("/product/<int:product_id>")
 def product_detail(product_id: int) -> str | Response:
     """Page détail d'un produit."""
-    product = db.get_product_by_id(product_id)
+    product = catalog.get_product_by_id(product_id)
 
     if not product:
         flash("Produit introuvable", "error")
         return redirect(url_for("products"))
 
-    user = get_current_user()
-    cart = get_cart()
+    try:
+        reviews = db.get_reviews(
+            product_id, REVIEWS_PER_PAGE, request.args.get("reviews_cursor")
+        )
+    except ValueError:
+        return redirect(url_for("product_detail", product_id=product_id))
 
     return render_template(
         "shopify/product_detail.html",
         product=product,
-        user=user,
-        cart_count=sum(item.quantity for item in cart),
+        reviews=reviews.items,
+        reviews_cursor=reviews.next_cursor,
     )
 
 
+@app.route("/product/<int:product_id>/review", methods=["POST"])
+def add_review(product_id: int) -> Any:
+    """Publie un avis sur un produit (utilisateur connecté)."""
+    user = get_current_user()
+
+    if not user:
+        flash("Connectez-vous pour laisser un avis", "error")
+        return redirect(url_for("login"))
+
+    if not catalog.get_product_by_id(product_id):
+        flash("Produit introuvable", "error")
+        return redirect(url_for("products"))
+
+    try:
+        rating = int(request.form.get("rating", ""))
+    except ValueError:
+        rating = 0
+
+    review = Review(
+        id=0,
+        product_id=product_id,
+        user_id=user.id,
+        user_name=user.full_name(),
+        rating=rating,
+        comment=request.form.get("comment", "").strip(),
+    )
+
+    try:
+        db.add_review(review)
+    except ValueError:
+        flash("Choisissez une note de 1 à 5 et écrivez un commentaire", "error")
+        return redirect(url_for("product_detail", product_id=product_id))
+
+    if isinstance(catalog, SnapshotCatalog):
+        # La nouvelle note doit apparaître dès la redirection
+        catalog.wait_for_refresh()
+    flash("Merci pour votre avis !", "success")
+
+    return redirect(url_for("product_detail", product_id=product_id))
+
+
 @app.route("/cart")
 def cart() -> str:
     """Page panier."""
     cart_items = get_cart()
     total = calculate_cart_total(cart_items)
-    user = get_current_user()
 
     return render_template(
         "shopify/cart.html",
         cart=cart_items,
         total=total,
-        user=user,
-        cart_count=sum(item.quantity for item in cart_items),
     )
 
 
 @app.route("/cart/add/<int:product_id>", methods=["POST"])
 def add_to_cart(product_id: int) -> Any:
     """Ajoute un produit au panier."""
-    product = db.get_product_by_id(product_id)
+    product = catalog.get_product_by_id(product_id)
 
     if not product:
         flash("Produit introuvable", "error")
@@ -188,9 +430,12 @@ def add_to_cart(product_id: int) -> Any:
 
     # Vérifier si le produit est déjà dans le panier
     found = False
-    for item in cart_items:
+    for index, item in enumerate(cart_items):
         if item.product_id == product_id:
-            item.quantity += 1
+            if item.quantity + 1 > product.stock:
+                flash("Stock insuffisant pour ajouter cet article", "error")
+                return redirect(url_for("cart"))
+            cart_items[index] = replace(item, quantity=item.quantity + 1)
             found = True
             break
 
@@ -232,9 +477,9 @@ def update_cart(product_id: int) -> Any:
 
     cart_items = get_cart()
 
-    for item in cart_items:
+    for index, item in enumerate(cart_items):
         if item.product_id == product_id:
-            item.quantity = quantity
+            cart_items[index] = replace(item, quantity=quantity)
             break
 
     save_cart(cart_items)
@@ -264,8 +509,6 @@ def checkout() -> str | Any:
         "shopify/checkout.html",
         cart=cart_items,
         total=total,
-        user=user,
-        cart_count=sum(item.quantity for item in cart_items),
     )
 
 
@@ -302,10 +545,16 @@ def process_checkout() -> Any:
         shipping_address=shipping_address,
     )
 
-    order_id = db.create_order(order)
+    try:
+        order_id = db.place_order(order)
+    except OutOfStockError as exc:
+        product = catalog.get_product_by_id(exc.product_id)
+        name = product.name if product else f"#{exc.product_id}"
+        flash(f"Stock insuffisant pour {name}, ajustez votre panier", "error")
+        return redirect(url_for("cart"))
 
     # Vider le panier
-    session["cart"] = []
+    save_cart([])
 
     flash(f"Commande #{order_id} passée avec succès !", "success")
     return redirect(url_for("orders"))
@@ -320,54 +569,50 @@ def orders() -> str | Any:
         flash("Vous devez être connecté pour voir vos commandes", "error")
         return redirect(url_for("login"))
 
-    user_orders = db.get_user_orders(user.id)
-    cart = get_cart()
+    try:
+        orders_page = db.get_user_orders_page(
+            user.id, ORDERS_PER_PAGE, request.args.get("cursor")
+        )
+    except ValueError:
+        return redirect(url_for("orders"))
 
     return render_template(
         "shopify/orders.html",
-        orders=user_orders,
-        user=user,
-        cart_count=sum(item.quantity for item in cart),
+        orders=orders_page.items,
+        next_cursor=orders_page.next_cursor,
     )
 
 
 @app.route("/login", methods=["GET", "POST"])
 def login() -> str | Any:
     """Page de connexion."""
-    from shopify.app import get_cart  # si ce n’est pas déjà importé
-
-    cart = get_cart()  # récupère le panier actuel
-    cart_count = sum(item.quantity for item in cart)  # calcul du nombre d'articles
-
     if request.method == "POST":
         email = request.form.get("email", "")
         password = request.form.get("password", "")
 
         if not email or not password:
             flash("Email et mot de passe requis", "error")
-            return render_template("shopify/login.html", cart_count=cart_count)
+            return render_template("shopify/login.html")
 
         user = db.get_user_by_email(email)
 
         if not user or user.password_hash != hash_password(password):
             flash("Email ou mot de passe incorrect", "error")
-            return render_template("shopify/login.html", cart_count=cart_count)
+            return render_template("shopify/login.html")
 
         session["user_email"] = user.email
+        g.pop("current_user", None)
         flash(f"Bienvenue {user.first_name} !", "success")
 
         return redirect(url_for("index"))
 
     # GET request
-    return render_template("shopify/login.html", cart_count=cart_count)
+    return render_template("shopify/login.html")
 
 
 @app.route("/register", methods=["GET", "POST"])
 def register() -> str | Any:
     """Page d'inscription."""
-    cart = get_cart()
-    cart_count = sum(item.quantity for item in cart)
-
     if request.method == "POST":
         email = request.form.get("email", "")
         password = request.form.get("password", "")
@@ -376,20 +621,12 @@ def register() -> str | Any:
 
         if not all([email, password, first_name, last_name]):
             flash("Tous les champs sont requis", "error")
-<<<<<<< HEAD
-            return render_template("shopify/register.html", cart_count=cart_count)
-=======
-            return render_template("shopify/register.html", cart_count=0)
->>>>>>> fc22cb7 (Correction des erreurs : ajout de cart_count, fix des templates, formulaire d'inscription,formulaire de connexion, gestion du panier et DB)
+            return render_template("shopify/register.html")
 
         existing_user = db.get_user_by_email(email)
         if existing_user:
             flash("Cet email est déjà utilisé", "error")
-<<<<<<< HEAD
-            return render_template("shopify/register.html", cart_count=cart_count)
-=======
-            return render_template("shopify/register.html", cart_count=0)
->>>>>>> fc22cb7 (Correction des erreurs : ajout de cart_count, fix des templates, formulaire d'inscription,formulaire de connexion, gestion du panier et DB)
+            return render_template("shopify/register.html")
 
         user = User(
             id=0,
@@ -402,25 +639,73 @@ def register() -> str | Any:
 
         db.add_user(user)
         session["user_email"] = email
+        g.pop("current_user", None)
         flash(f"Compte créé avec succès ! Bienvenue {first_name} !", "success")
 
         return redirect(url_for("index"))
 
-<<<<<<< HEAD
-    return render_template("shopify/register.html", cart_count=cart_count)
-=======
-    return render_template("shopify/register.html", cart_count=0)
->>>>>>> fc22cb7 (Correction des erreurs : ajout de cart_count, fix des templates, formulaire d'inscription,formulaire de connexion, gestion du panier et DB)
+    return render_template("shopify/register.html")
 
 
 @app.route("/logout")
 def logout() -> Any:
     """Déconnexion."""
-    session.pop("user_email", None)
+    email = session.pop("user_email", None)
+    if email is not None:
+        users.invalidate(email)
+    g.pop("current_user", None)
     flash("Vous êtes déconnecté", "success")
     return redirect(url_for("index"))
 
 
+def json_response(body: JSONBody) -> Response:
+    """Réponse d'un corps JSON déjà sérialisé (304 si l'ETag n'a pas changé)."""
+    response = Response(body.body, mimetype="application/json")
+    response.set_etag(body.etag)
+    response.cache_control.no_cache = True  # le client revalide avec l'ETag
+    return response.make_conditional(request)
+
+
+@app.route("/api/products")
+def api_products() -> Any:
+    """Page du catalogue en JSON (mêmes filtres et curseurs que /products)."""
+    try:
+        filters = parse_filters(request.args)
+        limit = int(request.args.get("limit", PRODUCTS_PER_PAGE))
+        if not 1 <= limit <= API_PAGE_MAX:
+            raise ValueError(f"limit doit être compris entre 1 et {API_PAGE_MAX}")
+        body = api_cache.page(filters, limit, request.args.get("cursor"))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    return json_response(body)
+
+
+@app.route("/api/products/<int:product_id>")
+def api_product(product_id: int) -> Any:
+    """Un produit en JSON."""
+    body = api_cache.product(product_id)
+
+    if body is None:
+        return jsonify({"error": "Produit introuvable"}), 404
+
+    return json_response(body)
+
+
+@app.route("/api/products/batch")
+def api_products_batch() -> Any:
+    """Plusieurs produits en JSON en un aller-retour (`ids=1,2,3`)."""
+    try:
+        product_ids = [int(part) for part in request.args.get("ids", "").split(",")]
+    except ValueError:
+        return jsonify({"error": "ids doit lister des entiers séparés par ,"}), 400
+
+    if len(product_ids) > API_BATCH_MAX:
+        return jsonify({"error": f"Au plus {API_BATCH_MAX} produits par lot"}), 400
+
+    return json_response(api_cache.batch(product_ids))
+
+
 @app.route("/admin")
 def admin_dashboard() -> str | Any:
     """Tableau de bord admin."""
@@ -430,17 +715,155 @@ def admin_dashboard() -> str | Any:
         flash("Accès refusé", "error")
         return redirect(url_for("index"))
 
-    products = db.get_all_products()
-    cart = get_cart()
+    try:
+        page = db.get_products_page(PRODUCTS_PER_PAGE, request.args.get("cursor"))
+    except ValueError:
+        return redirect(url_for("admin_dashboard"))
 
     return render_template(
         "shopify/admin/dashboard.html",
-        products=products,
-        user=user,
-        cart_count=sum(item.quantity for item in cart),
+        products=page.items,
+        products_total=db.count_products(),
+        next_cursor=page.next_cursor,
+        sales=db.get_sales_report(),
+    )
+
+
+@app.route("/admin/cache/stats")
+def admin_cache_stats() -> Any:
+    """Compteurs du cache du catalogue (admin, JSON)."""
+    user = get_current_user()
+
+    if not user or not user.is_admin():
+        return jsonify({"error": "Accès refusé"}), 403
+
+    if not isinstance(catalog, CatalogCache | SnapshotCatalog):
+        return jsonify({"enabled": False})
+
+    stats = catalog.stats()
+    if isinstance(filtered, ColumnarCatalog):
+        stats.update(filtered.stats())
+    if isinstance(facets, FacetCache):
+        stats.update(facets.stats())
+    stats.update(api_cache.stats())
+    return jsonify({"enabled": True, **stats})
+
+
+@app.route("/admin/db/stats")
+def admin_db_stats() -> Any:
+    """Latences, requêtes lentes et requêtes par page (admin, JSON)."""
+    user = get_current_user()
+
+    if not user or not user.is_admin():
+        return jsonify({"error": "Accès refusé"}), 403
+
+    if not isinstance(db, Database):
+        return jsonify({"enabled": False})
+
+    if request.args.get("reset"):
+        db.queries.reset()
+
+    return jsonify(db.queries.snapshot())
+
+
+@app.route("/admin/db/backup", methods=["GET", "POST"])
+def admin_db_backup() -> Any:
+    """Lance (POST) ou consulte (GET) une sauvegarde à chaud (admin, JSON)."""
+    global backup_job
+    user = get_current_user()
+
+    if not user or not user.is_admin():
+        return jsonify({"error": "Accès refusé"}), 403
+
+    if not isinstance(db, Database):
+        return jsonify({"enabled": False})
+
+    if backup_job is None or backup_job.db is not db:
+        backup_job = BackupJob(db)
+
+    if request.method == "POST":
+        compress = request.values.get("gzip", "").lower() in {"1", "true", "on", "yes"}
+        settings = BackupSettings(compress=compress)
+        started = backup_job.start(settings)
+        status = {"enabled": True, "started": started, **backup_job.status()}
+        return jsonify(status), 202 if started else 409
+
+    return jsonify({"enabled": True, **backup_job.status()})
+
+
+@app.route("/admin/export/<kind>.<fmt>")
+def admin_export(kind: str, fmt: str) -> Any:
+    """Export en flux du catalogue ou des commandes (admin, NDJSON ou CSV).
+
+    Filtre optionnel par dates de création : ?since=AAAA-MM-JJ&until=AAAA-MM-JJ
+    """
+    user = get_current_user()
+
+    if not user or not user.is_admin():
+        return jsonify({"error": "Accès refusé"}), 403
+
+    if not isinstance(db, Database):
+        return jsonify({"enabled": False})
+
+    try:
+        dates = DateRange.parse(request.args.get("since"), request.args.get("until"))
+        chunks = export_chunks(db, kind, fmt, dates)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    return app.response_class(
+        stream_with_context(chunks),
+        mimetype=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="shopify-{kind}.{fmt}"'},
     )
 
 
+@app.route("/admin/import", methods=["POST"])
+def admin_import() -> Any:
+    """Import en masse de produits depuis un fichier CSV ou NDJSON (admin).
+
+    Mise à jour par SKU ; la réponse NDJSON donne l'avancement après chaque lot
+    puis le bilan final, avec le chemin du fichier des lignes rejetées.
+    """
+    user = get_current_user()
+
+    if not user or not user.is_admin():
+        return jsonify({"error": "Accès refusé"}), 403
+
+    upload = request.files.get("file")
+    if upload is None or not upload.filename:
+        return jsonify({"error": "Fichier manquant"}), 400
+    try:
+        fmt = import_format(upload.filename, request.form.get("format"))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    # Flask ferme les fichiers reçus au retour de la vue : copie sur disque,
+    # relue ligne à ligne pendant la réponse (jamais chargée en mémoire)
+    with tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False) as spool:
+        upload.save(spool)
+
+    def discard_spool() -> None:
+        with suppress(FileNotFoundError):
+            os.unlink(spool.name)
+
+    def progress() -> Iterator[str]:
+        try:
+            with open(
+                spool.name, encoding="utf-8-sig", errors=SOURCE_ERRORS, newline=""
+            ) as lines:
+                yield from progress_lines(db, lines, fmt)
+        finally:
+            discard_spool()
+
+    response = app.response_class(
+        stream_with_context(progress()), mimetype="application/x-ndjson"
+    )
+    # Réponse jamais itérée (client déconnecté) : la copie est tout de même effacée
+    response.call_on_close(discard_spool)
+    return response
+
+
 @app.route("/admin/product/add", methods=["POST"])
 def admin_add_product() -> Any:
     """Ajoute un produit (admin)."""
@@ -472,6 +895,9 @@ def admin_add_product() -> Any:
     )
 
     db.add_product(product)
+    if isinstance(catalog, SnapshotCatalog):
+        # L'admin doit voir son produit dans le catalogue dès la redirection
+        catalog.wait_for_refresh()
     flash(f"Produit {name} ajouté avec succès !", "success")
 
     return redirect(url_for("admin_dashboard"))
@@ -479,4 +905,3 @@ def admin_add_product() -> Any:
 
 if __name__ == "__main__":
     app.run(debug=True, port=5001)
-
@@ -0,0 +1,178 @@
+"""
+Archivage des anciennes commandes Shopify
+Les commandes anciennes quittent la base principale pour un fichier SQLite attaché
+"""
+
+import argparse
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from shopify.connection import immediate_transaction
+from shopify.mapping import to_epoch
+
+
+ARCHIVE_SCHEMA = "archive"
+
+ORDER_FIELDS = "id, user_id, total, status, shipping_address, created_at, updated_at"
+ORDER_ITEM_FIELDS = (
+    "id, order_id, product_id, product_name, product_price, product_image, quantity"
+)
+
+
+@dataclass(frozen=True)
+class ArchiveSettings:
+    """Réglages de l'archive des commandes."""
+
+    path: str | None = None  # None : `<base>-archive.db` à côté de la base
+    max_age_days: int = 365  # âge à partir duquel une commande est archivée
+    batch_size: int = 1_000  # commandes déplacées par transaction
+
+
+def archive_path(db_path: str) -> str:
+    """Chemin par défaut de l'archive d'une base."""
+    path = Path(db_path)
+    return str(path.with_name(f"{path.stem}-archive{path.suffix or '.db'}"))
+
+
+class OrderArchive:
+    """Fichier d'archive attaché à chaque connexion sous le nom `archive`.
+
+    Les commandes et leurs articles y gardent leurs ids : la base principale
+    (AUTOINCREMENT) ne les réattribue jamais.
+    """
+
+    def __init__(self, path: str, settings: ArchiveSettings | None = None) -> None:
+        """Prépare l'archive sans ouvrir de connexion."""
+        self.path = path
+        self.settings = settings or ArchiveSettings()
+
+    def attach(self, conn: sqlite3.Connection) -> None:
+        """Hook de connexion : attache l'archive (créée au besoin)."""
+        conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (self.path,))
+        conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.journal_mode = WAL")
+        conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.synchronous = NORMAL")
+
+    def create_schema(self, conn: sqlite3.Connection) -> None:
+        """Crée les tables de l'archive (sans effet si elles existent)."""
+        with immediate_transaction(conn):
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.orders (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER NOT NULL,
+                    total REAL NOT NULL,
+                    status TEXT NOT NULL,
+                    shipping_address TEXT NOT NULL,
+                    created_at INTEGER NOT NULL,
+                    updated_at INTEGER NOT NULL
+                )
+            """
+            )
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.order_items (
+                    id INTEGER PRIMARY KEY,
+                    order_id INTEGER NOT NULL,
+                    product_id INTEGER NOT NULL,
+                    product_name TEXT NOT NULL,
+                    product_price REAL NOT NULL,
+                    product_image TEXT NOT NULL,
+                    quantity INTEGER NOT NULL
+                )
+            """
+            )
+            # Mêmes index que la base principale pour l'historique paginé
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS "
+                f"{ARCHIVE_SCHEMA}.idx_orders_user_created "
+                "ON orders (user_id, created_at)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS "
+                f"{ARCHIVE_SCHEMA}.idx_order_items_order ON order_items (order_id)"
+            )
+
+    def archive_orders(
+        self,
+        conn: sqlite3.Connection,
+        max_age_days: int | None = None,
+        batch_size: int | None = None,
+    ) -> int:
+        """Déplace les commandes plus anciennes que `max_age_days` vers l'archive.
+
+        Chaque lot est d'abord copié et validé dans l'archive, puis supprimé de la
+        base principale dans une seconde transaction : SQLite ne garantit pas
+        l'atomicité d'une transaction sur plusieurs fichiers en mode WAL. Après un
+        arrêt entre les deux, la commande existe en double ; les lectures
+        dédoublonnent par id et le lot est repris au passage suivant.
+        Retourne le nombre de commandes archivées.
+        """
+        days = self.settings.max_age_days if max_age_days is None else max_age_days
+        size = batch_size or self.settings.batch_size
+        cutoff = to_epoch(datetime.now() - timedelta(days=days))
+
+        moved = 0
+        while True:
+            order_ids = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT id FROM main.orders WHERE created_at < ? ORDER BY id "
+                    "LIMIT ?",
+                    (cutoff, size),
+                )
+            ]
+            if not order_ids:
+                return moved
+            placeholders = ", ".join("?" * len(order_ids))
+
+            with immediate_transaction(conn):
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.orders ({ORDER_FIELDS}) "
+                    f"SELECT {ORDER_FIELDS} FROM main.orders "
+                    f"WHERE id IN ({placeholders})",
+                    order_ids,
+                )
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.order_items "
+                    f"({ORDER_ITEM_FIELDS}) "
+                    f"SELECT {ORDER_ITEM_FIELDS} FROM main.order_items "
+                    f"WHERE order_id IN ({placeholders})",
+                    order_ids,
+                )
+            with immediate_transaction(conn):
+                conn.execute(
+                    f"DELETE FROM main.order_items WHERE order_id IN ({placeholders})",
+                    order_ids,
+                )
+                conn.execute(
+                    f"DELETE FROM main.orders WHERE id IN ({placeholders})", order_ids
+                )
+            moved += len(order_ids)
+
+
+def main() -> None:
+    """Archive les anciennes commandes de la base par défaut."""
+    from shopify.database import Database
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=ArchiveSettings.max_age_days,
+        help="âge minimal (jours) des commandes à archiver",
+    )
+    parser.add_argument("--batch-size", type=int, default=ArchiveSettings.batch_size)
+    args = parser.parse_args()
+
+    db = Database()
+    try:
+        moved = db.archive_orders(args.days, args.batch_size)
+    finally:
+        db.close()
+    print(f"✅ {moved} commandes archivées dans {db.archive.path}")
+
+
+if __name__ == "__main__":
+    main()
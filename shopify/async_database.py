@@ -0,0 +1,238 @@
+"""
+Façade asynchrone de la base de données Shopify
+Les requêtes SQLite bloquantes tournent sur des threads dédiés, jamais sur la boucle
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Callable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import ParamSpec, TypeVar
+
+from shopify.analytics import SALES_DAYS, TOP_PRODUCTS
+from shopify.models import (
+    FacetCounts,
+    Order,
+    Page,
+    Product,
+    ProductFilters,
+    Review,
+    SalesReport,
+    SearchHit,
+    User,
+)
+from shopify.repository import Repository
+
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class AsyncDatabase:
+    """Même interface que `Database`, en coroutines.
+
+    Les écritures passent par un unique thread écrivain (SQLite n'accepte qu'un
+    écrivain à la fois), les lectures par un pool borné de threads lecteurs.
+    """
+
+    def __init__(self, db: Repository, readers: int = 4) -> None:
+        """Crée les pools de threads autour d'un moteur existant."""
+        self.db = db
+        self._writer = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="shopify-db-writer"
+        )
+        self._readers = ThreadPoolExecutor(
+            max_workers=readers, thread_name_prefix="shopify-db-reader"
+        )
+
+    async def _read(self, func: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+        """Exécute une lecture sur un thread lecteur."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, partial(func, *args, **kwargs))
+
+    async def _write(
+        self, func: Callable[P, T], *args: P.args, **kwargs: P.kwargs
+    ) -> T:
+        """Exécute une écriture sur le thread écrivain."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, partial(func, *args, **kwargs))
+
+    async def close(self) -> None:
+        """Attend la fin des requêtes en cours puis arrête les threads."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._writer.shutdown)
+        await loop.run_in_executor(None, self._readers.shutdown)
+
+    def add_catalog_listener(self, listener: Callable[[list[int]], None]) -> None:
+        """Abonne `listener` aux écritures du catalogue (appelé sur le thread écrivain)."""
+        self.db.add_catalog_listener(listener)
+
+    def add_facet_listener(self, listener: Callable[[list[int]], None]) -> None:
+        """Abonne `listener` aux écritures qui peuvent changer les facettes."""
+        self.db.add_facet_listener(listener)
+
+    # Produits
+
+    async def add_product(self, product: Product) -> int:
+        """Ajoute un produit."""
+        return await self._write(self.db.add_product, product)
+
+    async def add_products_bulk(self, products: Iterable[Product]) -> list[int]:
+        """Ajoute des produits par lots."""
+        return await self._write(self.db.add_products_bulk, products)
+
+    async def upsert_products(self, products: Iterable[Product]) -> tuple[int, int]:
+        """Ajoute ou met à jour des produits par SKU."""
+        return await self._write(self.db.upsert_products, products)
+
+    async def get_all_products(self) -> list[Product]:
+        """Récupère tous les produits."""
+        return await self._read(self.db.get_all_products)
+
+    async def get_product_by_id(self, product_id: int) -> Product | None:
+        """Récupère un produit par son ID."""
+        return await self._read(self.db.get_product_by_id, product_id)
+
+    async def get_products_by_ids(self, product_ids: Sequence[int]) -> list[Product]:
+        """Récupère des produits par leurs IDs."""
+        return await self._read(self.db.get_products_by_ids, product_ids)
+
+    async def search_products(self, query: str) -> list[Product]:
+        """Recherche des produits."""
+        return await self._read(self.db.search_products, query)
+
+    async def search_products_with_snippets(self, query: str) -> list[SearchHit]:
+        """Recherche des produits avec extraits surlignés."""
+        return await self._read(self.db.search_products_with_snippets, query)
+
+    async def get_products_by_category(self, category: str) -> list[Product]:
+        """Récupère les produits d'une catégorie."""
+        return await self._read(self.db.get_products_by_category, category)
+
+    async def count_products(self) -> int:
+        """Retourne le nombre total de produits."""
+        return await self._read(self.db.count_products)
+
+    async def get_products_page(
+        self, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Récupère une page du catalogue."""
+        return await self._read(self.db.get_products_page, limit, cursor)
+
+    async def get_products_by_category_page(
+        self, category: str, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Récupère une page d'une catégorie."""
+        return await self._read(
+            self.db.get_products_by_category_page, category, limit, cursor
+        )
+
+    async def get_filtered_products_page(
+        self, filters: ProductFilters, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Récupère une page du catalogue filtré et trié."""
+        return await self._read(
+            self.db.get_filtered_products_page, filters, limit, cursor
+        )
+
+    async def get_facet_counts(self, filters: ProductFilters) -> FacetCounts:
+        """Compte les produits par valeur de chaque facette."""
+        return await self._read(self.db.get_facet_counts, filters)
+
+    async def search_products_page(
+        self, query: str, limit: int = 24, cursor: str | None = None
+    ) -> Page[SearchHit]:
+        """Récupère une page de résultats de recherche."""
+        return await self._read(self.db.search_products_page, query, limit, cursor)
+
+    async def iter_products(
+        self, category: str | None = None, batch_size: int = 500
+    ) -> AsyncIterator[Product]:
+        """Parcourt le catalogue par lots, sans tout charger en mémoire.
+
+        Chaque lot est une page (projection de liste) lue sur un thread lecteur.
+        """
+        cursor: str | None = None
+        while True:
+            if category is None:
+                page = await self.get_products_page(batch_size, cursor)
+            else:
+                page = await self.get_products_by_category_page(
+                    category, batch_size, cursor
+                )
+            for product in page.items:
+                yield product
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    # Utilisateurs
+
+    async def add_user(self, user: User) -> int:
+        """Ajoute un utilisateur."""
+        return await self._write(self.db.add_user, user)
+
+    async def add_users_bulk(self, users: Iterable[User]) -> list[int]:
+        """Ajoute des utilisateurs par lots."""
+        return await self._write(self.db.add_users_bulk, users)
+
+    async def get_user_by_email(self, email: str) -> User | None:
+        """Récupère un utilisateur par email."""
+        return await self._read(self.db.get_user_by_email, email)
+
+    # Commandes
+
+    async def create_order(self, order: Order) -> int:
+        """Crée une commande."""
+        return await self._write(self.db.create_order, order)
+
+    async def place_order(self, order: Order) -> int:
+        """Passe une commande en décrémentant le stock."""
+        return await self._write(self.db.place_order, order)
+
+    async def get_user_orders(self, user_id: int) -> list[Order]:
+        """Récupère les commandes d'un utilisateur."""
+        return await self._read(self.db.get_user_orders, user_id)
+
+    async def get_user_orders_page(
+        self, user_id: int, limit: int = 20, cursor: str | None = None
+    ) -> Page[Order]:
+        """Récupère une page de commandes d'un utilisateur."""
+        return await self._read(self.db.get_user_orders_page, user_id, limit, cursor)
+
+    async def iter_user_orders(
+        self, user_id: int, batch_size: int = 100
+    ) -> AsyncIterator[Order]:
+        """Parcourt l'historique de commandes par lots."""
+        cursor: str | None = None
+        while True:
+            page = await self.get_user_orders_page(user_id, batch_size, cursor)
+            for order in page.items:
+                yield order
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    # Ventes
+
+    async def get_sales_report(
+        self, days: int = SALES_DAYS, top: int = TOP_PRODUCTS
+    ) -> SalesReport:
+        """Ventes des `days` derniers jours et meilleurs produits."""
+        return await self._read(self.db.get_sales_report, days, top)
+
+    async def rebuild_sales_rollups(self) -> None:
+        """Recalcule les statistiques de ventes depuis tout l'historique."""
+        await self._write(self.db.rebuild_sales_rollups)
+
+    # Avis
+
+    async def add_review(self, review: Review) -> int:
+        """Ajoute un avis et met à jour la note du produit."""
+        return await self._write(self.db.add_review, review)
+
+    async def get_reviews(
+        self, product_id: int, limit: int = 20, cursor: str | None = None
+    ) -> Page[Review]:
+        """Récupère une page d'avis d'un produit."""
+        return await self._read(self.db.get_reviews, product_id, limit, cursor)
@@ -0,0 +1,194 @@
+"""
+Sauvegarde à chaud de la base Shopify
+API de sauvegarde en ligne de SQLite, par petits pas, sans bloquer les écritures
+"""
+
+import argparse
+import gzip
+import shutil
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from shopify.archive import ARCHIVE_SCHEMA
+from shopify.database import Database
+
+
+@dataclass(frozen=True)
+class BackupSettings:
+    """Réglages d'une sauvegarde."""
+
+    directory: str = "shopify/backups"
+    pages_per_step: int = 256  # pages copiées par pas (4 Kio par page en général)
+    pause: float = 0.002  # secondes entre deux pas, laissées aux écrivains
+    compress: bool = False  # fichiers .db.gz
+
+
+@dataclass
+class BackupResult:
+    """Bilan d'une sauvegarde."""
+
+    files: list[str]
+    bytes_copied: int
+    bytes_written: int
+    steps: int
+    seconds: float
+
+    def mb_per_s(self) -> float:
+        """Débit de copie en Mo/s."""
+        return self.bytes_copied / 1_000_000 / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convertit en dictionnaire (JSON)."""
+        return {**asdict(self), "mb_per_s": round(self.mb_per_s(), 2)}
+
+
+def backup_database(
+    db: Database, settings: BackupSettings | None = None
+) -> BackupResult:
+    """Copie la base principale et l'archive à un même instant.
+
+    Une transaction de lecture reste ouverte sur la connexion source pendant
+    toute la copie : en mode WAL elle fige l'instantané, les écrivains
+    continuent et la copie ne redémarre jamais. Le WAL ne peut pas être
+    checkpointé au-delà de cet instantané tant que la sauvegarde dure.
+    """
+    settings = settings or BackupSettings()
+    directory = Path(settings.directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    stem = Path(db.db_path).stem
+
+    steps = 0
+
+    def pause(status: int, remaining: int, total: int) -> None:
+        nonlocal steps
+        steps += 1
+        if remaining and settings.pause:
+            time.sleep(settings.pause)
+
+    start = time.perf_counter()
+    files: list[str] = []
+    bytes_copied = bytes_written = 0
+    source = db.connections.connect()
+    try:
+        source.execute("BEGIN")
+        # Lecture des deux bases : l'instantané est pris ici
+        source.execute("SELECT COUNT(*) FROM main.sqlite_master").fetchone()
+        source.execute(
+            f"SELECT COUNT(*) FROM {ARCHIVE_SCHEMA}.sqlite_master"
+        ).fetchone()
+
+        for schema, name in (("main", stem), (ARCHIVE_SCHEMA, f"{stem}-archive")):
+            target = directory / f"{name}-{stamp}.db"
+            partial = target.with_name(target.name + ".part")
+            dest = sqlite3.connect(partial)
+            try:
+                source.backup(
+                    dest, pages=settings.pages_per_step, progress=pause, name=schema
+                )
+            finally:
+                dest.close()
+            bytes_copied += partial.stat().st_size
+
+            if settings.compress:
+                target = target.with_name(target.name + ".gz")
+                packed = target.with_name(target.name + ".part")
+                with partial.open("rb") as raw, gzip.open(packed, "wb") as out:
+                    shutil.copyfileobj(raw, out, 1024 * 1024)
+                partial.unlink()
+                partial = packed
+            # Le fichier n'apparaît sous son nom final qu'une fois complet
+            partial.replace(target)
+            bytes_written += target.stat().st_size
+            files.append(str(target))
+    finally:
+        source.rollback()
+        source.close()
+
+    return BackupResult(
+        files=files,
+        bytes_copied=bytes_copied,
+        bytes_written=bytes_written,
+        steps=steps,
+        seconds=time.perf_counter() - start,
+    )
+
+
+class BackupJob:
+    """Sauvegarde lancée en arrière-plan (une seule à la fois)."""
+
+    def __init__(self, db: Database) -> None:
+        """Aucune sauvegarde en cours."""
+        self.db = db
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.started_at: datetime | None = None
+        self.last_result: BackupResult | None = None
+        self.last_error: str | None = None
+
+    def start(self, settings: BackupSettings | None = None) -> bool:
+        """Lance une sauvegarde ; False si une autre est déjà en cours."""
+        with self._lock:
+            if self.running():
+                return False
+            self.started_at = datetime.now()
+            self._thread = threading.Thread(
+                target=self._run, args=(settings,), name="shopify-backup", daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def running(self) -> bool:
+        """Indique si une sauvegarde est en cours."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self, settings: BackupSettings | None) -> None:
+        """Corps du thread : garde le bilan ou l'erreur de la sauvegarde."""
+        try:
+            self.last_result = backup_database(self.db, settings)
+            self.last_error = None
+        except (sqlite3.Error, OSError) as exc:
+            self.last_error = str(exc)
+
+    def status(self) -> dict[str, Any]:
+        """État de la dernière sauvegarde (JSON)."""
+        return {
+            "running": self.running(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "last_result": self.last_result.to_dict() if self.last_result else None,
+            "last_error": self.last_error,
+        }
+
+
+def main() -> None:
+    """Sauvegarde à chaud la base par défaut."""
+    defaults = BackupSettings()
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--output", default=defaults.directory, help="répertoire")
+    parser.add_argument("--pages", type=int, default=defaults.pages_per_step)
+    parser.add_argument("--pause", type=float, default=defaults.pause)
+    parser.add_argument("--gzip", action="store_true", help="compresse les fichiers")
+    args = parser.parse_args()
+
+    db = Database()
+    try:
+        result = backup_database(
+            db, BackupSettings(args.output, args.pages, args.pause, args.gzip)
+        )
+    finally:
+        db.close()
+    for path in result.files:
+        print(f"✅ {path}")
+    print(
+        f"   {result.bytes_copied / 1_000_000:.1f} Mo en {result.seconds:.2f} s "
+        f"({result.mb_per_s():.1f} Mo/s, {result.steps} pas)"
+    )
+
+
+if __name__ == "__main__":
+    main()
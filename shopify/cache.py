@@ -0,0 +1,435 @@
+"""
+Cache de lecture du catalogue Shopify
+LRU avec TTL devant Database (modèles ou corps JSON), invalidé par les écritures
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Generic, Protocol, TypeVar
+
+from shopify.models import FacetCounts, Page, Product, ProductFilters, ProductSort
+from shopify.repository import Repository
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    """Compteurs d'un cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    def hit_ratio(self) -> float:
+        """Proportion de lectures servies par le cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUCache(Generic[K, V]):
+    """Cache LRU borné en nombre d'entrées, avec expiration (TTL)."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """Crée un cache de `maxsize` entrées valables `ttl` secondes."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Nombre d'entrées en cache."""
+        return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        """Retourne la valeur en cache, ou None si absente ou expirée."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.stats.misses += 1
+                self.stats.evictions += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def put(self, key: K, value: V) -> None:
+        """Ajoute une valeur, en évinçant les entrées les moins récentes."""
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self, key: K) -> None:
+        """Retire une entrée du cache."""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.stats.invalidations += 1
+
+    def discard_if(self, predicate: Callable[[K, V], bool]) -> None:
+        """Retire les entrées pour lesquelles `predicate(clé, valeur)` est vrai."""
+        with self._lock:
+            stale = [
+                key
+                for key, (_, value) in self._entries.items()
+                if predicate(key, value)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.stats.invalidations += len(stale)
+
+    def clear(self) -> None:
+        """Vide le cache."""
+        with self._lock:
+            self.stats.invalidations += len(self._entries)
+            self._entries.clear()
+
+
+ListingKey = tuple[int, str | None, int, str | None]
+
+
+class CatalogCache:
+    """Lectures du catalogue mises en cache devant un `Repository`."""
+
+    def __init__(
+        self,
+        db: Repository,
+        max_products: int = 10_000,
+        max_pages: int = 1_000,
+        ttl: float = 300.0,
+    ) -> None:
+        """Branche le cache sur la base et s'abonne à ses écritures."""
+        self.db = db
+        self.products: LRUCache[int, Product] = LRUCache(max_products, ttl)
+        self.pages: LRUCache[ListingKey, Page[Product]] = LRUCache(max_pages, ttl)
+        # Version du catalogue : toute écriture rend les pages existantes obsolètes
+        self.version = 0
+        # Invalidation d'un côté, comparaison de version et ajout de l'autre :
+        # une écriture ne peut pas s'intercaler entre les deux
+        self._lock = threading.Lock()
+        db.add_catalog_listener(self.invalidate)
+
+    def invalidate(self, product_ids: list[int]) -> None:
+        """Invalide les produits modifiés et toutes les pages de listing."""
+        with self._lock:
+            for product_id in product_ids:
+                self.products.invalidate(product_id)
+            self.version += 1
+
+    def get_product_by_id(self, product_id: int) -> Product | None:
+        """Récupère un produit, depuis le cache si possible."""
+        product = self.products.get(product_id)
+        if product is None:
+            version = self.version
+            product = self.db.get_product_by_id(product_id)
+            # Ne pas mettre en cache une lecture concurrente d'une écriture
+            with self._lock:
+                if product is not None and version == self.version:
+                    self.products.put(product_id, product)
+        return product
+
+    def get_products_page(
+        self, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Récupère une page du catalogue, depuis le cache si possible."""
+        return self._page(None, limit, cursor)
+
+    def get_products_by_category_page(
+        self, category: str, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Récupère une page d'une catégorie, depuis le cache si possible."""
+        return self._page(category, limit, cursor)
+
+    def _page(
+        self, category: str | None, limit: int, cursor: str | None
+    ) -> Page[Product]:
+        """Lecture d'une page de listing avec clé (version, catégorie, page)."""
+        version = self.version
+        key: ListingKey = (version, category, limit, cursor)
+        page = self.pages.get(key)
+        if page is None:
+            if category is None:
+                page = self.db.get_products_page(limit, cursor)
+            else:
+                page = self.db.get_products_by_category_page(category, limit, cursor)
+            with self._lock:
+                if version == self.version:
+                    self.pages.put(key, page)
+        return page
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        """Compteurs de hits, misses et évictions des deux caches."""
+        return {
+            name: {
+                **asdict(cache.stats),
+                "size": len(cache),
+                "hit_ratio": round(cache.stats.hit_ratio(), 4),
+            }
+            for name, cache in (("products", self.products), ("pages", self.pages))
+        }
+
+
+class FacetSource(Protocol):
+    """Calcul des comptes par facette, qui signale ses propres changements."""
+
+    def get_facet_counts(self, filters: ProductFilters) -> FacetCounts: ...
+
+    def add_facet_listener(self, listener: Callable[[list[int]], None]) -> None: ...
+
+
+class FacetCache:
+    """Comptes par facette mis en cache par combinaison de filtres.
+
+    Une écriture qui change une facette (prix, note, catégorie, produit épuisé,
+    nouveau produit) rend toutes les entrées obsolètes, comme les pages de
+    `CatalogCache` ; une commande qui laisse du stock ne les touche pas.
+    """
+
+    def __init__(
+        self,
+        db: Repository,
+        maxsize: int = 1_000,
+        ttl: float = 300.0,
+        source: FacetSource | None = None,
+    ) -> None:
+        """Branche le cache sur la source des comptes et s'abonne à ses changements.
+
+        `source` calcule les comptes absents du cache (par défaut la base). Le
+        cache suit les changements signalés par la source elle-même : un index
+        mis à jour après l'écriture ne laisse pas d'anciens comptes en cache.
+        """
+        self.db = db
+        self.source = source or db
+        self.counts: LRUCache[tuple[int, ProductFilters], FacetCounts] = LRUCache(
+            maxsize, ttl
+        )
+        self.version = 0
+        self.source.add_facet_listener(self.invalidate)
+
+    def invalidate(self, product_ids: list[int]) -> None:
+        """Rend obsolètes tous les comptes en cache."""
+        self.version += 1
+
+    def get_facet_counts(self, filters: ProductFilters) -> FacetCounts:
+        """Comptes par facette des filtres, depuis le cache si possible."""
+        # Le tri ne change pas les comptes : une seule entrée par filtre
+        filters = replace(filters, sort=ProductSort.NEWEST)
+        version = self.version
+        key = (version, filters)
+        counts = self.counts.get(key)
+        if counts is None:
+            counts = self.source.get_facet_counts(filters)
+            if version == self.version:
+                self.counts.put(key, counts)
+        return counts
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        """Compteurs de hits, misses et évictions."""
+        return {
+            "facets": {
+                **asdict(self.counts.stats),
+                "size": len(self.counts),
+                "hit_ratio": round(self.counts.stats.hit_ratio(), 4),
+            }
+        }
+
+
+@dataclass(frozen=True)
+class JSONBody:
+    """Corps de réponse JSON déjà sérialisé, et son ETag."""
+
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_bytes(cls, body: bytes) -> "JSONBody":
+        """Calcule l'ETag (empreinte du contenu) d'un corps sérialisé."""
+        return cls(body, hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+def to_json(value: Any) -> bytes:
+    """Sérialisation JSON compacte, en UTF-8."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def listing_dict(product: Product) -> dict[str, Any]:
+    """Produit d'une page de l'API : description tronquée sous un nom distinct.
+
+    Les pages lisent `PRODUCT_LIST` (description coupée à
+    `LIST_DESCRIPTION_LENGTH` caractères) : `description_excerpt` ne se confond
+    pas avec la description complète de `/api/products/<id>`.
+    """
+    return {
+        "description_excerpt" if key == "description" else key: value
+        for key, value in product.to_dict().items()
+    }
+
+
+class FilteredSource(Protocol):
+    """Pages filtrées, dont la source signale les changements de facettes."""
+
+    def get_filtered_products_page(
+        self, filters: ProductFilters, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]: ...
+
+    def add_facet_listener(self, listener: Callable[[list[int]], None]) -> None: ...
+
+
+JSONPageKey = tuple[ProductFilters, int, str | None]
+# Corps d'une page et ids des produits qu'elle contient
+JSONPage = tuple[frozenset[int], JSONBody]
+
+
+class ProductJSONCache:
+    """Corps JSON de l'API produits, sérialisés une fois puis servis tels quels.
+
+    Une écriture invalide le corps des produits modifiés et les seules pages
+    qui les contiennent. Les nouveaux produits invalident toutes les pages ; un
+    changement de facette (prix, note, catégorie, produit épuisé) peut faire
+    entrer un produit dans une page filtrée : toutes les pages filtrées ou
+    d'une catégorie sont alors invalidées. Un lot est assemblé à partir des
+    corps des produits, sans reconstruire de dictionnaire.
+    """
+
+    def __init__(
+        self,
+        db: Repository,
+        max_products: int = 10_000,
+        max_pages: int = 1_000,
+        ttl: float = 300.0,
+        source: FilteredSource | None = None,
+    ) -> None:
+        """Branche le cache sur la base et s'abonne à ses écritures.
+
+        `source` sert les pages filtrées (par défaut la base) ; ses propres
+        changements de facettes invalident aussi les pages filtrées.
+        """
+        self.db = db
+        self.source = source or db
+        self.products: LRUCache[int, JSONBody] = LRUCache(max_products, ttl)
+        self.pages: LRUCache[JSONPageKey, JSONPage] = LRUCache(max_pages, ttl)
+        # Écritures signalées : une lecture concurrente n'est pas mise en cache
+        self.version = 0
+        self._lock = threading.Lock()  # comme `CatalogCache`
+        db.add_catalog_listener(self.invalidate)
+        db.add_facet_listener(self.invalidate_filtered)
+        if source is not None and source is not db:
+            source.add_facet_listener(self.invalidate_filtered)
+
+    def invalidate(self, product_ids: list[int]) -> None:
+        """Invalide les produits modifiés et les pages qui les contiennent."""
+        with self._lock:
+            self.version += 1
+            if not product_ids:
+                self.pages.clear()
+                return
+            changed = frozenset(product_ids)
+            for product_id in changed:
+                self.products.invalidate(product_id)
+            self.pages.discard_if(lambda key, page: not changed.isdisjoint(page[0]))
+
+    def invalidate_filtered(self, product_ids: list[int]) -> None:
+        """Invalide les pages filtrées ou d'une catégorie (facette modifiée)."""
+        with self._lock:
+            self.version += 1
+            if not product_ids:
+                self.pages.clear()  # nouveaux produits : toutes les pages décalées
+                return
+            self.pages.discard_if(lambda key, page: key[0] != ProductFilters())
+
+    def product(self, product_id: int) -> JSONBody | None:
+        """Corps JSON d'un produit, ou None s'il n'existe pas."""
+        body = self.products.get(product_id)
+        if body is None:
+            version = self.version
+            product = self.db.get_product_by_id(product_id)
+            if product is None:
+                return None
+            body = self._put(product, version)
+        return body
+
+    def batch(self, product_ids: list[int]) -> JSONBody:
+        """Corps JSON de plusieurs produits : `items` et ids `missing`."""
+        bodies = {pid: self.products.get(pid) for pid in dict.fromkeys(product_ids)}
+        missing = [pid for pid, body in bodies.items() if body is None]
+        if missing:
+            version = self.version
+            for product in self.db.get_products_by_ids(missing):
+                bodies[product.id] = self._put(product, version)
+        items = [body.body for body in bodies.values() if body is not None]
+        unknown = [pid for pid, body in bodies.items() if body is None]
+        return JSONBody.from_bytes(
+            b'{"items":[' + b",".join(items) + b'],"missing":' + to_json(unknown) + b"}"
+        )
+
+    def page(self, filters: ProductFilters, limit: int, cursor: str | None) -> JSONBody:
+        """Corps JSON d'une page du catalogue (filtrée, ou d'une catégorie)."""
+        version = self.version
+        key: JSONPageKey = (filters, limit, cursor)
+        cached = self.pages.get(key)
+        if cached is not None:
+            return cached[1]
+
+        if not filters.is_plain():
+            page = self.source.get_filtered_products_page(filters, limit, cursor)
+        elif filters.category:
+            page = self.db.get_products_by_category_page(
+                filters.category, limit, cursor
+            )
+        else:
+            page = self.db.get_products_page(limit, cursor)
+        body = JSONBody.from_bytes(
+            to_json(
+                {
+                    "items": [listing_dict(product) for product in page.items],
+                    "next_cursor": page.next_cursor,
+                }
+            )
+        )
+        with self._lock:
+            if version == self.version:
+                self.pages.put(key, (frozenset(p.id for p in page.items), body))
+        return body
+
+    def _put(self, product: Product, version: int) -> JSONBody:
+        """Sérialise un produit et le met en cache si aucune écriture entre-temps."""
+        body = JSONBody.from_bytes(to_json(product.to_dict()))
+        with self._lock:
+            if version == self.version:
+                self.products.put(product.id, body)
+        return body
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        """Compteurs de hits, misses et évictions des deux caches."""
+        return {
+            name: {
+                **asdict(cache.stats),
+                "size": len(cache),
+                "hit_ratio": round(cache.stats.hit_ratio(), 4),
+            }
+            for name, cache in (
+                ("json_products", self.products),
+                ("json_pages", self.pages),
+            )
+        }
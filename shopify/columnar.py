@@ -0,0 +1,597 @@
+"""
+Index en colonnes du catalogue Shopify (NumPy, dépendance optionnelle)
+Filtres, tris et top-k vectorisés sur les colonnes id, prix, stock, note, catégorie
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from shopify.database import (
+    IN_BATCH_SIZE,
+    Database,
+    catalog_version,
+    decode_sort_key,
+    encode_cursor,
+)
+from shopify.facets import PRICE_BOUNDS, SORT_KEYS, FacetCell, facet_counts
+from shopify.mapping import PRODUCT_ID, PRODUCT_LIST, fetch_rows, products_from_rows
+from shopify.models import FacetCounts, Page, Product, ProductFilters
+from shopify.snapshot import SnapshotStats
+
+
+try:
+    import numpy as np
+    import numpy.typing as npt
+except ImportError:  # sans NumPy, /products reste servi par SQLite
+    NUMPY_AVAILABLE = False
+else:
+    NUMPY_AVAILABLE = True
+
+
+logger = logging.getLogger(__name__)
+
+# Colonnes lues pour l'index, dans cet ordre
+INDEX_COLUMNS = ("id", "price", "stock", "rating", "category", "created_at")
+
+# Case du cube des facettes : ((catégorie * BUCKETS + tranche) * STARS + étoiles)
+# * 2 + en stock
+BUCKETS = len(PRICE_BOUNDS) + 1
+STARS = 6
+
+# Premier bloc lu dans l'ordre de tri ; chaque bloc suivant est deux fois plus grand
+WALK_CHUNK = 1_024
+
+
+def read_columns(
+    conn: sqlite3.Connection, product_ids: Sequence[int] | None = None
+) -> list[tuple[Any, ...]]:
+    """Lignes INDEX_COLUMNS de tous les produits (par id), ou de `product_ids`."""
+    select = f"SELECT {', '.join(INDEX_COLUMNS)} FROM products"
+    if product_ids is None:
+        return fetch_rows(conn, f"{select} ORDER BY id")
+    rows: list[tuple[Any, ...]] = []
+    for offset in range(0, len(product_ids), IN_BATCH_SIZE):
+        batch = product_ids[offset : offset + IN_BATCH_SIZE]
+        placeholders = ", ".join("?" * len(batch))
+        rows += fetch_rows(conn, f"{select} WHERE id IN ({placeholders})", batch)
+    return rows
+
+
+def facet_cell_codes(
+    price: "npt.NDArray[np.float64]",
+    stock: "npt.NDArray[np.int64]",
+    rating: "npt.NDArray[np.float64]",
+    category: "npt.NDArray[np.int32]",
+) -> "npt.NDArray[np.int64]":
+    """Case du cube des facettes de chaque produit."""
+    bucket = np.searchsorted(PRICE_BOUNDS, price, side="right")
+    stars = np.clip(rating.astype(np.int64), 0, STARS - 1)
+    code = (category.astype(np.int64) * BUCKETS + bucket) * STARS + stars
+    return code * 2 + (stock > 0)
+
+
+@dataclass(frozen=True)
+class ColumnarIndex:
+    """Colonnes du catalogue triées par id ; ni l'index ni ses tableaux ne changent.
+
+    Une écriture produit un nouvel index (tableaux copiés) : une requête en
+    cours garde l'ancien. `orders` donne, pour chaque colonne de tri, les
+    positions par (valeur, id) croissants ; un ordre absent (colonne modifiée
+    par un patch) est remplacé par un tri partiel des produits filtrés.
+    """
+
+    ids: "npt.NDArray[np.int64]"
+    price: "npt.NDArray[np.float64]"
+    stock: "npt.NDArray[np.int64]"
+    rating: "npt.NDArray[np.float64]"
+    category: "npt.NDArray[np.int32]"  # position dans `categories`
+    created_at: "npt.NDArray[np.int64]"  # secondes epoch, comme en base
+    cells: "npt.NDArray[np.int64]"  # case du cube des facettes
+    orders: "Mapping[str, npt.NDArray[np.intp]]"
+    categories: tuple[str, ...]
+    catalog_version: int
+    built_at: float
+
+    @classmethod
+    def from_rows(
+        cls, rows: Sequence[Sequence[Any]], catalog_version: int
+    ) -> "ColumnarIndex":
+        """Construit l'index depuis des lignes INDEX_COLUMNS triées par id."""
+        codes: dict[str, int] = {}
+        count = len(rows)
+        columns = list(zip(*rows, strict=True)) if rows else [()] * 6
+        ids, prices, stocks, ratings, names, created = columns
+        price = np.fromiter(prices, np.float64, count)
+        stock = np.fromiter(stocks, np.int64, count)
+        rating = np.fromiter(ratings, np.float64, count)
+        category = np.fromiter(
+            (codes.setdefault(name, len(codes)) for name in names), np.int32, count
+        )
+        created_at = np.fromiter(created, np.int64, count)
+        # Tri stable : les ex aequo restent dans l'ordre des ids
+        sort_values = {"created_at": created_at, "price": price, "rating": rating}
+        return cls(
+            ids=np.fromiter(ids, np.int64, count),
+            price=price,
+            stock=stock,
+            rating=rating,
+            category=category,
+            created_at=created_at,
+            cells=facet_cell_codes(price, stock, rating, category),
+            orders={
+                column: np.argsort(values, kind="stable")
+                for column, values in sort_values.items()
+            },
+            categories=tuple(codes),
+            catalog_version=catalog_version,
+            built_at=time.time(),
+        )
+
+    def nbytes(self) -> int:
+        """Mémoire occupée par les tableaux."""
+        arrays = (self.ids, self.price, self.stock, self.rating, self.category)
+        columns = sum(array.nbytes for array in (*arrays, self.created_at, self.cells))
+        return columns + sum(order.nbytes for order in self.orders.values())
+
+    def with_rows(
+        self, rows: Sequence[Sequence[Any]], catalog_version: int
+    ) -> "ColumnarIndex | None":
+        """Copie mise à jour avec des produits existants modifiés.
+
+        Retourne None si un produit est inconnu ou passe dans une catégorie
+        nouvelle : il faut alors tout reconstruire. Les ordres de tri des
+        colonnes modifiées sont abandonnés jusqu'à la prochaine reconstruction.
+        """
+        codes = {name: code for code, name in enumerate(self.categories)}
+        if any(row[4] not in codes for row in rows):
+            return None
+        row_ids = np.fromiter((row[0] for row in rows), np.int64, len(rows))
+        positions = np.searchsorted(self.ids, row_ids)
+        if (positions >= len(self.ids)).any() or (
+            self.ids[np.minimum(positions, len(self.ids) - 1)] != row_ids
+        ).any():
+            return None
+
+        price, stock, rating = self.price.copy(), self.stock.copy(), self.rating.copy()
+        category, created_at = self.category.copy(), self.created_at.copy()
+        for position, row in zip(positions.tolist(), rows, strict=True):
+            price[position] = row[1]
+            stock[position] = row[2]
+            rating[position] = row[3]
+            category[position] = codes[row[4]]
+            created_at[position] = row[5]
+        sort_values = {"created_at": created_at, "price": price, "rating": rating}
+        return ColumnarIndex(
+            ids=self.ids,
+            price=price,
+            stock=stock,
+            rating=rating,
+            category=category,
+            created_at=created_at,
+            cells=facet_cell_codes(price, stock, rating, category),
+            orders={
+                column: order
+                for column, order in self.orders.items()
+                if np.array_equal(
+                    sort_values[column][positions], getattr(self, column)[positions]
+                )
+            },
+            categories=self.categories,
+            catalog_version=catalog_version,
+            built_at=time.time(),
+        )
+
+    def facet_changes(
+        self, previous: "ColumnarIndex", product_ids: Sequence[int]
+    ) -> list[int]:
+        """Produits dont prix, note, catégorie ou disponibilité diffèrent de `previous`."""
+        positions = np.searchsorted(self.ids, product_ids)
+        changed = (
+            (self.price[positions] != previous.price[positions])
+            | (self.rating[positions] != previous.rating[positions])
+            | (self.category[positions] != previous.category[positions])
+            | ((self.stock[positions] > 0) != (previous.stock[positions] > 0))
+        )
+        return [int(pid) for pid in self.ids[positions[changed]]]
+
+    def mask(
+        self,
+        filters: ProductFilters,
+        positions: "npt.NDArray[np.intp] | None" = None,
+    ) -> "npt.NDArray[np.bool_]":
+        """Produits (tous, ou ceux de `positions`) qui passent les filtres.
+
+        Mêmes règles que `filter_conditions`.
+        """
+
+        def column(array: "npt.NDArray[Any]") -> "npt.NDArray[Any]":
+            return array if positions is None else array[positions]
+
+        size = len(self.ids) if positions is None else len(positions)
+        selected = np.ones(size, dtype=np.bool_)
+        if filters.category:
+            if filters.category not in self.categories:
+                return np.zeros(size, dtype=np.bool_)
+            code = self.categories.index(filters.category)
+            selected &= column(self.category) == code
+        if filters.min_price is not None:
+            selected &= column(self.price) >= filters.min_price
+        if filters.max_price is not None:
+            selected &= column(self.price) < filters.max_price
+        if filters.min_rating is not None:
+            selected &= column(self.rating) >= filters.min_rating
+        if filters.in_stock:
+            selected &= column(self.stock) > 0
+        return selected
+
+    def top_k(
+        self, filters: ProductFilters, limit: int, cursor: str | None = None
+    ) -> tuple[list[int], str | None]:
+        """Ids d'une page filtrée et triée, et curseur de la page suivante.
+
+        Même ordre (valeur de tri, id) et mêmes curseurs que
+        `Database.get_filtered_products_page`.
+        """
+        key = decode_sort_key(cursor) if cursor else None
+        column, descending = SORT_KEYS[filters.sort]
+        values: npt.NDArray[Any] = getattr(self, column)
+        order = self.orders.get(column)
+        if order is None:
+            page = self._select(filters, values, descending, limit + 1, key)
+        else:
+            page = self._walk(filters, values, order, descending, limit + 1, key)
+
+        next_cursor = None
+        if len(page) > limit:
+            last = page[limit - 1]
+            next_cursor = encode_cursor(values[last].item(), int(self.ids[last]))
+        return self.ids[page[:limit]].tolist(), next_cursor
+
+    def _walk(
+        self,
+        filters: ProductFilters,
+        values: "npt.NDArray[Any]",
+        order: "npt.NDArray[np.intp]",
+        descending: bool,
+        wanted: int,
+        key: tuple[float, int] | None,
+    ) -> "npt.NDArray[np.intp]":
+        """Parcourt l'ordre de tri par blocs croissants jusqu'à `wanted` produits."""
+        if values is self.price:
+            # Tri par prix : seule la tranche [min_price, max_price) est parcourue
+            def price(position: Any) -> Any:
+                return values[position]
+
+            low = high = None
+            if filters.min_price is not None:
+                low = bisect_left(order, filters.min_price, key=price)
+            if filters.max_price is not None:
+                high = bisect_left(order, filters.max_price, key=price)
+            order = order[low:high]
+
+        start = 0
+        if key is not None:
+
+            def sort_key(position: Any) -> tuple[Any, ...]:
+                return values[position], self.ids[position]
+
+            if descending:
+                start = len(order) - bisect_left(order, key, key=sort_key)
+            else:
+                start = bisect_right(order, key, key=sort_key)
+        ordered = order[::-1] if descending else order
+
+        found: list[npt.NDArray[np.intp]] = []
+        count, size = 0, WALK_CHUNK
+        while start < len(ordered) and count < wanted:
+            block = ordered[start : start + size]
+            block = block[self.mask(filters, block)]
+            found.append(block)
+            count += len(block)
+            start += size
+            size *= 2
+        return np.concatenate(found)[:wanted] if found else np.empty(0, np.intp)
+
+    def _select(
+        self,
+        filters: ProductFilters,
+        values: "npt.NDArray[Any]",
+        descending: bool,
+        wanted: int,
+        key: tuple[float, int] | None,
+    ) -> "npt.NDArray[np.intp]":
+        """Filtre tout l'index puis trie partiellement (`np.partition`)."""
+        selected = self.mask(filters)
+        if key is not None:
+            value, product_id = key
+            if descending:
+                after = (values < value) | ((values == value) & (self.ids < product_id))
+            else:
+                after = (values > value) | ((values == value) & (self.ids > product_id))
+            selected &= after
+
+        positions = np.flatnonzero(selected)
+        keys = values[positions]
+        ties = self.ids[positions]
+        if descending:
+            keys, ties = -keys, -ties
+        if len(positions) > wanted:
+            # Les ex aequo de la dernière valeur retenue restent candidats
+            threshold = np.partition(keys, wanted - 1)[wanted - 1]
+            candidates = keys <= threshold
+            positions, keys, ties = (
+                positions[candidates],
+                keys[candidates],
+                ties[candidates],
+            )
+        return positions[np.lexsort((ties, keys))[:wanted]]
+
+    def facet_cells(self, filters: ProductFilters) -> list[FacetCell]:
+        """Cube de comptage des facettes (voir `load_facet_cells`)."""
+        in_range = ProductFilters(
+            min_price=filters.min_price, max_price=filters.max_price
+        )
+        counts = np.bincount(
+            self.cells[self.mask(in_range)],
+            minlength=len(self.categories) * BUCKETS * STARS * 2,
+        )
+        cells: list[FacetCell] = []
+        for code in np.flatnonzero(counts).tolist():
+            rest, available = divmod(code, 2)
+            rest, stars = divmod(rest, STARS)
+            category, bucket = divmod(rest, BUCKETS)
+            cells.append(
+                (
+                    self.categories[category],
+                    bucket,
+                    stars,
+                    bool(available),
+                    int(counts[code]),
+                )
+            )
+        return cells
+
+
+class ColumnarCatalog:
+    """Pages filtrées et comptes par facette servis par un `ColumnarIndex`.
+
+    Les lectures prennent l'index courant sans verrou (échange de référence,
+    comme `SnapshotCatalog`). Un thread dédié construit l'index, applique les
+    écritures de ce processus (listeners de `Database` : patch des produits
+    modifiés, reconstruction pour les nouveaux) et scrute la version du
+    catalogue pour les écritures des autres processus. L'index ne donne que
+    des ids : les produits d'une page sont relus en base par clé primaire.
+    """
+
+    def __init__(
+        self, db: Database, poll_interval: float = 1.0, ready_timeout: float = 5.0
+    ) -> None:
+        """Démarre la construction de l'index (RuntimeError sans NumPy).
+
+        Tant que l'index n'est pas construit (au plus `ready_timeout` secondes
+        d'attente par requête), les lectures sont servies par la base.
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("L'index en colonnes du catalogue requiert NumPy")
+        self.db = db
+        self.poll_interval = poll_interval
+        self.ready_timeout = ready_timeout
+        self.stats_counters = SnapshotStats()
+        self._index: ColumnarIndex | None = None
+        self._ready = threading.Event()  # première construction terminée
+        self._conn = db.connections.connect()
+        # Connexion dédiée et échange de l'index (`refresh` et le thread)
+        self._build_lock = threading.RLock()
+        self._state = threading.Condition()
+        self._pending: set[int] | None = None  # None : reconstruction complète
+        self._pending_bumps = 0  # incréments de version attendus pour `_pending`
+        self._requested = 1  # écritures signalées (dont la première construction)
+        self._applied = 0  # écritures prises en compte par l'index
+        self._closed = False
+        self._facet_listeners: list[Callable[[list[int]], None]] = []
+        db.add_catalog_listener(self._on_write)
+        self._thread = threading.Thread(
+            target=self._run, name="shopify-columnar-index", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def index(self) -> ColumnarIndex:
+        """Index courant (RuntimeError s'il n'a pas pu être construit à temps)."""
+        index = self._current()
+        if index is None:
+            raise RuntimeError("Index en colonnes du catalogue indisponible")
+        return index
+
+    def _current(self) -> ColumnarIndex | None:
+        """Index courant ; attend au plus `ready_timeout` la première construction."""
+        index = self._index
+        if index is None:
+            self._ready.wait(self.ready_timeout)
+            index = self._index
+        return index
+
+    def add_facet_listener(self, listener: Callable[[list[int]], None]) -> None:
+        """Abonne `listener` aux changements de facettes appliqués à l'index.
+
+        Appelé après l'échange de l'index : un cache alimenté par celui-ci ne
+        garde pas de comptes calculés avant l'écriture. Liste vide :
+        reconstruction complète.
+        """
+        self._facet_listeners.append(listener)
+
+    def _on_write(self, product_ids: list[int]) -> None:
+        """Listener de `Database` : note les produits à relire et réveille le thread."""
+        with self._state:
+            if not product_ids:
+                self._pending = None
+            elif self._pending is not None:
+                self._pending.update(product_ids)
+            # Les triggers incrémentent la version une fois par ligne écrite
+            self._pending_bumps += len(product_ids)
+            self._requested += 1
+            self._state.notify_all()
+
+    def wait_for_refresh(self, timeout: float = 1.0) -> bool:
+        """Attend que les écritures déjà signalées soient visibles dans l'index.
+
+        Retourne False si le délai expire.
+        """
+        with self._state:
+            target = self._requested
+            return self._state.wait_for(lambda: self._applied >= target, timeout)
+
+    def refresh(self) -> None:
+        """Reconstruit immédiatement l'index complet."""
+        with self._state:
+            target = self._requested
+            self._pending, self._pending_bumps = set(), 0
+        self._build()
+        self._mark_applied(target)
+
+    def close(self) -> None:
+        """Arrête le thread de mise à jour et ferme la connexion dédiée."""
+        with self._state:
+            self._closed = True
+            self._state.notify_all()
+        self._thread.join(timeout=5)
+        with self._build_lock:
+            self._conn.close()
+
+    def _mark_applied(self, target: int) -> None:
+        """Signale aux threads en attente que l'index est à jour."""
+        with self._state:
+            self._applied = max(self._applied, target)
+            self._state.notify_all()
+
+    def _run(self) -> None:
+        """Boucle du thread : écritures signalées, sinon scrutation de la version."""
+        while True:
+            with self._state:
+                self._state.wait_for(
+                    lambda: self._closed or self._requested > self._applied,
+                    self.poll_interval,
+                )
+                if self._closed:
+                    return
+                pending, self._pending = self._pending, set()
+                bumps, self._pending_bumps = self._pending_bumps, 0
+                target = self._requested
+
+            try:
+                if pending is None or self._index is None:
+                    self._build()
+                elif pending:
+                    self._patch(sorted(pending), bumps)
+                elif self._catalog_version() != self._index.catalog_version:
+                    # Écriture d'un autre processus : on ne sait pas quoi relire
+                    self._build()
+            except Exception:
+                # Le thread survit (MemoryError, données inattendues…) : les
+                # lectures gardent l'index précédent, ou la base à défaut
+                self.stats_counters.failures += 1
+                logger.exception("Échec de la mise à jour de l'index du catalogue")
+            finally:
+                self._ready.set()
+                self._mark_applied(target)
+
+    def _catalog_version(self) -> int:
+        """Version du catalogue en base (écritures de `products` uniquement)."""
+        with self._build_lock:
+            return catalog_version(self._conn)
+
+    def _build(self) -> None:
+        """Relit tout le catalogue et remplace l'index."""
+        start = time.perf_counter()
+        with self._build_lock:
+            # Version lue avant les lignes : au pire une reconstruction de trop
+            version = catalog_version(self._conn)
+            self._index = ColumnarIndex.from_rows(read_columns(self._conn), version)
+        self.stats_counters.full_builds += 1
+        self.stats_counters.last_build_ms = (time.perf_counter() - start) * 1000
+        self._facets_changed([])
+
+    def _patch(self, product_ids: list[int], bumps: int) -> None:
+        """Relit quelques produits et les applique à une copie de l'index.
+
+        Reconstruit tout si la version en base a avancé plus que les `bumps`
+        attendus des écritures locales : un autre processus a écrit.
+        """
+        start = time.perf_counter()
+        with self._build_lock:
+            previous = self.index
+            version = previous.catalog_version + bumps
+            if catalog_version(self._conn) != version:
+                self._build()
+                return
+            rows = read_columns(self._conn, product_ids)
+            patched = None
+            if len(rows) == len(product_ids):  # sinon : produit supprimé
+                patched = previous.with_rows(rows, version)
+            if patched is None:
+                self._build()
+                return
+            self._index = patched
+        self.stats_counters.patches += 1
+        self.stats_counters.last_build_ms = (time.perf_counter() - start) * 1000
+        changed = patched.facet_changes(previous, product_ids)
+        if changed:
+            self._facets_changed(changed)
+
+    def _facets_changed(self, product_ids: list[int]) -> None:
+        """Prévient les abonnés des facettes, après l'échange de l'index."""
+        for listener in self._facet_listeners:
+            listener(product_ids)
+
+    def get_filtered_products_page(
+        self, filters: ProductFilters, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Une page du catalogue filtré et trié (description tronquée)."""
+        index = self._current()
+        if index is None:
+            return self.db.get_filtered_products_page(filters, limit, cursor)
+        ids, next_cursor = index.top_k(filters, limit, cursor)
+        if not ids:
+            return Page(items=[], next_cursor=None)
+        with self.db.connection() as conn:
+            rows = fetch_rows(
+                conn,
+                f"SELECT {PRODUCT_LIST.select()} FROM products "
+                f"WHERE id IN ({', '.join('?' * len(ids))})",
+                ids,
+            )
+        by_id = {row[PRODUCT_ID]: row for row in rows}
+        # Produit supprimé depuis la construction de l'index : ignoré
+        page_rows = [by_id[pid] for pid in ids if pid in by_id]
+        return Page(items=products_from_rows(page_rows), next_cursor=next_cursor)
+
+    def get_facet_counts(self, filters: ProductFilters) -> FacetCounts:
+        """Nombre de produits par catégorie, tranche de prix, note et stock."""
+        index = self._current()
+        if index is None:
+            return self.db.get_facet_counts(filters)
+        return facet_counts(index.facet_cells(filters), filters)
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        """État de l'index et compteurs de reconstruction."""
+        index = self._index
+        return {
+            "columnar": {
+                "products": len(index.ids) if index else 0,
+                "categories": len(index.categories) if index else 0,
+                "sort_orders": len(index.orders) if index else 0,
+                "megabytes": round(index.nbytes() / 1e6, 3) if index else 0.0,
+                "catalog_version": index.catalog_version if index else 0,
+                "age_s": round(time.time() - index.built_at, 3) if index else 0.0,
+                "full_builds": self.stats_counters.full_builds,
+                "patches": self.stats_counters.patches,
+                "failures": self.stats_counters.failures,
+                "last_build_ms": round(self.stats_counters.last_build_ms, 3),
+            }
+        }
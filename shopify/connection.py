@@ -0,0 +1,115 @@
+"""
+Gestion des connexions SQLite pour Shopify
+Pool de connexions réutilisées, mode WAL et pragmas configurables
+"""
+
+import sqlite3
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+
+@contextmanager
+def immediate_transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Transaction d'écriture `BEGIN IMMEDIATE`, validée ou annulée en sortie."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+@dataclass(frozen=True)
+class SQLiteSettings:
+    """Réglages appliqués à chaque connexion SQLite."""
+
+    pooled: bool = True
+    max_idle: int = 8
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size: int = -16_000  # négatif = taille en Kio (ici ~16 Mo)
+    mmap_size: int = 128 * 1024 * 1024
+    busy_timeout: int = 5_000  # millisecondes
+
+
+class ConnectionManager:
+    """Pool de connexions SQLite longue durée, partagé entre les threads."""
+
+    def __init__(
+        self,
+        db_path: str,
+        settings: SQLiteSettings | None = None,
+        factory: type[sqlite3.Connection] = sqlite3.Connection,
+    ) -> None:
+        """Prépare le pool sans ouvrir de connexion."""
+        self.db_path = db_path
+        self.settings = settings or SQLiteSettings()
+        self.factory = factory
+        self._connect_hooks: list[Callable[[sqlite3.Connection], None]] = []
+        self._lock = threading.Lock()
+        self._idle: list[sqlite3.Connection] = []
+        self._closed = False
+
+    def add_connect_hook(self, hook: Callable[[sqlite3.Connection], None]) -> None:
+        """Appelle `hook` sur chaque nouvelle connexion, après les pragmas."""
+        self._connect_hooks.append(hook)
+
+    def connect(self) -> sqlite3.Connection:
+        """Ouvre une nouvelle connexion configurée."""
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, factory=self.factory
+        )
+        conn.row_factory = sqlite3.Row
+        settings = self.settings
+        conn.execute(f"PRAGMA busy_timeout = {int(settings.busy_timeout)}")
+        conn.execute(f"PRAGMA journal_mode = {settings.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {settings.synchronous}")
+        conn.execute(f"PRAGMA cache_size = {int(settings.cache_size)}")
+        conn.execute(f"PRAGMA mmap_size = {int(settings.mmap_size)}")
+        for hook in self._connect_hooks:
+            hook(conn)
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Emprunte une connexion du pool et la rend à la sortie du bloc."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Récupère une connexion libre ou en ouvre une nouvelle."""
+        if self.settings.pooled:
+            with self._lock:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Le pool de connexions est fermé")
+                if self._idle:
+                    return self._idle.pop()
+        return self.connect()
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        """Remet une connexion dans le pool, ou la ferme si le pool est plein."""
+        if conn.in_transaction:
+            # Ne jamais rendre au pool une transaction laissée ouverte
+            conn.rollback()
+
+        if self.settings.pooled:
+            with self._lock:
+                if not self._closed and len(self._idle) < self.settings.max_idle:
+                    self._idle.append(conn)
+                    return
+        conn.close()
+
+    def close_all(self) -> None:
+        """Ferme les connexions du pool (à appeler à l'arrêt de l'application)."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+
+        for conn in idle:
+            conn.close()
@@ -3,331 +3,826 @@ Gestion de la base de données SQLite pour Shopify
 Toutes les fonctions sont typées pour passer MyPy
 """
 
+import base64
+import json
+import random
+import re
 import sqlite3
-from datetime import datetime
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
+from typing import Any
 
+from shopify.analytics import (
+    SALES_DAYS,
+    TOP_PRODUCTS,
+    load_sales_report,
+    rebuild_sales_rollups,
+    record_order_sales,
+)
+from shopify.archive import (
+    ARCHIVE_SCHEMA,
+    ArchiveSettings,
+    OrderArchive,
+    archive_path,
+)
+from shopify.connection import (
+    ConnectionManager,
+    SQLiteSettings,
+    immediate_transaction,
+)
+from shopify.facets import (
+    SORT_KEYS,
+    facet_counts,
+    filter_conditions,
+    load_facet_cells,
+)
+from shopify.instrumentation import (
+    InstrumentationSettings,
+    InstrumentedConnection,
+    QueryRecorder,
+)
+from shopify.mapping import (
+    ORDER_COLUMNS,
+    ORDER_CREATED_AT,
+    ORDER_ITEM_COLUMNS,
+    PRODUCT_CREATED_AT,
+    PRODUCT_DETAIL,
+    PRODUCT_ID,
+    PRODUCT_LIST,
+    REVIEW_COLUMNS,
+    REVIEW_CREATED_AT,
+    USER_COLUMNS,
+    cart_item_from_row,
+    fetch_rows,
+    order_from_row,
+    product_from_row,
+    products_from_rows,
+    review_from_row,
+    to_epoch,
+    user_from_row,
+)
+from shopify.migrations import migrate
 from shopify.models import (
     CartItem,
+    FacetCounts,
     Order,
-    OrderStatus,
+    Page,
     Product,
+    ProductFilters,
+    Review,
+    SalesReport,
+    SearchHit,
     User,
-    UserRole,
 )
 
 
+# Nombre maximal de paramètres par clause `IN (...)`
+IN_BATCH_SIZE = 500
+
+# Marqueurs de surlignage des extraits de recherche (convertis en HTML par l'app)
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+SNIPPET_TOKENS = 16
+
+# Poids bm25 des colonnes de products_fts : nom, description, catégorie
+BM25_WEIGHTS = "10.0, 1.0, 5.0"
+
+
+def search_terms(query: str) -> list[str]:
+    """Découpe une recherche utilisateur en mots (sans syntaxe FTS)."""
+    return re.findall(r"\w+", query)
+
+
+def fts_match(terms: list[str]) -> str:
+    """Requête FTS5 préfixe : chaque mot est cherché comme début de mot."""
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def fts_snippet() -> str:
+    """Expression SQL de l'extrait surligné d'un résultat FTS5."""
+    return (
+        f"snippet(products_fts, -1, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', "
+        f"'…', {SNIPPET_TOKENS})"
+    )
+
+
+def like_conditions(terms: list[str]) -> tuple[str, list[Any]]:
+    """Clause WHERE de repli (sans FTS5) : chaque mot doit apparaître."""
+    conditions = " AND ".join(
+        "(name LIKE ? OR description LIKE ? OR category LIKE ?)" for _ in terms
+    )
+    return conditions, [f"%{term}%" for term in terms for _ in range(3)]
+
+
+def highlight_terms(text: str, terms: list[str], length: int = 160) -> str:
+    """Extrait de `text` en entourant les mots recherchés de marqueurs.
+
+    L'extrait commence au début du texte, ou juste avant le premier mot trouvé
+    s'il est plus loin (comme `snippet()` de FTS5).
+    """
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+    match = pattern.search(text)
+    start = 0
+    if match is not None and match.end() > length:
+        start = max(0, match.start() - length // 4)
+    excerpt = text[start : start + length]
+    if start:
+        excerpt = "…" + excerpt
+    if start + length < len(text):
+        excerpt += "…"
+    return pattern.sub(
+        lambda m: f"{HIGHLIGHT_START}{m.group(0)}{HIGHLIGHT_END}", excerpt
+    )
+
+
+# Nouvelles tentatives d'une commande sur base verrouillée, délai initial (s)
+CHECKOUT_RETRIES = 5
+CHECKOUT_BACKOFF = 0.01
+
+# Taille des lots (et des transactions) des insertions en masse
+BULK_CHUNK_SIZE = 10_000
+
+PRODUCT_INSERT = """
+    INSERT INTO products (name, description, price, image_url, category, stock, rating, reviews_count, rating_sum, created_at, sku)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Import de catalogue : un SKU connu met à jour la fiche (notes, avis et date de
+# création conservés), un SKU absent ou NULL ajoute un produit
+PRODUCT_UPSERT = (
+    PRODUCT_INSERT
+    + """
+    ON CONFLICT (sku) DO UPDATE SET
+        name = excluded.name,
+        description = excluded.description,
+        price = excluded.price,
+        image_url = excluded.image_url,
+        category = excluded.category,
+        stock = excluded.stock
+"""
+)
+
+USER_INSERT = """
+    INSERT INTO users (email, password_hash, first_name, last_name, role, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# Note moyenne tenue à jour à chaque avis : somme et nombre, sans relire les avis
+REVIEW_AGGREGATE_UPDATE = """
+    UPDATE products
+    SET rating_sum = rating_sum + ?,
+        reviews_count = reviews_count + 1,
+        rating = ROUND((rating_sum + ?) / (reviews_count + 1), 2)
+    WHERE id = ?
+"""
+
+REVIEW_INSERT = """
+    INSERT INTO reviews (product_id, user_id, user_name, rating, comment, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+class OutOfStockError(Exception):
+    """Stock insuffisant pour un produit d'une commande."""
+
+    def __init__(self, product_id: int) -> None:
+        """Mémorise le produit en rupture."""
+        super().__init__(f"Stock insuffisant pour le produit {product_id}")
+        self.product_id = product_id
+
+
+def check_review(review: Review) -> None:
+    """Vérifie un avis avant enregistrement (ValueError si invalide)."""
+    if not 1 <= review.rating <= 5:
+        raise ValueError(f"Note invalide: {review.rating} (attendu: 1 à 5)")
+    if not review.comment.strip():
+        raise ValueError("Le commentaire est vide")
+
+
+def is_busy_error(exc: sqlite3.OperationalError) -> bool:
+    """Vrai si l'erreur vient d'une base verrouillée (SQLITE_BUSY/LOCKED)."""
+    code = getattr(exc, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return "locked" in str(exc)
+
+
+def product_params(product: Product) -> tuple[Any, ...]:
+    """Paramètres de PRODUCT_INSERT pour un produit."""
+    return (
+        product.name,
+        product.description,
+        product.price,
+        product.image_url,
+        product.category,
+        product.stock,
+        product.rating,
+        product.reviews_count,
+        product.rating * product.reviews_count,
+        to_epoch(product.created_at),
+        product.sku,
+    )
+
+
+def user_params(user: User) -> tuple[Any, ...]:
+    """Paramètres de USER_INSERT pour un utilisateur."""
+    return (
+        user.email,
+        user.password_hash,
+        user.first_name,
+        user.last_name,
+        user.role.value,
+        user.created_at.isoformat(),
+    )
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode une clé de pagination (ex: created_at, id) en jeton opaque."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def catalog_version(conn: sqlite3.Connection) -> int:
+    """Version du catalogue, changée par toute écriture de `products` (migration 9)."""
+    row = conn.execute("SELECT version FROM catalog_version WHERE id = 1").fetchone()
+    return int(row[0]) if row else 0
+
+
+def merge_order_rows(
+    hot: list[tuple[Any, ...]], archived: list[tuple[Any, ...]]
+) -> tuple[list[tuple[Any, ...]], set[int]]:
+    """Fusionne des lignes ORDER_COLUMNS de la base et de l'archive.
+
+    Une commande présente des deux côtés (archivage interrompu) n'est gardée
+    qu'une fois. Retourne les lignes triées et les ids lus dans l'archive.
+    """
+    hot_ids = {row[0] for row in hot}
+    extra = [row for row in archived if row[0] not in hot_ids]
+    rows = sorted(
+        [*hot, *extra], key=lambda row: (row[ORDER_CREATED_AT], row[0]), reverse=True
+    )
+    return rows, {row[0] for row in extra}
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    """Décode un jeton de pagination (ValueError si invalide)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"Curseur de pagination invalide: {cursor!r}") from exc
+    # Valeurs liées telles quelles en SQL : uniquement des scalaires
+    if not isinstance(values, list) or not all(
+        isinstance(value, int | float | str) and not isinstance(value, bool)
+        for value in values
+    ):
+        raise ValueError(f"Curseur de pagination invalide: {cursor!r}")
+    return values
+
+
+def decode_sort_key(cursor: str) -> tuple[float, int]:
+    """Clé (valeur de tri, id) d'un curseur de page filtrée (ValueError si invalide).
+
+    Pour les moteurs qui comparent la clé en Python (mémoire, index en
+    colonnes) : un nombre et un id entier.
+    """
+    values = decode_cursor(cursor)
+    if (
+        len(values) != 2
+        or not isinstance(values[0], int | float)
+        or not isinstance(values[1], int)
+    ):
+        raise ValueError(f"Curseur de pagination invalide: {cursor!r}")
+    return values[0], values[1]
+
+
 class Database:
     """Gestionnaire de base de données SQLite."""
 
-    def __init__(self, db_path: str = "shopify/shopify.db") -> None:
-        """Initialise la connexion à la base de données."""
+    def __init__(
+        self,
+        db_path: str = "shopify/shopify.db",
+        settings: SQLiteSettings | None = None,
+        instrumentation: InstrumentationSettings | None = None,
+        archive: ArchiveSettings | None = None,
+    ) -> None:
+        """Initialise le pool de connexions et le schéma."""
         self.db_path = db_path
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        # Mesures des requêtes (latences, requêtes lentes, requêtes par page)
+        self.queries = QueryRecorder(instrumentation)
+        enabled = self.queries.settings.enabled
+        factory = InstrumentedConnection if enabled else sqlite3.Connection
+        self.connections = ConnectionManager(db_path, settings, factory)
+        self.connections.add_connect_hook(self.queries.attach)
+        # Commandes archivées : fichier attaché à chaque connexion
+        archive = archive or ArchiveSettings()
+        self.archive = OrderArchive(archive.path or archive_path(db_path), archive)
+        self.connections.add_connect_hook(self.archive.attach)
+        self._catalog_listeners: list[Callable[[list[int]], None]] = []
+        self._facet_listeners: list[Callable[[list[int]], None]] = []
         self.init_database()
 
-    def get_connection(self) -> sqlite3.Connection:
-        """Retourne une connexion à la base de données."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Emprunte une connexion au pool pour la durée du bloc."""
+        with self.connections.connection() as conn:
+            yield conn
 
-    def init_database(self) -> None:
-        """Crée les tables si elles n'existent pas."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def close(self) -> None:
+        """Ferme toutes les connexions (hook d'arrêt de l'application)."""
+        self.connections.close_all()
 
-        # Table des produits
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                description TEXT NOT NULL,
-                price REAL NOT NULL,
-                image_url TEXT NOT NULL,
-                category TEXT NOT NULL,
-                stock INTEGER NOT NULL,
-                rating REAL DEFAULT 0.0,
-                reviews_count INTEGER DEFAULT 0,
-                created_at TEXT NOT NULL
-            )
-        """
-        )
+    def add_catalog_listener(self, listener: Callable[[list[int]], None]) -> None:
+        """Abonne `listener` aux écritures du catalogue (ids des produits modifiés)."""
+        self._catalog_listeners.append(listener)
 
-        # Table des utilisateurs
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                first_name TEXT NOT NULL,
-                last_name TEXT NOT NULL,
-                role TEXT NOT NULL,
-                created_at TEXT NOT NULL
-            )
-        """
-        )
+    def add_facet_listener(self, listener: Callable[[list[int]], None]) -> None:
+        """Abonne `listener` aux écritures qui peuvent changer les facettes.
 
-        # Table des commandes
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS orders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                total REAL NOT NULL,
-                status TEXT NOT NULL,
-                shipping_address TEXT NOT NULL,
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
+        Prix, note, catégorie, passage du stock à zéro ou nouveaux produits
+        (liste vide) ; une commande qui laisse du stock ne le prévient pas.
         """
-        )
+        self._facet_listeners.append(listener)
 
-        # Table des articles de commande
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS order_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                order_id INTEGER NOT NULL,
-                product_id INTEGER NOT NULL,
-                product_name TEXT NOT NULL,
-                product_price REAL NOT NULL,
-                product_image TEXT NOT NULL,
-                quantity INTEGER NOT NULL,
-                FOREIGN KEY (order_id) REFERENCES orders (id),
-                FOREIGN KEY (product_id) REFERENCES products (id)
+    def _catalog_changed(self, product_ids: list[int]) -> None:
+        """Prévient les abonnés (caches) qu'un ou plusieurs produits ont changé."""
+        for listener in self._catalog_listeners:
+            listener(product_ids)
+
+    def _facets_changed(self, product_ids: list[int]) -> None:
+        """Prévient les abonnés des facettes (liste vide : nouveaux produits)."""
+        for listener in self._facet_listeners:
+            listener(product_ids)
+
+    def init_database(self) -> None:
+        """Met le schéma à jour en appliquant les migrations en attente."""
+        with self.connection() as conn:
+            migrate(conn)
+            self.archive.create_schema(conn)
+            self.has_fts = (
+                conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'products_fts'"
+                ).fetchone()
+                is not None
             )
+
+    def add_product(self, product: Product) -> int:
+        """Ajoute un produit à la base de données."""
+        with self.connection() as conn:
+            cursor = conn.execute(PRODUCT_INSERT, product_params(product))
+            product_id = cursor.lastrowid
+            conn.commit()
+
+        self._catalog_changed([product_id] if product_id else [])
+        self._facets_changed([])
+        return product_id if product_id else 0
+
+    def add_products_bulk(
+        self, products: Iterable[Product], chunk_size: int = BULK_CHUNK_SIZE
+    ) -> list[int]:
+        """Ajoute des produits par lots (une transaction par lot).
+
+        Retourne les ids attribués, dans l'ordre des produits fournis.
         """
-        )
+        rows = (product_params(product) for product in products)
+        ids = self._insert_bulk(PRODUCT_INSERT, rows, chunk_size)
+        # Nouveaux produits : rien à retirer des caches, seules les pages changent
+        self._catalog_changed([])
+        self._facets_changed([])
+        return ids
 
-        # Table des avis
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS reviews (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                product_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                user_name TEXT NOT NULL,
-                rating INTEGER NOT NULL,
-                comment TEXT NOT NULL,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY (product_id) REFERENCES products (id),
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
+    def upsert_products(
+        self, products: Iterable[Product], chunk_size: int = BULK_CHUNK_SIZE
+    ) -> tuple[int, int]:
+        """Ajoute ou met à jour des produits par SKU (une transaction par lot).
+
+        Un SKU répété dans les produits fournis met à jour la fiche ajoutée par
+        sa première occurrence. Retourne (produits ajoutés, produits mis à jour).
         """
-        )
+        inserted = updated = 0
+        iterator = iter(products)
 
-        conn.commit()
-        conn.close()
+        with self.connection() as conn:
+            while chunk := list(islice(iterator, chunk_size)):
+                skus = list({product.sku for product in chunk if product.sku})
+                with immediate_transaction(conn):
+                    existing = self._product_ids_by_sku(conn, skus)
+                    conn.executemany(
+                        PRODUCT_UPSERT, (product_params(product) for product in chunk)
+                    )
+                # Nouveaux : sans SKU, ou SKU absent (compté une fois)
+                added = sum(1 for product in chunk if not product.sku)
+                added += len(skus) - len(existing)
+                inserted += added
+                updated += len(chunk) - added
+                # Produits modifiés à invalider, puis ajouts : pages à reconstruire
+                if existing:
+                    self._catalog_changed(list(existing.values()))
+                    self._facets_changed(list(existing.values()))
+                if added:
+                    self._catalog_changed([])
+                    self._facets_changed([])
 
-    def add_product(self, product: Product) -> int:
-        """Ajoute un produit à la base de données."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        return inserted, updated
 
-        cursor.execute(
-            """
-            INSERT INTO products (name, description, price, image_url, category, stock, rating, reviews_count, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-            (
-                product.name,
-                product.description,
-                product.price,
-                product.image_url,
-                product.category,
-                product.stock,
-                product.rating,
-                product.reviews_count,
-                product.created_at.isoformat(),
-            ),
-        )
+    def _product_ids_by_sku(
+        self, conn: sqlite3.Connection, skus: list[str]
+    ) -> dict[str, int]:
+        """Ids des produits existants pour des SKU, par lots `IN (...)`."""
+        ids: dict[str, int] = {}
+        for start in range(0, len(skus), IN_BATCH_SIZE):
+            batch = skus[start : start + IN_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            rows = fetch_rows(
+                conn,
+                f"SELECT sku, id FROM products WHERE sku IN ({placeholders})",
+                batch,
+            )
+            ids.update((sku, product_id) for sku, product_id in rows)
+        return ids
 
-        product_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+    def _insert_bulk(
+        self,
+        sql: str,
+        rows: Iterable[tuple[Any, ...]],
+        chunk_size: int,
+    ) -> list[int]:
+        """Insère des lignes via executemany, par transactions de `chunk_size`."""
+        ids: list[int] = []
+        iterator = iter(rows)
 
-        return product_id if product_id else 0
+        with self.connection() as conn:
+            while chunk := list(islice(iterator, chunk_size)):
+                # Sous BEGIN IMMEDIATE, les ids AUTOINCREMENT d'un lot sont contigus
+                with immediate_transaction(conn):
+                    conn.executemany(sql, chunk)
+                    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                ids.extend(range(last_id - len(chunk) + 1, last_id + 1))
+
+        return ids
 
     def get_all_products(self) -> list[Product]:
         """Récupère tous les produits."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM products ORDER BY created_at DESC")
-        rows = cursor.fetchall()
-        conn.close()
-
-        products: list[Product] = []
-        for row in rows:
-            products.append(
-                Product(
-                    id=row["id"],
-                    name=row["name"],
-                    description=row["description"],
-                    price=row["price"],
-                    image_url=row["image_url"],
-                    category=row["category"],
-                    stock=row["stock"],
-                    rating=row["rating"],
-                    reviews_count=row["reviews_count"],
-                    created_at=datetime.fromisoformat(row["created_at"]),
-                )
+        with self.connection() as conn:
+            rows = fetch_rows(
+                conn,
+                f"SELECT {PRODUCT_DETAIL.select()} FROM products "
+                "ORDER BY created_at DESC, id DESC",
             )
 
-        return products
+        return products_from_rows(rows)
 
     def get_product_by_id(self, product_id: int) -> Product | None:
         """Récupère un produit par son ID."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM products WHERE id = ?", (product_id,))
-        row = cursor.fetchone()
-        conn.close()
-
-        if not row:
-            return None
-
-        return Product(
-            id=row["id"],
-            name=row["name"],
-            description=row["description"],
-            price=row["price"],
-            image_url=row["image_url"],
-            category=row["category"],
-            stock=row["stock"],
-            rating=row["rating"],
-            reviews_count=row["reviews_count"],
-            created_at=datetime.fromisoformat(row["created_at"]),
-        )
+        with self.connection() as conn:
+            rows = fetch_rows(
+                conn,
+                f"SELECT {PRODUCT_DETAIL.select()} FROM products WHERE id = ?",
+                (product_id,),
+            )
+
+        return product_from_row(rows[0]) if rows else None
+
+    def get_products_by_ids(self, product_ids: Sequence[int]) -> list[Product]:
+        """Récupère des produits par leurs IDs, par lots `IN (...)`."""
+        rows: dict[int, Any] = {}
+        with self.connection() as conn:
+            for start in range(0, len(product_ids), IN_BATCH_SIZE):
+                batch = product_ids[start : start + IN_BATCH_SIZE]
+                placeholders = ", ".join("?" * len(batch))
+                rows.update(
+                    (row[PRODUCT_ID], row)
+                    for row in fetch_rows(
+                        conn,
+                        f"SELECT {PRODUCT_DETAIL.select()} FROM products "
+                        f"WHERE id IN ({placeholders})",
+                        batch,
+                    )
+                )
+        return [product_from_row(rows[pid]) for pid in product_ids if pid in rows]
 
     def search_products(self, query: str) -> list[Product]:
-        """Recherche des produits par nom ou description."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        """Recherche des produits par nom, description ou catégorie."""
+        return [hit.product for hit in self._search(query, with_snippets=False)]
 
-        cursor.execute(
-            """
-            SELECT * FROM products
-            WHERE name LIKE ? OR description LIKE ?
-            ORDER BY created_at DESC
-        """,
-            (f"%{query}%", f"%{query}%"),
-        )
+    def search_products_with_snippets(self, query: str) -> list[SearchHit]:
+        """Recherche des produits et retourne des extraits surlignés."""
+        return self._search(query, with_snippets=True)
 
-        rows = cursor.fetchall()
-        conn.close()
-
-        products: list[Product] = []
-        for row in rows:
-            products.append(
-                Product(
-                    id=row["id"],
-                    name=row["name"],
-                    description=row["description"],
-                    price=row["price"],
-                    image_url=row["image_url"],
-                    category=row["category"],
-                    stock=row["stock"],
-                    rating=row["rating"],
-                    reviews_count=row["reviews_count"],
-                    created_at=datetime.fromisoformat(row["created_at"]),
-                )
+    def _search(self, query: str, with_snippets: bool) -> list[SearchHit]:
+        """Recherche classée par pertinence (bm25), avec repli sur LIKE."""
+        terms = search_terms(query)
+        if not terms:
+            return []
+
+        if not self.has_fts:
+            return self._search_like(terms, with_snippets)
+
+        snippet = fts_snippet() if with_snippets else "''"
+
+        with self.connection() as conn:
+            rows = fetch_rows(
+                conn,
+                f"""
+                SELECT {PRODUCT_LIST.select("p")}, {snippet}
+                FROM products_fts
+                JOIN products p ON p.id = products_fts.rowid
+                WHERE products_fts MATCH ?
+                ORDER BY bm25(products_fts, {BM25_WEIGHTS}), p.id
+            """,
+                (fts_match(terms),),
+            )
+
+        return [SearchHit(product_from_row(row), row[-1]) for row in rows]
+
+    def _search_like(self, terms: list[str], with_snippets: bool) -> list[SearchHit]:
+        """Recherche de secours quand SQLite n'a pas FTS5."""
+        conditions, params = like_conditions(terms)
+        # Extrait tiré de la description complète, produit en projection de liste
+        full = "description" if with_snippets else "''"
+
+        with self.connection() as conn:
+            rows = fetch_rows(
+                conn,
+                f"SELECT {PRODUCT_LIST.select()}, {full} FROM products "
+                f"WHERE {conditions} ORDER BY created_at DESC, id DESC",
+                params,
             )
 
-        return products
+        return [
+            SearchHit(
+                product_from_row(row),
+                highlight_terms(row[-1], terms) if with_snippets else "",
+            )
+            for row in rows
+        ]
 
     def get_products_by_category(self, category: str) -> list[Product]:
         """Récupère les produits d'une catégorie."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            rows = fetch_rows(
+                conn,
+                f"SELECT {PRODUCT_DETAIL.select()} FROM products WHERE category = ? "
+                "ORDER BY created_at DESC, id DESC",
+                (category,),
+            )
 
-        cursor.execute(
-            "SELECT * FROM products WHERE category = ? ORDER BY created_at DESC",
-            (category,),
-        )
+        return products_from_rows(rows)
 
-        rows = cursor.fetchall()
-        conn.close()
-
-        products: list[Product] = []
-        for row in rows:
-            products.append(
-                Product(
-                    id=row["id"],
-                    name=row["name"],
-                    description=row["description"],
-                    price=row["price"],
-                    image_url=row["image_url"],
-                    category=row["category"],
-                    stock=row["stock"],
-                    rating=row["rating"],
-                    reviews_count=row["reviews_count"],
-                    created_at=datetime.fromisoformat(row["created_at"]),
-                )
+    def count_products(self) -> int:
+        """Retourne le nombre total de produits."""
+        with self.connection() as conn:
+            row = conn.execute("SELECT COUNT(*) FROM products").fetchone()
+        return int(row[0])
+
+    def get_products_page(
+        self, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Récupère une page du catalogue, du plus récent au plus ancien.
+
+        Les pages utilisent la projection de liste (description tronquée).
+        """
+        return self._products_page("", [], limit, cursor)
+
+    def get_products_by_category_page(
+        self, category: str, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Récupère une page des produits d'une catégorie."""
+        return self._products_page("category = ?", [category], limit, cursor)
+
+    def _products_page(
+        self, where: str, params: list[Any], limit: int, cursor: str | None
+    ) -> Page[Product]:
+        """Pagination par clé (created_at, id) décroissante sur `products`."""
+        rows, next_cursor = self._product_rows_page(where, params, limit, cursor)
+        return Page(items=products_from_rows(rows), next_cursor=next_cursor)
+
+    def _product_rows_page(
+        self,
+        where: str,
+        params: list[Any],
+        limit: int,
+        cursor: str | None,
+        extra: str = "",
+    ) -> tuple[list[tuple[Any, ...]], str | None]:
+        """Lignes PRODUCT_LIST (suivies de `extra`) d'une page, et curseur suivant."""
+        conditions = [where] if where else []
+        params = list(params)
+        if cursor:
+            created_at, product_id = decode_cursor(cursor)
+            conditions.append("(created_at, id) < (?, ?)")
+            params += [created_at, product_id]
+
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.connection() as conn:
+            rows = fetch_rows(
+                conn,
+                f"SELECT {PRODUCT_LIST.select()}{extra} FROM products {where_clause} "
+                "ORDER BY created_at DESC, id DESC LIMIT ?",
+                (*params, limit + 1),
             )
 
-        return products
+        page_rows = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page_rows[-1]
+            next_cursor = encode_cursor(last[PRODUCT_CREATED_AT], last[PRODUCT_ID])
 
-    def add_user(self, user: User) -> int:
-        """Ajoute un utilisateur."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        return page_rows, next_cursor
 
-        cursor.execute(
-            """
-            INSERT INTO users (email, password_hash, first_name, last_name, role, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """,
-            (
-                user.email,
-                user.password_hash,
-                user.first_name,
-                user.last_name,
-                user.role.value,
-                user.created_at.isoformat(),
-            ),
+    def get_filtered_products_page(
+        self, filters: ProductFilters, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Une page du catalogue filtré et trié (description tronquée).
+
+        Pagination par clé (valeur de tri, id), servie par les index composites
+        de catégorie, prix et note.
+        """
+        conditions, params = filter_conditions(filters)
+        column, descending = SORT_KEYS[filters.sort]
+        if cursor:
+            value, product_id = decode_cursor(cursor)
+            conditions.append(f"({column}, id) {'<' if descending else '>'} (?, ?)")
+            params += [value, product_id]
+
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = "DESC" if descending else "ASC"
+        with self.connection() as conn:
+            rows = fetch_rows(
+                conn,
+                f"SELECT {PRODUCT_LIST.select()} FROM products {where_clause} "
+                f"ORDER BY {column} {order}, id {order} LIMIT ?",
+                (*params, limit + 1),
+            )
+
+        page_rows = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page_rows[-1]
+            position = PRODUCT_DETAIL.columns.index(column)
+            next_cursor = encode_cursor(last[position], last[PRODUCT_ID])
+
+        return Page(items=products_from_rows(page_rows), next_cursor=next_cursor)
+
+    def get_facet_counts(self, filters: ProductFilters) -> FacetCounts:
+        """Nombre de produits par catégorie, tranche de prix, note et stock."""
+        with self.connection() as conn:
+            cells = load_facet_cells(conn, filters)
+        return facet_counts(cells, filters)
+
+    def search_products_page(
+        self, query: str, limit: int = 24, cursor: str | None = None
+    ) -> Page[SearchHit]:
+        """Récupère une page de résultats de recherche avec leurs extraits.
+
+        Avec FTS5, les résultats sont classés par pertinence et le curseur porte
+        sur (score bm25, id) ; sans FTS5, sur (created_at, id) comme le catalogue.
+        """
+        terms = search_terms(query)
+        if not terms:
+            return Page(items=[])
+
+        if not self.has_fts:
+            conditions, like_params = like_conditions(terms)
+            rows, next_cursor = self._product_rows_page(
+                conditions, like_params, limit, cursor, extra=", description"
+            )
+            return Page(
+                items=[
+                    SearchHit(product_from_row(row), highlight_terms(row[-1], terms))
+                    for row in rows
+                ],
+                next_cursor=next_cursor,
+            )
+
+        keyset = ""
+        params: list[Any] = [fts_match(terms)]
+        if cursor:
+            score, product_id = decode_cursor(cursor)
+            keyset = "WHERE (score, id) > (?, ?)"
+            params += [score, product_id]
+
+        with self.connection() as conn:
+            rows = fetch_rows(
+                conn,
+                f"""
+                SELECT * FROM (
+                    SELECT {PRODUCT_LIST.select("p")},
+                        {fts_snippet()} AS snippet,
+                        bm25(products_fts, {BM25_WEIGHTS}) AS score
+                    FROM products_fts
+                    JOIN products p ON p.id = products_fts.rowid
+                    WHERE products_fts MATCH ?
+                ) {keyset}
+                ORDER BY score, id
+                LIMIT ?
+            """,
+                (*params, limit + 1),
+            )
+
+        page_rows = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page_rows[-1]
+            next_cursor = encode_cursor(last[-1], last[PRODUCT_ID])
+
+        return Page(
+            items=[SearchHit(product_from_row(row), row[-2]) for row in page_rows],
+            next_cursor=next_cursor,
         )
 
-        user_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+    def add_user(self, user: User) -> int:
+        """Ajoute un utilisateur."""
+        with self.connection() as conn:
+            cursor = conn.execute(USER_INSERT, user_params(user))
+            user_id = cursor.lastrowid
+            conn.commit()
 
         return user_id if user_id else 0
 
+    def add_users_bulk(
+        self, users: Iterable[User], chunk_size: int = BULK_CHUNK_SIZE
+    ) -> list[int]:
+        """Ajoute des utilisateurs par lots et retourne les ids attribués.
+
+        Un email déjà utilisé fait échouer (et annuler) tout son lot.
+        """
+        rows = (user_params(user) for user in users)
+        return self._insert_bulk(USER_INSERT, rows, chunk_size)
+
     def get_user_by_email(self, email: str) -> User | None:
         """Récupère un utilisateur par email."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
-        row = cursor.fetchone()
-        conn.close()
-
-        if not row:
-            return None
-
-        return User(
-            id=row["id"],
-            email=row["email"],
-            password_hash=row["password_hash"],
-            first_name=row["first_name"],
-            last_name=row["last_name"],
-            role=UserRole(row["role"]),
-            created_at=datetime.fromisoformat(row["created_at"]),
-        )
+        with self.connection() as conn:
+            rows = fetch_rows(
+                conn,
+                f"SELECT {USER_COLUMNS.select()} FROM users WHERE email = ?",
+                (email,),
+            )
+
+        return user_from_row(rows[0]) if rows else None
 
     def create_order(self, order: Order) -> int:
-        """Crée une commande."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        """Crée une commande (sans toucher au stock, voir place_order)."""
+        with self.connection() as conn, immediate_transaction(conn):
+            order_id = self._insert_order(conn, order)
+
+        return order_id
+
+    def place_order(self, order: Order, max_retries: int = CHECKOUT_RETRIES) -> int:
+        """Passe une commande en décrémentant atomiquement le stock.
 
-        # Insérer la commande
-        cursor.execute(
+        Tout est fait dans une seule transaction BEGIN IMMEDIATE : si un article
+        manque de stock, rien n'est écrit et OutOfStockError est levée. En cas de
+        base verrouillée (SQLITE_BUSY), la transaction est rejouée avec un délai
+        exponentiel.
+        """
+        quantities: dict[int, int] = {}
+        for item in order.items:
+            quantities[item.product_id] = (
+                quantities.get(item.product_id, 0) + item.quantity
+            )
+
+        for attempt in range(max_retries + 1):
+            try:
+                with self.connection() as conn, immediate_transaction(conn):
+                    for product_id, quantity in quantities.items():
+                        cursor = conn.execute(
+                            "UPDATE products SET stock = stock - ? "
+                            "WHERE id = ? AND stock >= ?",
+                            (quantity, product_id, quantity),
+                        )
+                        if cursor.rowcount != 1:
+                            raise OutOfStockError(product_id)
+                    placeholders = ", ".join("?" * len(quantities))
+                    sold_out = [
+                        row[0]
+                        for row in conn.execute(
+                            f"SELECT id FROM products WHERE id IN ({placeholders}) "
+                            "AND stock = 0",
+                            list(quantities),
+                        )
+                    ]
+                    order_id = self._insert_order(conn, order)
+                break
+            except sqlite3.OperationalError as exc:
+                if not is_busy_error(exc) or attempt == max_retries:
+                    raise
+                delay = CHECKOUT_BACKOFF * (2**attempt)
+                time.sleep(random.uniform(delay / 2, delay))
+
+        # Seuls les produits épuisés changent de facette (en stock)
+        self._catalog_changed(list(quantities))
+        if sold_out:
+            self._facets_changed(sold_out)
+        return order_id
+
+    def _insert_order(self, conn: sqlite3.Connection, order: Order) -> int:
+        """Insère une commande et ses articles dans la transaction en cours."""
+        cursor = conn.execute(
             """
             INSERT INTO orders (user_id, total, status, shipping_address, created_at, updated_at)
             VALUES (?, ?, ?, ?, ?, ?)
@@ -337,20 +832,18 @@ class Database:
                 order.total,
                 order.status.value,
                 order.shipping_address,
-                order.created_at.isoformat(),
-                order.updated_at.isoformat(),
+                to_epoch(order.created_at),
+                to_epoch(order.updated_at),
             ),
         )
+        order_id = cursor.lastrowid or 0
 
-        order_id = cursor.lastrowid
-
-        # Insérer les articles
-        for item in order.items:
-            cursor.execute(
-                """
-                INSERT INTO order_items (order_id, product_id, product_name, product_price, product_image, quantity)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """,
+        conn.executemany(
+            """
+            INSERT INTO order_items (order_id, product_id, product_name, product_price, product_image, quantity)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """,
+            [
                 (
                     order_id,
                     item.product_id,
@@ -358,59 +851,205 @@ class Database:
                     item.product_price,
                     item.product_image,
                     item.quantity,
-                ),
-            )
-
-        conn.commit()
-        conn.close()
+                )
+                for item in order.items
+            ],
+        )
+        record_order_sales(conn, order)
 
-        return order_id if order_id else 0
+        return order_id
 
     def get_user_orders(self, user_id: int) -> list[Order]:
-        """Récupère les commandes d'un utilisateur."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        """Récupère les commandes d'un utilisateur (archivées comprises)."""
+        with self.connection() as conn:
+            orders_rows, archived = merge_order_rows(
+                self._user_order_rows(conn, "main", user_id),
+                self._user_order_rows(conn, ARCHIVE_SCHEMA, user_id),
+            )
+            items = self._load_orders_items(conn, orders_rows, archived)
 
-        cursor.execute(
-            "SELECT * FROM orders WHERE user_id = ? ORDER BY created_at DESC",
-            (user_id,),
-        )
+        return [order_from_row(row, items[row[0]]) for row in orders_rows]
 
-        orders_rows = cursor.fetchall()
-        orders: list[Order] = []
+    def get_user_orders_page(
+        self, user_id: int, limit: int = 20, cursor: str | None = None
+    ) -> Page[Order]:
+        """Récupère les `limit` commandes les plus récentes après `cursor`.
 
-        for order_row in orders_rows:
-            # Récupérer les articles de la commande
-            cursor.execute(
-                "SELECT * FROM order_items WHERE order_id = ?", (order_row["id"],)
+        Les commandes récentes viennent de la base principale ; l'archive n'est
+        interrogée qu'une fois celles-ci épuisées.
+        """
+        keyset: list[Any] | None = None
+        if cursor:
+            created_at, order_id = decode_cursor(cursor)
+            keyset = [created_at, order_id]
+
+        with self.connection() as conn:
+            orders_rows = self._user_order_rows(
+                conn, "main", user_id, keyset, limit + 1
             )
-            items_rows = cursor.fetchall()
-
-            items: list[CartItem] = []
-            for item_row in items_rows:
-                items.append(
-                    CartItem(
-                        product_id=item_row["product_id"],
-                        product_name=item_row["product_name"],
-                        product_price=item_row["product_price"],
-                        product_image=item_row["product_image"],
-                        quantity=item_row["quantity"],
-                    )
+            archived: set[int] = set()
+            if len(orders_rows) <= limit:
+                orders_rows, archived = merge_order_rows(
+                    orders_rows,
+                    self._user_order_rows(
+                        conn, ARCHIVE_SCHEMA, user_id, keyset, limit + 1
+                    ),
                 )
+            page_rows = orders_rows[:limit]
+            items = self._load_orders_items(conn, page_rows, archived)
 
-            orders.append(
-                Order(
-                    id=order_row["id"],
-                    user_id=order_row["user_id"],
-                    items=items,
-                    total=order_row["total"],
-                    status=OrderStatus(order_row["status"]),
-                    shipping_address=order_row["shipping_address"],
-                    created_at=datetime.fromisoformat(order_row["created_at"]),
-                    updated_at=datetime.fromisoformat(order_row["updated_at"]),
+        next_cursor = None
+        if len(orders_rows) > limit:
+            last = page_rows[-1]
+            next_cursor = encode_cursor(last[ORDER_CREATED_AT], last[0])
+
+        return Page(
+            items=[order_from_row(row, items[row[0]]) for row in page_rows],
+            next_cursor=next_cursor,
+        )
+
+    def _user_order_rows(
+        self,
+        conn: sqlite3.Connection,
+        schema: str,
+        user_id: int,
+        keyset: list[Any] | None = None,
+        limit: int = -1,
+    ) -> list[tuple[Any, ...]]:
+        """Commandes d'un utilisateur dans `schema`, de la plus récente à la plus
+        ancienne, après la clé (created_at, id) `keyset` (LIMIT -1 : toutes)."""
+        params: list[Any] = [user_id]
+        condition = ""
+        if keyset:
+            created_at, order_id = keyset
+            condition = "AND (created_at, id) < (?, ?)"
+            params += [created_at, order_id]
+        return fetch_rows(
+            conn,
+            f"SELECT {ORDER_COLUMNS.select()} FROM {schema}.orders "
+            f"WHERE user_id = ? {condition} "
+            "ORDER BY created_at DESC, id DESC LIMIT ?",
+            (*params, limit),
+        )
+
+    def _load_orders_items(
+        self,
+        conn: sqlite3.Connection,
+        orders_rows: list[tuple[Any, ...]],
+        archived: set[int],
+    ) -> dict[int, list[CartItem]]:
+        """Articles de commandes lues dans la base principale et dans l'archive."""
+        order_ids = [row[0] for row in orders_rows]
+        items = self._load_order_items(
+            conn, [order_id for order_id in order_ids if order_id not in archived]
+        )
+        if archived:
+            items.update(
+                self._load_order_items(
+                    conn,
+                    [order_id for order_id in order_ids if order_id in archived],
+                    ARCHIVE_SCHEMA,
                 )
             )
+        return items
+
+    def _load_order_items(
+        self, conn: sqlite3.Connection, order_ids: list[int], schema: str = "main"
+    ) -> dict[int, list[CartItem]]:
+        """Charge les articles de plusieurs commandes par lots `IN (...)`."""
+        items: dict[int, list[CartItem]] = {order_id: [] for order_id in order_ids}
+
+        for start in range(0, len(order_ids), IN_BATCH_SIZE):
+            batch = order_ids[start : start + IN_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            rows = fetch_rows(
+                conn,
+                f"SELECT {ORDER_ITEM_COLUMNS.select()} FROM {schema}.order_items "
+                f"WHERE order_id IN ({placeholders}) ORDER BY id",
+                batch,
+            )
+            for row in rows:
+                items[row[0]].append(cart_item_from_row(row))
+
+        return items
+
+    def archive_orders(
+        self, max_age_days: int | None = None, batch_size: int | None = None
+    ) -> int:
+        """Déplace les anciennes commandes vers l'archive, par lots."""
+        with self.connection() as conn:
+            return self.archive.archive_orders(conn, max_age_days, batch_size)
+
+    def get_sales_report(
+        self, days: int = SALES_DAYS, top: int = TOP_PRODUCTS
+    ) -> SalesReport:
+        """Ventes des `days` derniers jours et meilleurs produits (tables de cumul)."""
+        with self.connection() as conn:
+            return load_sales_report(conn, days, top)
+
+    def rebuild_sales_rollups(self) -> None:
+        """Recalcule les tables de cumul depuis tout l'historique des commandes."""
+        with self.connection() as conn, immediate_transaction(conn):
+            rebuild_sales_rollups(conn, ("main", ARCHIVE_SCHEMA))
+
+    def add_review(self, review: Review) -> int:
+        """Ajoute un avis et met à jour la note du produit dans la même transaction.
+
+        ValueError si la note n'est pas entre 1 et 5 ou si le produit n'existe pas.
+        """
+        check_review(review)
+
+        with self.connection() as conn, immediate_transaction(conn):
+            cursor = conn.execute(
+                REVIEW_AGGREGATE_UPDATE,
+                (review.rating, review.rating, review.product_id),
+            )
+            if cursor.rowcount != 1:
+                raise ValueError(f"Produit inconnu: {review.product_id}")
+            cursor = conn.execute(
+                REVIEW_INSERT,
+                (
+                    review.product_id,
+                    review.user_id,
+                    review.user_name,
+                    review.rating,
+                    review.comment,
+                    to_epoch(review.created_at),
+                ),
+            )
+            review_id = cursor.lastrowid or 0
+
+        self._catalog_changed([review.product_id])
+        self._facets_changed([review.product_id])
+        return review_id
+
+    def get_reviews(
+        self, product_id: int, limit: int = 20, cursor: str | None = None
+    ) -> Page[Review]:
+        """Récupère une page des avis d'un produit, du plus récent au plus ancien."""
+        params: list[Any] = [product_id]
+        keyset = ""
+        if cursor:
+            created_at, review_id = decode_cursor(cursor)
+            keyset = "AND (created_at, id) < (?, ?)"
+            params += [created_at, review_id]
 
-        conn.close()
-        return orders
+        with self.connection() as conn:
+            rows = fetch_rows(
+                conn,
+                f"SELECT {REVIEW_COLUMNS.select()} FROM reviews "
+                f"WHERE product_id = ? {keyset} "
+                "ORDER BY created_at DESC, id DESC LIMIT ?",
+                (*params, limit + 1),
+            )
+
+        page_rows = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page_rows[-1]
+            next_cursor = encode_cursor(last[REVIEW_CREATED_AT], last[0])
 
+        return Page(
+            items=[review_from_row(row) for row in page_rows],
+            next_cursor=next_cursor,
+        )
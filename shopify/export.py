@@ -0,0 +1,274 @@
+"""
+Export en flux du catalogue et des commandes Shopify
+Lecture par lots `fetchmany` et écriture NDJSON ou CSV par morceaux, mémoire constante
+"""
+
+import argparse
+import csv
+import io
+import json
+import sqlite3
+import sys
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+from shopify.archive import ARCHIVE_SCHEMA
+from shopify.database import Database
+from shopify.mapping import PRODUCT_DETAIL, Projection, to_epoch
+
+
+EXPORT_BATCH_SIZE = 1_000
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_KINDS = ("products", "orders")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Dates formatées par SQLite (ISO 8601) : les lignes s'écrivent telles quelles
+ISO_DATE = "strftime('%Y-%m-%dT%H:%M:%S', {column}, 'unixepoch')"
+
+PRODUCT_FIELDS = PRODUCT_DETAIL.columns
+PRODUCT_EXPORT = Projection(
+    "products",
+    tuple(
+        f"{ISO_DATE.format(column='{p}created_at')} AS created_at"
+        if column == "created_at"
+        else column
+        for column in PRODUCT_FIELDS
+    ),
+)
+ORDER_FIELDS = (
+    "id",
+    "user_id",
+    "total",
+    "status",
+    "shipping_address",
+    "created_at",
+    "updated_at",
+)
+ORDER_ITEM_FIELDS = (
+    "product_id",
+    "product_name",
+    "product_price",
+    "product_image",
+    "quantity",
+)
+ORDER_WIDTH = len(ORDER_FIELDS)
+
+# Une ligne par article ; la commande est répétée (LEFT JOIN : commande vide)
+ORDER_ROWS = f"""
+    SELECT o.id, o.user_id, o.total, o.status, o.shipping_address,
+           {ISO_DATE.format(column="o.created_at")},
+           {ISO_DATE.format(column="o.updated_at")},
+           i.product_id, i.product_name, i.product_price, i.product_image,
+           i.quantity
+    FROM {{schema}}.orders o LEFT JOIN {{schema}}.order_items i ON i.order_id = o.id
+    {{where}}
+    ORDER BY o.id, i.id
+"""
+
+
+@dataclass(frozen=True)
+class DateRange:
+    """Période d'export, bornes incluses (None : pas de borne)."""
+
+    since: date | None = None
+    until: date | None = None
+
+    @classmethod
+    def parse(cls, since: str | None, until: str | None) -> "DateRange":
+        """Lit deux dates AAAA-MM-JJ (ValueError si invalides)."""
+        return cls(
+            date.fromisoformat(since) if since else None,
+            date.fromisoformat(until) if until else None,
+        )
+
+    def condition(self, column: str) -> tuple[list[str], list[Any]]:
+        """Conditions SQL sur une colonne de dates epoch."""
+        conditions: list[str] = []
+        params: list[Any] = []
+        if self.since:
+            conditions.append(f"{column} >= ?")
+            params.append(to_epoch(datetime.combine(self.since, time.min)))
+        if self.until:
+            conditions.append(f"{column} < ?")
+            next_day = self.until + timedelta(days=1)
+            params.append(to_epoch(datetime.combine(next_day, time.min)))
+        return conditions, params
+
+
+def batches(
+    conn: sqlite3.Connection, sql: str, params: Sequence[Any], batch_size: int
+) -> Iterator[list[tuple[Any, ...]]]:
+    """Exécute un SELECT et produit ses lignes (tuples) par lots `fetchmany`."""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(sql, params)
+    try:
+        while rows := cursor.fetchmany(batch_size):
+            yield rows
+    finally:
+        cursor.close()
+
+
+def product_rows(
+    conn: sqlite3.Connection, dates: DateRange, batch_size: int
+) -> Iterator[list[tuple[Any, ...]]]:
+    """Lignes PRODUCT_FIELDS par lots, dans l'ordre des ids."""
+    conditions, params = dates.condition("created_at")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"SELECT {PRODUCT_EXPORT.select()} FROM products {where} ORDER BY id"
+    return batches(conn, sql, params, batch_size)
+
+
+def product_records(
+    conn: sqlite3.Connection, dates: DateRange, batch_size: int
+) -> Iterator[list[dict[str, Any]]]:
+    """Produits (dictionnaires) par lots."""
+    for rows in product_rows(conn, dates, batch_size):
+        yield [dict(zip(PRODUCT_FIELDS, row, strict=True)) for row in rows]
+
+
+def order_rows(
+    conn: sqlite3.Connection, dates: DateRange, batch_size: int
+) -> Iterator[list[tuple[Any, ...]]]:
+    """Lignes (commande, article) de l'archive puis de la base principale.
+
+    Une commande présente des deux côtés (archivage interrompu) n'est lue que
+    dans la base principale.
+    """
+    conditions, params = dates.condition("o.created_at")
+    for schema in (ARCHIVE_SCHEMA, "main"):
+        schema_conditions = list(conditions)
+        if schema == ARCHIVE_SCHEMA:
+            schema_conditions.append("o.id NOT IN (SELECT id FROM main.orders)")
+        where = " AND ".join(schema_conditions)
+        sql = ORDER_ROWS.format(schema=schema, where=f"WHERE {where}" if where else "")
+        yield from batches(conn, sql, params, batch_size)
+
+
+def order_records(
+    conn: sqlite3.Connection, dates: DateRange, batch_size: int
+) -> Iterator[list[dict[str, Any]]]:
+    """Commandes (dictionnaires avec leurs articles) par lots.
+
+    Les lignes d'une commande sont consécutives : une commande coupée par la fin
+    d'un lot est complétée au lot suivant.
+    """
+    pending: dict[str, Any] | None = None
+    for rows in order_rows(conn, dates, batch_size):
+        records = []
+        for row in rows:
+            if pending is None or pending["id"] != row[0]:
+                if pending is not None:
+                    records.append(pending)
+                pending = dict(zip(ORDER_FIELDS, row, strict=False))
+                pending["items"] = []
+            if row[ORDER_WIDTH] is not None:
+                pending["items"].append(
+                    dict(zip(ORDER_ITEM_FIELDS, row[ORDER_WIDTH:], strict=True))
+                )
+        if records:
+            yield records
+    if pending is not None:
+        yield [pending]
+
+
+def ndjson_chunks(groups: Iterable[list[dict[str, Any]]]) -> Iterator[str]:
+    """Un morceau NDJSON (une ligne JSON par enregistrement) par lot."""
+    for records in groups:
+        yield "".join(
+            json.dumps(record, ensure_ascii=False) + "\n" for record in records
+        )
+
+
+def csv_chunks(
+    header: Sequence[str], groups: Iterable[Iterable[Sequence[Any]]]
+) -> Iterator[str]:
+    """Un morceau CSV par lot, précédé de l'en-tête."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for rows in groups:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_chunks(
+    db: Database,
+    kind: str,
+    fmt: str,
+    dates: DateRange | None = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[str]:
+    """Export de `kind` ("products" ou "orders") au format `fmt`, par morceaux.
+
+    Les paramètres sont vérifiés dès l'appel (ValueError) ; la base n'est lue
+    qu'au fil de l'itération.
+    """
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"Export inconnu: {kind!r}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format d'export inconnu: {fmt!r}")
+    return _export_chunks(db, kind, fmt, dates or DateRange(), batch_size)
+
+
+def _export_chunks(
+    db: Database, kind: str, fmt: str, dates: DateRange, batch_size: int
+) -> Iterator[str]:
+    """Corps de `export_chunks`.
+
+    Une connexion du pool est empruntée le temps du parcours, dans une seule
+    transaction de lecture : l'export est cohérent même si la base change.
+    """
+    with db.connection() as conn:
+        conn.execute("BEGIN")
+        try:
+            if kind == "products":
+                if fmt == "ndjson":
+                    yield from ndjson_chunks(product_records(conn, dates, batch_size))
+                else:
+                    yield from csv_chunks(
+                        PRODUCT_FIELDS, product_rows(conn, dates, batch_size)
+                    )
+            elif fmt == "ndjson":
+                yield from ndjson_chunks(order_records(conn, dates, batch_size))
+            else:
+                # Une ligne par article, la commande répétée
+                yield from csv_chunks(
+                    (*ORDER_FIELDS, *ORDER_ITEM_FIELDS),
+                    order_rows(conn, dates, batch_size),
+                )
+        finally:
+            conn.rollback()
+
+
+def main() -> None:
+    """Exporte le catalogue ou les commandes de la base par défaut."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("kind", choices=EXPORT_KINDS)
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--since", help="première date incluse (AAAA-MM-JJ)")
+    parser.add_argument("--until", help="dernière date incluse (AAAA-MM-JJ)")
+    parser.add_argument("--output", help="fichier de sortie (défaut : stdout)")
+    args = parser.parse_args()
+
+    dates = DateRange.parse(args.since, args.until)
+    db = Database()
+    try:
+        chunks = export_chunks(db, args.kind, args.format, dates)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8", newline="") as output:
+                output.writelines(chunks)
+        else:
+            sys.stdout.writelines(chunks)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
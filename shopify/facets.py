@@ -0,0 +1,187 @@
+"""
+Navigation par facettes du catalogue Shopify
+Filtres (catégorie, prix, note, stock), tris, et comptes par facette en une requête groupée
+"""
+
+import sqlite3
+from bisect import bisect_right
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from shopify.mapping import fetch_rows, to_epoch
+from shopify.models import (
+    FacetCounts,
+    PriceBucket,
+    Product,
+    ProductFilters,
+    ProductSort,
+)
+
+
+# Bornes des tranches de prix : [0, 25), [25, 50), ..., [500, +inf)
+PRICE_BOUNDS = (25.0, 50.0, 100.0, 250.0, 500.0)
+RATING_STEPS = (4, 3, 2, 1)
+
+# Colonne de tri et sens (décroissant) ; l'id départage les égalités
+SORT_KEYS: dict[ProductSort, tuple[str, bool]] = {
+    ProductSort.NEWEST: ("created_at", True),
+    ProductSort.PRICE_ASC: ("price", False),
+    ProductSort.PRICE_DESC: ("price", True),
+    ProductSort.RATING: ("rating", True),
+}
+
+# Une case du cube de comptage : catégorie, tranche de prix, étoiles
+# (note arrondie à l'entier inférieur), en stock, nombre de produits
+FacetCell = tuple[str, int, int, bool, int]
+
+PRICE_BUCKET_SQL = (
+    "CASE "
+    + " ".join(
+        f"WHEN price < {bound} THEN {index}" for index, bound in enumerate(PRICE_BOUNDS)
+    )
+    + f" ELSE {len(PRICE_BOUNDS)} END"
+)
+
+# Couvert par idx_products_facets (category, price, rating, stock)
+FACET_CELLS = f"""
+    SELECT category, {PRICE_BUCKET_SQL}, CAST(rating AS INTEGER), stock > 0, COUNT(*)
+    FROM products {{where}}
+    GROUP BY 1, 2, 3, 4
+"""
+
+
+def parse_filters(args: Mapping[str, str]) -> ProductFilters:
+    """Lit les filtres des paramètres d'URL (ValueError si invalides)."""
+
+    def price(name: str) -> float | None:
+        value = args.get(name)
+        if not value:
+            return None
+        number = float(value)
+        if not 0 <= number < float("inf"):
+            raise ValueError(f"Prix invalide: {value!r}")
+        return number
+
+    rating = args.get("min_rating")
+    min_rating = int(rating) if rating else None
+    if min_rating is not None and min_rating not in RATING_STEPS:
+        raise ValueError(f"Note minimale invalide: {rating!r}")
+
+    return ProductFilters(
+        category=args.get("category") or None,
+        min_price=price("min_price"),
+        max_price=price("max_price"),
+        min_rating=min_rating,
+        in_stock=args.get("in_stock") in ("1", "on", "true"),
+        sort=ProductSort(args.get("sort") or ProductSort.NEWEST.value),
+    )
+
+
+def filter_conditions(filters: ProductFilters) -> tuple[list[str], list[Any]]:
+    """Conditions SQL des filtres (sans le tri)."""
+    conditions: list[str] = []
+    params: list[Any] = []
+    if filters.category:
+        conditions.append("category = ?")
+        params.append(filters.category)
+    if filters.min_price is not None:
+        conditions.append("price >= ?")
+        params.append(filters.min_price)
+    if filters.max_price is not None:
+        conditions.append("price < ?")
+        params.append(filters.max_price)
+    if filters.min_rating is not None:
+        conditions.append("rating >= ?")
+        params.append(filters.min_rating)
+    if filters.in_stock:
+        conditions.append("stock > 0")
+    return conditions, params
+
+
+def matches(product: Product, filters: ProductFilters) -> bool:
+    """Vrai si le produit passe les filtres (mêmes règles que `filter_conditions`)."""
+    return (
+        (not filters.category or product.category == filters.category)
+        and (filters.min_price is None or product.price >= filters.min_price)
+        and (filters.max_price is None or product.price < filters.max_price)
+        and (filters.min_rating is None or product.rating >= filters.min_rating)
+        and (not filters.in_stock or product.stock > 0)
+    )
+
+
+def sort_value(product: Product, column: str) -> float:
+    """Valeur de tri d'un produit, telle que stockée en base (dates en epoch)."""
+    if column == "created_at":
+        return to_epoch(product.created_at)
+    return float(getattr(product, column))
+
+
+def load_facet_cells(
+    conn: sqlite3.Connection, filters: ProductFilters
+) -> list[FacetCell]:
+    """Cube de comptage, en une requête groupée sur la fourchette de prix.
+
+    Les autres filtres ne sont pas appliqués : chaque facette est comptée
+    sans son propre filtre, par `facet_counts`.
+    """
+    in_range = ProductFilters(min_price=filters.min_price, max_price=filters.max_price)
+    conditions, params = filter_conditions(in_range)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = fetch_rows(conn, FACET_CELLS.format(where=where), params)
+    return [(row[0], row[1], row[2], bool(row[3]), row[4]) for row in rows]
+
+
+def facet_cells(
+    products: Iterable[Product], filters: ProductFilters
+) -> list[FacetCell]:
+    """Même cube que `load_facet_cells`, calculé sur des produits en mémoire."""
+    counts: Counter[tuple[str, int, int, bool]] = Counter()
+    for product in products:
+        if (filters.min_price is None or product.price >= filters.min_price) and (
+            filters.max_price is None or product.price < filters.max_price
+        ):
+            bucket = bisect_right(PRICE_BOUNDS, product.price)
+            counts[
+                product.category, bucket, int(product.rating), product.stock > 0
+            ] += 1
+    return [(*key, count) for key, count in counts.items()]
+
+
+def facet_counts(cells: Iterable[FacetCell], filters: ProductFilters) -> FacetCounts:
+    """Comptes par facette ; chacune ignore son propre filtre."""
+    total = in_stock = 0
+    categories: Counter[str] = Counter()
+    buckets: Counter[int] = Counter()
+    stars: Counter[int] = Counter()
+    for category, bucket, rating, available, count in cells:
+        category_ok = not filters.category or category == filters.category
+        rating_ok = filters.min_rating is None or rating >= filters.min_rating
+        stock_ok = available or not filters.in_stock
+        if rating_ok and stock_ok:
+            categories[category] += count
+        if category_ok and stock_ok:
+            stars[rating] += count
+        if category_ok and rating_ok:
+            if available:
+                in_stock += count
+            if stock_ok:
+                buckets[bucket] += count
+                total += count
+
+    lows = (0.0, *PRICE_BOUNDS)
+    highs: tuple[float | None, ...] = (*PRICE_BOUNDS, None)
+    return FacetCounts(
+        total=total,
+        categories=sorted(categories.items()),
+        price_buckets=[
+            PriceBucket(low, high, buckets[index])
+            for index, (low, high) in enumerate(zip(lows, highs, strict=True))
+            if buckets[index]
+        ],
+        ratings=[
+            (step, sum(n for rating, n in stars.items() if rating >= step))
+            for step in RATING_STEPS
+        ],
+        in_stock=in_stock,
+    )
@@ -0,0 +1,325 @@
+"""
+Import en masse du catalogue Shopify
+Fichier CSV ou NDJSON lu en flux, validé et écrit par lots, rejets mis à part
+"""
+
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, TextIO
+
+from shopify.models import Product
+from shopify.repository import Repository
+
+
+IMPORT_CHUNK_SIZE = 5_000
+IMPORT_FORMATS = ("ndjson", "csv")
+REJECTS_DIRECTORY = "shopify/imports"
+# Lecture du fichier : les octets non UTF-8 deviennent des surrogates, rejetés
+# à la validation au lieu d'interrompre l'import
+SOURCE_ERRORS = "surrogateescape"
+# Taille maximale d'un champ CSV : celle d'un TEXT SQLite (SQLITE_MAX_LENGTH),
+# la description n'étant pas bornée
+CSV_FIELD_LIMIT = 1_000_000_000
+
+# Un enregistrement lu : numéro de ligne et valeur brute (dict, texte NDJSON
+# illisible ou erreur du lecteur CSV, rejeté à la validation)
+Record = tuple[int, Any]
+
+
+@dataclass
+class ImportReport:
+    """Bilan (ou avancement) d'un import."""
+
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+    done: bool = False
+
+    def rows_per_s(self) -> float:
+        """Débit en lignes par seconde."""
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convertit en dictionnaire (JSON)."""
+        return {
+            **asdict(self),
+            "seconds": round(self.seconds, 3),
+            "rows_per_s": round(self.rows_per_s()),
+        }
+
+
+def import_format(filename: str, fmt: str | None = None) -> str:
+    """Format explicite, sinon déduit de l'extension (ValueError si inconnu)."""
+    fmt = fmt or Path(filename).suffix.lstrip(".").lower()
+    if fmt == "jsonl":
+        fmt = "ndjson"
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Format d'import inconnu: {fmt!r}")
+    return fmt
+
+
+def csv_records(lines: Iterable[str]) -> Iterator[Record]:
+    """Lignes CSV (avec en-tête) en dictionnaires ; une ligne illisible donne l'erreur."""
+    csv.field_size_limit(max(csv.field_size_limit(), CSV_FIELD_LIMIT))
+    reader = csv.DictReader(lines)
+    while True:
+        try:
+            record = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            # Le lecteur reprend à la ligne suivante (DictReader.line_num n'est
+            # mis à jour qu'après une ligne lue)
+            yield reader.reader.line_num, exc
+            continue
+        yield reader.line_num, record
+
+
+def ndjson_records(lines: Iterable[str]) -> Iterator[Record]:
+    """Lignes NDJSON décodées ; une ligne illisible est gardée telle quelle."""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, line.rstrip("\n")
+
+
+def _text(record: Mapping[str, Any], name: str, default: str | None = None) -> str:
+    """Champ texte ; obligatoire si `default` est None."""
+    value = record.get(name)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if default is None:
+            raise ValueError(f"Champ obligatoire manquant: {name}")
+        return default
+    text = str(value).strip()
+    try:
+        text.encode("utf-8")
+    except UnicodeEncodeError:
+        raise ValueError(f"Texte non UTF-8 pour {name}") from None
+    return text
+
+
+def _number(record: Mapping[str, Any], name: str, default: float | None) -> float:
+    """Champ numérique positif ou nul ; obligatoire si `default` est None."""
+    raw = record.get(name)
+    if raw is None or raw == "":
+        if default is None:
+            raise ValueError(f"Champ obligatoire manquant: {name}")
+        return default
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        raise ValueError(f"Nombre invalide pour {name}: {raw!r}") from None
+    if not math.isfinite(value) or value < 0:
+        raise ValueError(f"Valeur invalide pour {name}: {raw!r}")
+    return value
+
+
+def _integer(record: Mapping[str, Any], name: str) -> int:
+    """Champ entier positif ou nul (0 par défaut)."""
+    value = _number(record, name, 0.0)
+    if not value.is_integer():
+        raise ValueError(f"Entier attendu pour {name}: {record.get(name)!r}")
+    return int(value)
+
+
+def product_from_record(record: Any) -> Product:
+    """Valide un enregistrement importé et construit le produit (ValueError).
+
+    Champs obligatoires : name, price, category. Les colonnes d'un export
+    (`python -m shopify.export products`) sont reconnues ; id est ignoré.
+    """
+    if isinstance(record, csv.Error):
+        raise ValueError(f"Ligne CSV illisible: {record}")
+    if not isinstance(record, Mapping):
+        raise ValueError("Objet JSON attendu")
+
+    rating = _number(record, "rating", 0.0)
+    if rating > 5:
+        raise ValueError(f"Note invalide: {rating} (attendu: 0 à 5)")
+    created_at = _text(record, "created_at", "")
+    try:
+        created = datetime.fromisoformat(created_at) if created_at else None
+    except ValueError:
+        raise ValueError(f"Date invalide pour created_at: {created_at!r}") from None
+
+    product = Product(
+        id=0,
+        name=_text(record, "name"),
+        description=_text(record, "description", ""),
+        price=round(_number(record, "price", None), 2),
+        image_url=_text(record, "image_url", ""),
+        category=_text(record, "category"),
+        stock=_integer(record, "stock"),
+        rating=rating,
+        reviews_count=_integer(record, "reviews_count"),
+        sku=_text(record, "sku", "") or None,
+    )
+    if created is not None:
+        product.created_at = created
+    return product
+
+
+def reject_line(line: int, error: str, record: Any) -> str:
+    """Ligne NDJSON du fichier des rejets (line, error, record)."""
+    if isinstance(record, csv.Error):
+        record = None
+    entry = {"line": line, "error": error, "record": record}
+    text = json.dumps(entry, ensure_ascii=False)
+    try:
+        text.encode("utf-8")
+    except UnicodeEncodeError:
+        text = json.dumps(entry)  # octets non UTF-8 de la source, échappés
+    return text + "\n"
+
+
+def iter_import(
+    db: Repository,
+    lines: Iterable[str],
+    fmt: str,
+    rejects: TextIO | None = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> Iterator[ImportReport]:
+    """Importe les produits d'un fichier, un lot (une transaction) à la fois.
+
+    Un produit dont le SKU existe met à jour la fiche existante. Les lignes
+    invalides ne bloquent pas l'import : elles sont écrites dans `rejects`
+    (NDJSON : line, error, record). Produit le bilan après chaque lot, puis le
+    bilan final (`done`).
+    """
+    records = ndjson_records(lines) if fmt == "ndjson" else csv_records(lines)
+    report = ImportReport()
+    start = time.perf_counter()
+    chunk: list[Product] = []
+
+    def flush() -> ImportReport:
+        inserted, updated = db.upsert_products(chunk)
+        chunk.clear()
+        report.inserted += inserted
+        report.updated += updated
+        report.chunks += 1
+        report.seconds = time.perf_counter() - start
+        return report
+
+    for line, record in records:
+        report.rows += 1
+        try:
+            chunk.append(product_from_record(record))
+        except ValueError as exc:
+            report.rejected += 1
+            if rejects is not None:
+                rejects.write(reject_line(line, str(exc), record))
+            continue
+        if len(chunk) >= chunk_size:
+            yield flush()
+    if chunk:
+        yield flush()
+
+    report.seconds = time.perf_counter() - start
+    report.done = True
+    yield report
+
+
+def import_products(
+    db: Repository,
+    lines: Iterable[str],
+    fmt: str,
+    rejects: TextIO | None = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    progress: Callable[[ImportReport], None] | None = None,
+) -> ImportReport:
+    """Importe un fichier (voir `iter_import`) ; `progress` reçoit chaque bilan."""
+    report = ImportReport()
+    for report in iter_import(db, lines, fmt, rejects, chunk_size):
+        if progress is not None:
+            progress(report)
+    return report
+
+
+def progress_lines(
+    db: Repository,
+    lines: Iterable[str],
+    fmt: str,
+    directory: str = REJECTS_DIRECTORY,
+) -> Iterator[str]:
+    """Import dont l'avancement est produit en NDJSON (une ligne par bilan).
+
+    Les rejets vont dans un fichier horodaté de `directory`, supprimé s'il
+    reste vide ; le bilan final donne son chemin.
+    """
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    path = Path(directory) / f"rejects-{datetime.now():%Y%m%d-%H%M%S-%f}.ndjson"
+    with path.open("w", encoding="utf-8") as rejects:
+        for report in iter_import(db, lines, fmt, rejects):
+            status = report.to_dict()
+            if report.done:
+                status["rejects"] = str(path) if report.rejected else None
+            yield json.dumps(status) + "\n"
+    if path.stat().st_size == 0:
+        path.unlink()
+
+
+def main() -> None:
+    """Importe un fichier de produits dans la base par défaut."""
+    from shopify.database import Database
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("file", help="fichier CSV ou NDJSON (- : stdin)")
+    parser.add_argument("--format", choices=IMPORT_FORMATS)
+    parser.add_argument("--rejects", help="fichier des lignes rejetées (NDJSON)")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.file == "-" and not args.format:
+        parser.error("--format est requis pour lire stdin")
+    fmt = import_format(args.file, args.format)
+
+    def show(report: ImportReport) -> None:
+        print(
+            f"\r   {report.rows:,} lignes ({report.rejected:,} rejetées)",
+            end="",
+            file=sys.stderr,
+        )
+
+    db = Database()
+    try:
+        with ExitStack() as files:
+            source = files.enter_context(
+                open(
+                    sys.stdin.fileno() if args.file == "-" else args.file,
+                    encoding="utf-8-sig",
+                    errors=SOURCE_ERRORS,
+                    newline="",
+                    closefd=args.file != "-",
+                )
+            )
+            rejects = None
+            if args.rejects:
+                rejects = files.enter_context(open(args.rejects, "w", encoding="utf-8"))
+            report = import_products(db, source, fmt, rejects, args.chunk_size, show)
+    finally:
+        db.close()
+    print(file=sys.stderr)
+    print(
+        f"✅ {report.inserted:,} produits ajoutés, {report.updated:,} mis à jour, "
+        f"{report.rejected:,} lignes rejetées en {report.seconds:.2f} s "
+        f"({report.rows_per_s():,.0f} lignes/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ import hashlib
 
 from shopify.database import Database
 from shopify.models import Product, User, UserRole
+from shopify.repository import Repository
 
 
 def hash_password(password: str) -> str:
@@ -14,46 +15,52 @@ def hash_password(password: str) -> str:
     return hashlib.sha256(password.encode()).hexdigest()
 
 
-def init_demo_data() -> None:
+def init_demo_data(db: Repository | None = None) -> None:
     """Initialise la base de données avec des données de démonstration."""
-    db = Database()
+    if db is None:
+        db = Database()
 
     print("🔧 Initialisation de la base de données Shopify...")
 
-    # Créer un utilisateur admin
-    admin = User(
-        id=0,
-        email="admin@shopify.com",
-        password_hash=hash_password("admin123"),
-        first_name="Admin",
-        last_name="Shopify",
-        role=UserRole.ADMIN,
-    )
-
-    # Vérifier si l'admin existe déjà
-    existing_admin = db.get_user_by_email("admin@shopify.com")
-    if not existing_admin:
-        db.add_user(admin)
-        print("✅ Utilisateur admin créé (admin@shopify.com / admin123)")
-    else:
-        print("ℹ️  Utilisateur admin déjà existant")
-
-    # Créer un utilisateur client
-    customer = User(
-        id=0,
-        email="client@example.com",
-        password_hash=hash_password("client123"),
-        first_name="Jean",
-        last_name="Dupont",
-        role=UserRole.CUSTOMER,
-    )
-
-    existing_customer = db.get_user_by_email("client@example.com")
-    if not existing_customer:
-        db.add_user(customer)
-        print("✅ Utilisateur client créé (client@example.com / client123)")
-    else:
-        print("ℹ️  Utilisateur client déjà existant")
+    # Comptes de démonstration : (utilisateur, mot de passe en clair)
+    demo_accounts = [
+        (
+            User(
+                id=0,
+                email="admin@shopify.com",
+                password_hash=hash_password("admin123"),
+                first_name="Admin",
+                last_name="Shopify",
+                role=UserRole.ADMIN,
+            ),
+            "admin123",
+        ),
+        (
+            User(
+                id=0,
+                email="client@example.com",
+                password_hash=hash_password("client123"),
+                first_name="Jean",
+                last_name="Dupont",
+                role=UserRole.CUSTOMER,
+            ),
+            "client123",
+        ),
+    ]
+
+    # Créer en un seul lot les comptes qui n'existent pas encore
+    missing_accounts = [
+        (user, password)
+        for user, password in demo_accounts
+        if not db.get_user_by_email(user.email)
+    ]
+    db.add_users_bulk(user for user, _ in missing_accounts)
+
+    for user, password in demo_accounts:
+        if (user, password) in missing_accounts:
+            print(f"✅ Utilisateur {user.first_name} créé ({user.email} / {password})")
+        else:
+            print(f"ℹ️  Utilisateur {user.first_name} déjà existant")
 
     # Produits de démonstration
     demo_products = [
@@ -191,15 +198,14 @@ def init_demo_data() -> None:
         ),
     ]
 
-    # Ajouter les produits s'ils n'existent pas déjà
-    existing_products = db.get_all_products()
+    # Ajouter les produits s'ils n'existent pas déjà (une seule transaction)
+    existing_products = db.count_products()
 
-    if len(existing_products) == 0:
-        for product in demo_products:
-            db.add_product(product)
+    if existing_products == 0:
+        db.add_products_bulk(demo_products)
         print(f"✅ {len(demo_products)} produits de démonstration ajoutés")
     else:
-        print(f"ℹ️  {len(existing_products)} produits déjà existants")
+        print(f"ℹ️  {existing_products} produits déjà existants")
 
     print("\n🎉 Initialisation terminée !")
     print("\n📝 Comptes de test :")
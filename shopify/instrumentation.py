@@ -0,0 +1,414 @@
+"""
+Instrumentation des requêtes SQLite pour Shopify
+Histogrammes de latence par requête, journal des requêtes lentes, compteur par requête HTTP
+"""
+
+import logging
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Iterable
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+
+logger = logging.getLogger("shopify.database")
+
+# Bornes supérieures (ms) des classes de l'histogramme de latence
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0)
+
+
+@dataclass(frozen=True)
+class InstrumentationSettings:
+    """Réglages de l'instrumentation des requêtes."""
+
+    enabled: bool = True
+    sample_rate: float = 1.0  # part des requêtes chronométrées (0 à 1)
+    slow_query_ms: float = 100.0
+    explain_slow_queries: bool = True
+    slow_log_size: int = 50
+    request_query_warning: int = 50  # requêtes SQL par requête HTTP
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Forme canonique d'une requête : espaces réduits, listes `IN (?, ?, …)`."""
+    compact = " ".join(sql.split())
+    return re.sub(r"\?(?:\s*,\s*\?)+", "?, …", compact)
+
+
+@dataclass
+class LatencyHistogram:
+    """Histogramme de latences à classes fixes (LATENCY_BUCKETS_MS + débordement)."""
+
+    counts: list[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    )
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def add(self, duration_ms: float) -> None:
+        """Ajoute une mesure."""
+        index = len(LATENCY_BUCKETS_MS)
+        for position, bound in enumerate(LATENCY_BUCKETS_MS):
+            if duration_ms <= bound:
+                index = position
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def percentile(self, fraction: float) -> float:
+        """Borne supérieure de la classe contenant le quantile `fraction`."""
+        if not self.count:
+            return 0.0
+        threshold = fraction * self.count
+        seen = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS_MS, self.counts, strict=False):
+            seen += bucket_count
+            if seen >= threshold:
+                return round(min(bound, self.max_ms), 3)
+        return round(self.max_ms, 3)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Résumé sérialisable en JSON."""
+        buckets = {
+            f"<={bound}": n
+            for bound, n in zip(LATENCY_BUCKETS_MS, self.counts, strict=False)
+        }
+        buckets[f">{LATENCY_BUCKETS_MS[-1]}"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": buckets,
+        }
+
+
+@dataclass
+class StatementStats:
+    """Compteurs d'une requête SQL (forme normalisée)."""
+
+    calls: int = 0
+    rows: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+
+@dataclass(frozen=True)
+class SlowQuery:
+    """Requête lente journalisée avec son plan d'exécution."""
+
+    sql: str
+    duration_ms: float
+    rows: int
+    plan: list[str]
+    at: float
+
+
+@dataclass
+class EndpointStats:
+    """Nombre de requêtes SQL émises par une route HTTP."""
+
+    requests: int = 0
+    queries: int = 0
+    max_queries: int = 0
+
+
+@dataclass
+class RequestQueries:
+    """Requêtes SQL émises pendant la requête HTTP en cours."""
+
+    count: int = 0
+    statements: Counter[str] = field(default_factory=Counter)
+
+
+# Compteur de la requête HTTP en cours (None hors requête)
+_current_request: ContextVar[RequestQueries | None] = ContextVar(
+    "shopify_request_queries", default=None
+)
+
+
+def begin_request() -> Token[RequestQueries | None]:
+    """Démarre le comptage des requêtes SQL d'une requête HTTP."""
+    return _current_request.set(RequestQueries())
+
+
+def end_request(token: Token[RequestQueries | None]) -> None:
+    """Arrête le comptage démarré par `begin_request`."""
+    _current_request.reset(token)
+
+
+def current_request_queries() -> RequestQueries | None:
+    """Requêtes SQL de la requête HTTP en cours, ou None hors requête."""
+    return _current_request.get()
+
+
+class QueryRecorder:
+    """Collecte les mesures des connexions instrumentées d'une base."""
+
+    def __init__(self, settings: InstrumentationSettings | None = None) -> None:
+        """Crée un collecteur vide."""
+        self.settings = settings or InstrumentationSettings()
+        self.statements: dict[str, StatementStats] = {}
+        self.endpoints: dict[str, EndpointStats] = {}
+        self.slow_queries: deque[SlowQuery] = deque(maxlen=self.settings.slow_log_size)
+        self._lock = threading.Lock()
+
+    def attach(self, conn: sqlite3.Connection) -> None:
+        """Hook de connexion : branche le collecteur sur une connexion instrumentée."""
+        if isinstance(conn, InstrumentedConnection):
+            conn.recorder = self
+
+    def begin(self, sql: str) -> bool:
+        """Compte une requête et indique s'il faut la chronométrer (échantillon)."""
+        request_queries = _current_request.get()
+        if request_queries is not None:
+            request_queries.count += 1
+            request_queries.statements[normalize_sql(sql)] += 1
+        rate = self.settings.sample_rate
+        return rate >= 1.0 or random.random() < rate
+
+    def record(
+        self,
+        sql: str,
+        params: Any,
+        duration: float,
+        rows: int,
+        conn: sqlite3.Connection | None,
+    ) -> None:
+        """Enregistre une requête terminée (durée en secondes)."""
+        duration_ms = duration * 1000
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                stats = self.statements[key] = StatementStats()
+            stats.calls += 1
+            stats.rows += rows
+            stats.latency.add(duration_ms)
+
+        if duration_ms >= self.settings.slow_query_ms:
+            plan = (
+                self.explain(conn, sql, params)
+                if conn is not None and self.settings.explain_slow_queries
+                else []
+            )
+            slow = SlowQuery(key, round(duration_ms, 3), rows, plan, time.time())
+            with self._lock:
+                self.slow_queries.append(slow)
+            logger.warning(
+                "Requête lente (%.1f ms, %d lignes): %s%s",
+                duration_ms,
+                rows,
+                key,
+                "".join(f"\n  {step}" for step in plan),
+            )
+
+    def explain(self, conn: sqlite3.Connection, sql: str, params: Any) -> list[str]:
+        """Plan d'exécution (`EXPLAIN QUERY PLAN`) d'une requête."""
+        statement = sql.lstrip().upper()
+        if not statement.startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")):
+            return []
+        try:
+            # Curseur non instrumenté : le plan ne doit pas être mesuré lui-même
+            rows = sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return [str(row[-1]) for row in rows.fetchall()]
+        except sqlite3.Error:
+            return []
+
+    def record_request(self, endpoint: str, queries: RequestQueries) -> None:
+        """Enregistre le nombre de requêtes SQL d'une requête HTTP terminée."""
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats()
+            stats.requests += 1
+            stats.queries += queries.count
+            stats.max_queries = max(stats.max_queries, queries.count)
+
+        if queries.count > self.settings.request_query_warning:
+            repeated = ", ".join(
+                f"{n}x {sql[:80]}" for sql, n in queries.statements.most_common(3)
+            )
+            logger.warning(
+                "%s: %d requêtes SQL (N+1 ?) %s", endpoint, queries.count, repeated
+            )
+
+    def snapshot(self) -> dict[str, Any]:
+        """Mesures courantes, sérialisables en JSON."""
+        with self._lock:
+            statements = sorted(
+                self.statements.items(),
+                key=lambda item: item[1].latency.total_ms,
+                reverse=True,
+            )
+            return {
+                "settings": {
+                    "sample_rate": self.settings.sample_rate,
+                    "slow_query_ms": self.settings.slow_query_ms,
+                },
+                "statements": [
+                    {
+                        "sql": sql,
+                        "calls": stats.calls,
+                        "rows": stats.rows,
+                        "latency": stats.latency.to_dict(),
+                    }
+                    for sql, stats in statements
+                ],
+                "slow_queries": [vars(slow) for slow in reversed(self.slow_queries)],
+                "endpoints": {
+                    endpoint: {
+                        **vars(stats),
+                        "mean_queries": round(stats.queries / stats.requests, 2),
+                    }
+                    for endpoint, stats in sorted(self.endpoints.items())
+                },
+            }
+
+    def reset(self) -> None:
+        """Remet toutes les mesures à zéro."""
+        with self._lock:
+            self.statements.clear()
+            self.endpoints.clear()
+            self.slow_queries.clear()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Curseur qui chronomètre l'exécution et la lecture de ses requêtes.
+
+    Une lecture est enregistrée une fois ses lignes épuisées, à la requête
+    suivante, à la fermeture du curseur ou, à défaut, à sa destruction.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, recorder: QueryRecorder) -> None:
+        """Crée un curseur rattaché au collecteur de la connexion."""
+        super().__init__(conn)
+        self._recorder = recorder
+        # Lecture en cours : requête, paramètres, durée cumulée, lignes lues
+        self._pending: tuple[str, Any] | None = None
+        self._elapsed = 0.0
+        self._rows = 0
+
+    def execute(self, sql: str, parameters: Any = (), /) -> "InstrumentedCursor":
+        """Exécute une requête en la chronométrant."""
+        self._finish(explain=True)
+        if not self._recorder.begin(sql):
+            super().execute(sql, parameters)
+            return self
+
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        elapsed = time.perf_counter() - start
+        if self.description is None:
+            # Pas de lignes à lire (écriture, pragma) : mesure complète
+            rows = max(self.rowcount, 0)
+            self._recorder.record(sql, parameters, elapsed, rows, self.connection)
+        else:
+            self._pending = (sql, parameters)
+            self._elapsed = elapsed
+            self._rows = 0
+        return self
+
+    def executemany(
+        self, sql: str, seq_of_parameters: Iterable[Any], /
+    ) -> "InstrumentedCursor":
+        """Exécute une requête par lot en la chronométrant."""
+        self._finish(explain=True)
+        if not self._recorder.begin(sql):
+            super().executemany(sql, seq_of_parameters)
+            return self
+
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        elapsed = time.perf_counter() - start
+        self._recorder.record(sql, (), elapsed, max(self.rowcount, 0), None)
+        return self
+
+    def fetchone(self) -> Any:
+        """Lit une ligne."""
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._elapsed += time.perf_counter() - start
+        if row is None:
+            self._finish(explain=True)
+        else:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size: int | None = None) -> list[Any]:
+        """Lit au plus `size` lignes."""
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._elapsed += time.perf_counter() - start
+        self._rows += len(rows)
+        if not rows:
+            self._finish(explain=True)
+        return rows
+
+    def fetchall(self) -> list[Any]:
+        """Lit toutes les lignes restantes."""
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._elapsed += time.perf_counter() - start
+        self._rows += len(rows)
+        self._finish(explain=True)
+        return rows
+
+    def __next__(self) -> Any:
+        """Ligne suivante."""
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self) -> None:
+        """Enregistre la lecture en cours puis ferme le curseur."""
+        self._finish(explain=True)
+        super().close()
+
+    def __del__(self) -> None:
+        """Enregistre une lecture jamais épuisée (sans plan : connexion rendue)."""
+        self._finish(explain=False)
+
+    def _finish(self, explain: bool) -> None:
+        """Enregistre la lecture en cours, s'il y en a une."""
+        pending = getattr(self, "_pending", None)
+        if pending is None:
+            return
+        self._pending = None
+        sql, parameters = pending
+        conn = self.connection if explain else None
+        self._recorder.record(sql, parameters, self._elapsed, self._rows, conn)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connexion dont toutes les requêtes passent par un `InstrumentedCursor`."""
+
+    recorder: QueryRecorder | None = None
+
+    def cursor(self, *args: Any, **kwargs: Any) -> Any:
+        """Curseur instrumenté (sauf fabrique de curseur explicite)."""
+        if args or kwargs or self.recorder is None:
+            return super().cursor(*args, **kwargs)
+        return InstrumentedCursor(self, self.recorder)
+
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:
+        """Raccourci `cursor().execute()` (instrumenté)."""
+        cursor: sqlite3.Cursor = self.cursor().execute(sql, parameters)
+        return cursor
+
+    def executemany(self, sql: str, parameters: Iterable[Any], /) -> sqlite3.Cursor:
+        """Raccourci `cursor().executemany()` (instrumenté)."""
+        cursor: sqlite3.Cursor = self.cursor().executemany(sql, parameters)
+        return cursor
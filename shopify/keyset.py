@@ -0,0 +1,51 @@
+"""
+Pagination par curseur sur des clés triées en mémoire
+Clés « plus récent d'abord » partagées par le moteur en mémoire et l'instantané
+"""
+
+from bisect import bisect_right
+from collections.abc import Callable, Sequence
+from datetime import datetime
+
+from shopify.database import decode_cursor, encode_cursor
+from shopify.mapping import to_epoch
+
+
+# Clé de tri « plus récent d'abord » : (-created_at en epoch, -id) croissante
+SortKey = tuple[int, int]
+
+
+def recency_key(created_at: datetime, item_id: int) -> SortKey:
+    """Clé de tri (created_at, id) décroissante."""
+    return (-to_epoch(created_at), -item_id)
+
+
+def keyset_page(
+    keys: Sequence[SortKey],
+    limit: int,
+    cursor: str | None,
+    accept: Callable[[int], bool] | None = None,
+) -> tuple[list[int], str | None]:
+    """Ids de la page après `cursor` dans des clés triées, et curseur suivant.
+
+    Le curseur (created_at, id) a le même format que celui de `Database`.
+    """
+    start = 0
+    if cursor:
+        created_at, item_id = decode_cursor(cursor)
+        start = bisect_right(keys, (-int(created_at), -int(item_id)))
+
+    selected: list[SortKey] = []
+    for position in range(start, len(keys)):
+        key = keys[position]
+        if accept is None or accept(-key[1]):
+            selected.append(key)
+            if len(selected) > limit:
+                break
+
+    next_cursor = None
+    if len(selected) > limit:
+        last = selected[limit - 1]
+        next_cursor = encode_cursor(-last[0], -last[1])
+
+    return [-item_id for _, item_id in selected[:limit]], next_cursor
@@ -0,0 +1,277 @@
+"""
+Correspondance lignes SQL -> modèles pour Shopify
+Projections de colonnes, décodage de tuples positionnels, dates décodées à la demande
+"""
+
+import calendar
+import sqlite3
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from shopify.models import (
+    CartItem,
+    Order,
+    OrderStatus,
+    Product,
+    Review,
+    User,
+    UserRole,
+)
+
+
+# Origine des dates stockées en secondes epoch (datetime naïf, sans fuseau)
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch(value: datetime) -> int:
+    """Convertit une date en secondes epoch pour le stockage en base."""
+    if value.tzinfo is not None:
+        return int(value.timestamp())
+    return calendar.timegm(value.timetuple())
+
+
+def parse_timestamp(value: datetime | int | str) -> datetime:
+    """Convertit une date stockée en base (epoch ou ISO 8601) en `datetime`."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, int):
+        return EPOCH + timedelta(seconds=value)
+    return datetime.fromisoformat(value)
+
+
+class LazyProduct(Product):
+    """Produit lu en base : `created_at` n'est décodé qu'à la première lecture."""
+
+    __slots__ = ("_created_at",)
+
+    _created_at: datetime | int | str
+
+    @property
+    def created_at(self) -> datetime:
+        """Date de création (décodée et mémorisée au premier accès)."""
+        value = parse_timestamp(self._created_at)
+        self._created_at = value
+        return value
+
+    @created_at.setter
+    def created_at(self, value: datetime | int | str) -> None:
+        self._created_at = value
+
+
+class LazyOrder(Order):
+    """Commande lue en base : les dates ne sont décodées qu'à la lecture.
+
+    `Order` est figée : les dates décodées sont mémorisées dans les attributs
+    privés de cette sous-classe via `object.__setattr__`.
+    """
+
+    __slots__ = ("_created_at", "_updated_at")
+
+    _created_at: datetime | int | str
+    _updated_at: datetime | int | str
+
+    @property
+    def created_at(self) -> datetime:
+        """Date de création (décodée et mémorisée au premier accès)."""
+        value = parse_timestamp(self._created_at)
+        object.__setattr__(self, "_created_at", value)
+        return value
+
+    @created_at.setter
+    def created_at(self, value: datetime | int | str) -> None:
+        object.__setattr__(self, "_created_at", value)
+
+    @property
+    def updated_at(self) -> datetime:
+        """Date de mise à jour (décodée et mémorisée au premier accès)."""
+        value = parse_timestamp(self._updated_at)
+        object.__setattr__(self, "_updated_at", value)
+        return value
+
+    @updated_at.setter
+    def updated_at(self, value: datetime | int | str) -> None:
+        object.__setattr__(self, "_updated_at", value)
+
+
+@dataclass(frozen=True)
+class Projection:
+    """Liste ordonnée d'expressions SQL correspondant aux champs d'un modèle."""
+
+    table: str
+    columns: tuple[str, ...]
+
+    def select(self, alias: str = "") -> str:
+        """Liste de colonnes pour un SELECT (préfixées par `alias` si fourni).
+
+        Les expressions utilisent `{p}` comme préfixe de colonne.
+        """
+        prefix = f"{alias}." if alias else ""
+        return ", ".join(
+            f"{prefix}{column}" if column.isidentifier() else column.format(p=prefix)
+            for column in self.columns
+        )
+
+    @property
+    def width(self) -> int:
+        """Nombre de colonnes de la projection."""
+        return len(self.columns)
+
+
+# Colonnes des produits dans l'ordre des champs de `Product`
+PRODUCT_DETAIL = Projection(
+    "products",
+    (
+        "id",
+        "name",
+        "description",
+        "price",
+        "image_url",
+        "category",
+        "stock",
+        "rating",
+        "reviews_count",
+        "created_at",
+        "sku",
+    ),
+)
+
+# Listes (catalogue, recherche) : seul le début de la description est affiché
+LIST_DESCRIPTION_LENGTH = 120
+PRODUCT_LIST = Projection(
+    "products",
+    tuple(
+        f"substr({{p}}description, 1, {LIST_DESCRIPTION_LENGTH}) AS description"
+        if column == "description"
+        else column
+        for column in PRODUCT_DETAIL.columns
+    ),
+)
+
+# Positions utiles dans une ligne de produit (curseurs de pagination, instantané)
+PRODUCT_ID = 0
+PRODUCT_DESCRIPTION = 2
+PRODUCT_CREATED_AT = 9
+
+ORDER_COLUMNS = Projection(
+    "orders",
+    (
+        "id",
+        "user_id",
+        "total",
+        "status",
+        "shipping_address",
+        "created_at",
+        "updated_at",
+    ),
+)
+ORDER_CREATED_AT = 5
+
+ORDER_ITEM_COLUMNS = Projection(
+    "order_items",
+    (
+        "order_id",
+        "product_id",
+        "product_name",
+        "product_price",
+        "product_image",
+        "quantity",
+    ),
+)
+
+USER_COLUMNS = Projection(
+    "users",
+    (
+        "id",
+        "email",
+        "password_hash",
+        "first_name",
+        "last_name",
+        "role",
+        "created_at",
+    ),
+)
+
+REVIEW_COLUMNS = Projection(
+    "reviews",
+    (
+        "id",
+        "product_id",
+        "user_id",
+        "user_name",
+        "rating",
+        "comment",
+        "created_at",
+    ),
+)
+REVIEW_CREATED_AT = 6
+
+
+def fetch_rows(
+    conn: sqlite3.Connection, sql: str, params: Sequence[Any] = ()
+) -> list[tuple[Any, ...]]:
+    """Exécute un SELECT et retourne des tuples positionnels (sans sqlite3.Row)."""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    rows: list[tuple[Any, ...]] = cursor.execute(sql, params).fetchall()
+    return rows
+
+
+def product_from_row(row: Sequence[Any]) -> Product:
+    """Construit un produit depuis une ligne PRODUCT_DETAIL / PRODUCT_LIST."""
+    return LazyProduct(*row[: PRODUCT_DETAIL.width])
+
+
+def products_from_rows(rows: Iterable[Sequence[Any]]) -> list[Product]:
+    """Construit une liste de produits (colonnes en trop ignorées)."""
+    width = PRODUCT_DETAIL.width
+    return [LazyProduct(*row[:width]) for row in rows]
+
+
+def cart_item_from_row(row: Sequence[Any]) -> CartItem:
+    """Construit un article depuis une ligne ORDER_ITEM_COLUMNS."""
+    return CartItem(*row[1:])
+
+
+def order_from_row(row: Sequence[Any], items: list[CartItem]) -> Order:
+    """Construit une commande depuis une ligne ORDER_COLUMNS et ses articles."""
+    order_id, user_id, total, status, shipping_address, created_at, updated_at = row
+    return LazyOrder(
+        order_id,
+        user_id,
+        items,
+        total,
+        OrderStatus(status),
+        shipping_address,
+        created_at,
+        updated_at,
+    )
+
+
+def user_from_row(row: Sequence[Any]) -> User:
+    """Construit un utilisateur depuis une ligne USER_COLUMNS."""
+    user_id, email, password_hash, first_name, last_name, role, created_at = row
+    return User(
+        user_id,
+        email,
+        password_hash,
+        first_name,
+        last_name,
+        UserRole(role),
+        parse_timestamp(created_at),
+    )
+
+
+def review_from_row(row: Sequence[Any]) -> Review:
+    """Construit un avis depuis une ligne REVIEW_COLUMNS."""
+    review_id, product_id, user_id, user_name, rating, comment, created_at = row
+    return Review(
+        review_id,
+        product_id,
+        user_id,
+        user_name,
+        rating,
+        comment,
+        parse_timestamp(created_at),
+    )
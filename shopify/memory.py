@@ -0,0 +1,580 @@
+"""
+Moteur de stockage en mémoire pour Shopify
+Dictionnaires et index triés, sans SQL : benchmarks du tier web et tests rapides
+"""
+
+import sqlite3
+import threading
+import unicodedata
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import replace
+from datetime import datetime
+from itertools import count
+from typing import Any
+
+from shopify.analytics import SALES_DAYS, TOP_PRODUCTS, SalesRollups
+from shopify.database import (
+    OutOfStockError,
+    check_review,
+    decode_sort_key,
+    encode_cursor,
+    highlight_terms,
+    search_terms,
+)
+from shopify.facets import (
+    SORT_KEYS,
+    facet_cells,
+    facet_counts,
+    matches,
+    sort_value,
+)
+from shopify.keyset import SortKey, keyset_page, recency_key
+from shopify.mapping import LIST_DESCRIPTION_LENGTH, parse_timestamp, to_epoch
+from shopify.models import (
+    FacetCounts,
+    Order,
+    Page,
+    Product,
+    ProductFilters,
+    Review,
+    SalesReport,
+    SearchHit,
+    User,
+)
+
+
+def search_words(text: str) -> list[str]:
+    """Mots d'un texte, en minuscules et sans accents (comme le tokenizer FTS5)."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    plain = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return search_terms(plain)
+
+
+def truncate_seconds(value: datetime) -> datetime:
+    """Date à la seconde près, comme une fois stockée en base (epoch)."""
+    return parse_timestamp(to_epoch(value))
+
+
+def catalog_fields(product: Product) -> dict[str, Any]:
+    """Champs d'une fiche remplacés par un import (comme PRODUCT_UPSERT)."""
+    return {
+        "name": product.name,
+        "description": product.description,
+        "price": product.price,
+        "image_url": product.image_url,
+        "category": product.category,
+        "stock": product.stock,
+    }
+
+
+class RecencyIndex:
+    """Ids triés du plus récent au plus ancien, paginables par curseur."""
+
+    def __init__(self) -> None:
+        """Crée un index vide."""
+        self._keys: list[SortKey] = []
+
+    def __len__(self) -> int:
+        """Nombre d'ids indexés."""
+        return len(self._keys)
+
+    def add(self, created_at: datetime, item_id: int) -> None:
+        """Indexe un élément."""
+        insort(self._keys, recency_key(created_at, item_id))
+
+    def discard(self, created_at: datetime, item_id: int) -> None:
+        """Retire un élément (sans effet s'il est absent)."""
+        key = recency_key(created_at, item_id)
+        position = bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+    def extend(self, entries: Iterable[tuple[datetime, int]]) -> None:
+        """Indexe un lot d'éléments (un seul tri)."""
+        self._keys.extend(recency_key(created_at, i) for created_at, i in entries)
+        self._keys.sort()
+
+    def ids(self) -> list[int]:
+        """Tous les ids, du plus récent au plus ancien."""
+        return [-item_id for _, item_id in self._keys]
+
+    def page(
+        self,
+        limit: int,
+        cursor: str | None,
+        accept: Callable[[int], bool] | None = None,
+    ) -> tuple[list[int], str | None]:
+        """Ids de la page après `cursor` (filtrés par `accept`) et curseur suivant."""
+        return keyset_page(self._keys, limit, cursor, accept)
+
+
+class MemoryDatabase:
+    """Implémentation en mémoire de `Repository` (rien n'est persisté).
+
+    Les résultats suivent le contrat de `Database` : copies des modèles
+    modifiables (les modèles figés sont partagés), dates à la seconde,
+    description tronquée dans les pages. La recherche trouve les mêmes produits
+    que FTS5 (chaque mot comme début de mot) mais les trie par date.
+    """
+
+    def __init__(self) -> None:
+        """Crée une base vide."""
+        self._lock = threading.RLock()
+        self._sequences = {
+            table: count(1) for table in ("products", "users", "orders", "reviews")
+        }
+        self._products: dict[int, Product] = {}
+        self._skus: dict[str, int] = {}
+        self._words: dict[int, frozenset[str]] = {}
+        self._rating_sums: dict[int, float] = {}
+        self._catalog = RecencyIndex()
+        self._categories: dict[str, RecencyIndex] = {}
+        self._users: dict[int, User] = {}
+        self._users_by_email: dict[str, int] = {}
+        self._orders: dict[int, Order] = {}
+        self._user_orders: dict[int, RecencyIndex] = {}
+        self._sales = SalesRollups()
+        self._reviews: dict[int, Review] = {}
+        self._product_reviews: dict[int, RecencyIndex] = {}
+        self._catalog_listeners: list[Callable[[list[int]], None]] = []
+        self._facet_listeners: list[Callable[[list[int]], None]] = []
+
+    def close(self) -> None:
+        """Rien à libérer."""
+
+    def add_catalog_listener(self, listener: Callable[[list[int]], None]) -> None:
+        """Abonne `listener` aux écritures du catalogue (ids des produits modifiés)."""
+        self._catalog_listeners.append(listener)
+
+    def add_facet_listener(self, listener: Callable[[list[int]], None]) -> None:
+        """Abonne `listener` aux écritures qui peuvent changer les facettes.
+
+        Prix, note, catégorie, passage du stock à zéro ou nouveaux produits
+        (liste vide) ; une commande qui laisse du stock ne le prévient pas.
+        """
+        self._facet_listeners.append(listener)
+
+    def _catalog_changed(self, product_ids: list[int]) -> None:
+        """Prévient les abonnés (caches) qu'un ou plusieurs produits ont changé."""
+        for listener in self._catalog_listeners:
+            listener(product_ids)
+
+    def _facets_changed(self, product_ids: list[int]) -> None:
+        """Prévient les abonnés des facettes (liste vide : nouveaux produits)."""
+        for listener in self._facet_listeners:
+            listener(product_ids)
+
+    # Produits
+
+    def add_product(self, product: Product) -> int:
+        """Ajoute un produit."""
+        product_id = self._store_products([product])[0]
+        self._catalog_changed([product_id])
+        self._facets_changed([])
+        return product_id
+
+    def add_products_bulk(self, products: Iterable[Product]) -> list[int]:
+        """Ajoute des produits et retourne leurs ids."""
+        ids = self._store_products(products)
+        # Nouveaux produits : rien à retirer des caches, seules les pages changent
+        self._catalog_changed([])
+        self._facets_changed([])
+        return ids
+
+    def upsert_products(self, products: Iterable[Product]) -> tuple[int, int]:
+        """Ajoute ou met à jour des produits par SKU.
+
+        Retourne (produits ajoutés, produits mis à jour).
+        """
+        new: list[Product] = []
+        new_skus: dict[str, int] = {}
+        changed: list[int] = []
+        updated = 0
+        with self._lock:
+            for product in products:
+                if product.sku and product.sku in new_skus:
+                    # SKU répété : met à jour la fiche de sa première occurrence
+                    position = new_skus[product.sku]
+                    new[position] = replace(new[position], **catalog_fields(product))
+                    updated += 1
+                elif product.sku and product.sku in self._skus:
+                    product_id = self._skus[product.sku]
+                    self._update_product(product_id, product)
+                    changed.append(product_id)
+                    updated += 1
+                else:
+                    if product.sku:
+                        new_skus[product.sku] = len(new)
+                    new.append(product)
+            self._store_products(new)
+
+        # Produits modifiés à invalider, puis ajouts : pages à reconstruire
+        if changed:
+            self._catalog_changed(changed)
+            self._facets_changed(changed)
+        if new:
+            self._catalog_changed([])
+            self._facets_changed([])
+        return len(new), updated
+
+    def _store_products(self, products: Iterable[Product]) -> list[int]:
+        """Enregistre des copies des produits et les indexe.
+
+        Comme avec SQLite, un SKU déjà utilisé lève IntegrityError et n'ajoute
+        aucun produit du lot.
+        """
+        products = list(products)
+        with self._lock:
+            skus = [product.sku for product in products if product.sku]
+            if len(set(skus)) != len(skus) or any(sku in self._skus for sku in skus):
+                raise sqlite3.IntegrityError("UNIQUE constraint failed: products.sku")
+
+            stored = [
+                replace(
+                    product,
+                    id=next(self._sequences["products"]),
+                    created_at=truncate_seconds(product.created_at),
+                )
+                for product in products
+            ]
+            by_category: dict[str, list[tuple[datetime, int]]] = {}
+            for product in stored:
+                self._products[product.id] = product
+                self._rating_sums[product.id] = product.rating * product.reviews_count
+                self._index_words(product)
+                if product.sku:
+                    self._skus[product.sku] = product.id
+                by_category.setdefault(product.category, []).append(
+                    (product.created_at, product.id)
+                )
+
+            self._catalog.extend((p.created_at, p.id) for p in stored)
+            for category, entries in by_category.items():
+                self._categories.setdefault(category, RecencyIndex()).extend(entries)
+
+        return [product.id for product in stored]
+
+    def _update_product(self, product_id: int, source: Product) -> None:
+        """Remplace la fiche d'un produit (notes, avis et date conservés)."""
+        current = self._products[product_id]
+        product = replace(current, **catalog_fields(source))
+        self._products[product_id] = product
+        self._index_words(product)
+        if product.category != current.category:
+            self._categories[current.category].discard(current.created_at, product_id)
+            self._categories.setdefault(product.category, RecencyIndex()).add(
+                product.created_at, product_id
+            )
+
+    def _index_words(self, product: Product) -> None:
+        """Mots recherchables d'un produit."""
+        self._words[product.id] = frozenset(
+            search_words(f"{product.name} {product.description} {product.category}")
+        )
+
+    def _detail(self, product_ids: Iterable[int]) -> list[Product]:
+        """Copies complètes des produits."""
+        return [replace(self._products[product_id]) for product_id in product_ids]
+
+    def _listing(self, product_ids: Iterable[int]) -> list[Product]:
+        """Copies des produits avec description tronquée (pages, recherche)."""
+        return [
+            replace(product, description=product.description[:LIST_DESCRIPTION_LENGTH])
+            for product in (self._products[product_id] for product_id in product_ids)
+        ]
+
+    def get_all_products(self) -> list[Product]:
+        """Récupère tous les produits."""
+        with self._lock:
+            return self._detail(self._catalog.ids())
+
+    def get_product_by_id(self, product_id: int) -> Product | None:
+        """Récupère un produit par son ID."""
+        with self._lock:
+            product = self._products.get(product_id)
+            return replace(product) if product is not None else None
+
+    def get_products_by_ids(self, product_ids: Sequence[int]) -> list[Product]:
+        """Récupère des produits par leurs IDs."""
+        with self._lock:
+            return self._detail(pid for pid in product_ids if pid in self._products)
+
+    def get_products_by_category(self, category: str) -> list[Product]:
+        """Récupère les produits d'une catégorie."""
+        with self._lock:
+            index = self._categories.get(category)
+            return self._detail(index.ids()) if index else []
+
+    def count_products(self) -> int:
+        """Retourne le nombre total de produits."""
+        return len(self._products)
+
+    def get_products_page(
+        self, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Récupère une page du catalogue, du plus récent au plus ancien."""
+        with self._lock:
+            ids, next_cursor = self._catalog.page(limit, cursor)
+            return Page(items=self._listing(ids), next_cursor=next_cursor)
+
+    def get_products_by_category_page(
+        self, category: str, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Récupère une page des produits d'une catégorie."""
+        with self._lock:
+            index = self._categories.get(category)
+            if index is None:
+                return Page(items=[])
+            ids, next_cursor = index.page(limit, cursor)
+            return Page(items=self._listing(ids), next_cursor=next_cursor)
+
+    def get_filtered_products_page(
+        self, filters: ProductFilters, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Une page du catalogue filtré et trié (parcours de tous les produits)."""
+        column, descending = SORT_KEYS[filters.sort]
+        sign = -1 if descending else 1
+        with self._lock:
+            keys = sorted(
+                (sign * sort_value(product, column), sign * product.id)
+                for product in self._products.values()
+                if matches(product, filters)
+            )
+            start = 0
+            if cursor:
+                value, product_id = decode_sort_key(cursor)
+                start = bisect_right(keys, (sign * value, sign * product_id))
+            selected = keys[start : start + limit + 1]
+            items = self._listing(sign * key[1] for key in selected[:limit])
+
+        next_cursor = None
+        if len(selected) > limit:
+            value, product_id = selected[limit - 1]
+            next_cursor = encode_cursor(sign * value, sign * product_id)
+        return Page(items=items, next_cursor=next_cursor)
+
+    def get_facet_counts(self, filters: ProductFilters) -> FacetCounts:
+        """Nombre de produits par catégorie, tranche de prix, note et stock."""
+        with self._lock:
+            cells = facet_cells(self._products.values(), filters)
+        return facet_counts(cells, filters)
+
+    def _matcher(self, terms: list[str]) -> Callable[[int], bool]:
+        """Prédicat : chaque mot recherché commence un mot du produit."""
+        prefixes = search_words(" ".join(terms))
+
+        def matches(product_id: int) -> bool:
+            words = self._words[product_id]
+            return all(
+                any(word.startswith(prefix) for word in words) for prefix in prefixes
+            )
+
+        return matches
+
+    def search_products(self, query: str) -> list[Product]:
+        """Recherche des produits par nom, description ou catégorie."""
+        return [hit.product for hit in self.search_products_with_snippets(query)]
+
+    def search_products_with_snippets(self, query: str) -> list[SearchHit]:
+        """Recherche des produits et retourne des extraits surlignés."""
+        terms = search_terms(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            matches = self._matcher(terms)
+            ids = [
+                product_id for product_id in self._catalog.ids() if matches(product_id)
+            ]
+            return self._hits(ids, terms)
+
+    def search_products_page(
+        self, query: str, limit: int = 24, cursor: str | None = None
+    ) -> Page[SearchHit]:
+        """Récupère une page de résultats de recherche avec leurs extraits."""
+        terms = search_terms(query)
+        if not terms:
+            return Page(items=[])
+
+        with self._lock:
+            ids, next_cursor = self._catalog.page(limit, cursor, self._matcher(terms))
+            return Page(items=self._hits(ids, terms), next_cursor=next_cursor)
+
+    def _hits(self, product_ids: list[int], terms: list[str]) -> list[SearchHit]:
+        """Résultats de recherche : extrait de la description complète, produit tronqué."""
+        return [
+            SearchHit(
+                product,
+                highlight_terms(self._products[product.id].description, terms),
+            )
+            for product in self._listing(product_ids)
+        ]
+
+    # Utilisateurs
+
+    def add_user(self, user: User) -> int:
+        """Ajoute un utilisateur."""
+        return self.add_users_bulk([user])[0]
+
+    def add_users_bulk(self, users: Iterable[User]) -> list[int]:
+        """Ajoute des utilisateurs et retourne leurs ids.
+
+        Comme avec SQLite, un email déjà utilisé lève IntegrityError et
+        n'ajoute aucun utilisateur du lot.
+        """
+        users = list(users)
+        with self._lock:
+            emails = [user.email for user in users]
+            if len(set(emails)) != len(emails) or any(
+                email in self._users_by_email for email in emails
+            ):
+                raise sqlite3.IntegrityError("UNIQUE constraint failed: users.email")
+
+            ids = []
+            for user in users:
+                stored = replace(user, id=next(self._sequences["users"]))
+                self._users[stored.id] = stored
+                self._users_by_email[stored.email] = stored.id
+                ids.append(stored.id)
+
+        return ids
+
+    def get_user_by_email(self, email: str) -> User | None:
+        """Récupère un utilisateur par email."""
+        with self._lock:
+            user_id = self._users_by_email.get(email)
+            return self._users[user_id] if user_id is not None else None
+
+    # Commandes
+
+    def create_order(self, order: Order) -> int:
+        """Crée une commande (sans toucher au stock, voir place_order)."""
+        with self._lock:
+            return self._insert_order(order)
+
+    def place_order(self, order: Order) -> int:
+        """Passe une commande en décrémentant le stock (tout ou rien)."""
+        quantities: dict[int, int] = {}
+        for item in order.items:
+            quantities[item.product_id] = (
+                quantities.get(item.product_id, 0) + item.quantity
+            )
+
+        with self._lock:
+            for product_id, quantity in quantities.items():
+                product = self._products.get(product_id)
+                if product is None or product.stock < quantity:
+                    raise OutOfStockError(product_id)
+            for product_id, quantity in quantities.items():
+                self._products[product_id].stock -= quantity
+            sold_out = [pid for pid in quantities if self._products[pid].stock == 0]
+            order_id = self._insert_order(order)
+
+        # Seuls les produits épuisés changent de facette (en stock)
+        self._catalog_changed(list(quantities))
+        if sold_out:
+            self._facets_changed(sold_out)
+        return order_id
+
+    def _insert_order(self, order: Order) -> int:
+        """Enregistre une copie de la commande (verrou déjà pris)."""
+        stored = replace(
+            order,
+            id=next(self._sequences["orders"]),
+            items=list(order.items),
+            created_at=truncate_seconds(order.created_at),
+            updated_at=truncate_seconds(order.updated_at),
+        )
+        self._orders[stored.id] = stored
+        self._user_orders.setdefault(stored.user_id, RecencyIndex()).add(
+            stored.created_at, stored.id
+        )
+        self._sales.add(stored, self._categories_of(stored))
+        return stored.id
+
+    def _categories_of(self, order: Order) -> dict[int, str]:
+        """Catégorie actuelle des produits d'une commande."""
+        return {
+            item.product_id: self._products[item.product_id].category
+            for item in order.items
+            if item.product_id in self._products
+        }
+
+    def _order_copies(self, order_ids: Iterable[int]) -> list[Order]:
+        """Copies des commandes (articles figés, partagés ; listes copiées)."""
+        orders = (self._orders[order_id] for order_id in order_ids)
+        return [replace(order, items=list(order.items)) for order in orders]
+
+    def get_user_orders(self, user_id: int) -> list[Order]:
+        """Récupère les commandes d'un utilisateur."""
+        with self._lock:
+            index = self._user_orders.get(user_id)
+            return self._order_copies(index.ids()) if index else []
+
+    def get_user_orders_page(
+        self, user_id: int, limit: int = 20, cursor: str | None = None
+    ) -> Page[Order]:
+        """Récupère les `limit` commandes les plus récentes après `cursor`."""
+        with self._lock:
+            # Index vide : le curseur est tout de même vérifié
+            index = self._user_orders.get(user_id, RecencyIndex())
+            ids, next_cursor = index.page(limit, cursor)
+            return Page(items=self._order_copies(ids), next_cursor=next_cursor)
+
+    def get_sales_report(
+        self, days: int = SALES_DAYS, top: int = TOP_PRODUCTS
+    ) -> SalesReport:
+        """Ventes des `days` derniers jours et meilleurs produits."""
+        with self._lock:
+            return self._sales.report(days, top)
+
+    def rebuild_sales_rollups(self) -> None:
+        """Recalcule les statistiques de ventes depuis toutes les commandes."""
+        with self._lock:
+            self._sales = SalesRollups()
+            for order_id in sorted(self._orders):
+                order = self._orders[order_id]
+                self._sales.add(order, self._categories_of(order))
+
+    # Avis
+
+    def add_review(self, review: Review) -> int:
+        """Ajoute un avis et met à jour la note moyenne du produit."""
+        check_review(review)
+
+        with self._lock:
+            product = self._products.get(review.product_id)
+            if product is None:
+                raise ValueError(f"Produit inconnu: {review.product_id}")
+            rating_sum = self._rating_sums[product.id] + review.rating
+            self._rating_sums[product.id] = rating_sum
+            product.reviews_count += 1
+            product.rating = round(rating_sum / product.reviews_count, 2)
+
+            stored = replace(
+                review,
+                id=next(self._sequences["reviews"]),
+                created_at=truncate_seconds(review.created_at),
+            )
+            self._reviews[stored.id] = stored
+            self._product_reviews.setdefault(stored.product_id, RecencyIndex()).add(
+                stored.created_at, stored.id
+            )
+
+        self._catalog_changed([review.product_id])
+        self._facets_changed([review.product_id])
+        return stored.id
+
+    def get_reviews(
+        self, product_id: int, limit: int = 20, cursor: str | None = None
+    ) -> Page[Review]:
+        """Récupère une page des avis d'un produit, du plus récent au plus ancien."""
+        with self._lock:
+            # Index vide : le curseur est tout de même vérifié
+            index = self._product_reviews.get(product_id, RecencyIndex())
+            ids, next_cursor = index.page(limit, cursor)
+            return Page(
+                items=[self._reviews[review_id] for review_id in ids],
+                next_cursor=next_cursor,
+            )
@@ -0,0 +1,418 @@
+"""
+Migrations de schéma versionnées pour Shopify
+Chaque migration est appliquée une seule fois, dans l'ordre, au démarrage
+"""
+
+import sqlite3
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+
+from shopify.analytics import create_sales_rollups
+from shopify.connection import immediate_transaction
+
+
+@dataclass(frozen=True)
+class Migration:
+    """Étape de migration du schéma."""
+
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def _create_base_schema(conn: sqlite3.Connection) -> None:
+    """Crée les tables d'origine (sans effet sur une base existante)."""
+    # Table des produits
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            price REAL NOT NULL,
+            image_url TEXT NOT NULL,
+            category TEXT NOT NULL,
+            stock INTEGER NOT NULL,
+            rating REAL DEFAULT 0.0,
+            reviews_count INTEGER DEFAULT 0,
+            created_at TEXT NOT NULL
+        )
+    """
+    )
+
+    # Table des utilisateurs
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            role TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    """
+    )
+
+    # Table des commandes
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            total REAL NOT NULL,
+            status TEXT NOT NULL,
+            shipping_address TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """
+    )
+
+    # Table des articles de commande
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            product_name TEXT NOT NULL,
+            product_price REAL NOT NULL,
+            product_image TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            FOREIGN KEY (order_id) REFERENCES orders (id),
+            FOREIGN KEY (product_id) REFERENCES products (id)
+        )
+    """
+    )
+
+    # Table des avis
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS reviews (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            user_name TEXT NOT NULL,
+            rating INTEGER NOT NULL,
+            comment TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY (product_id) REFERENCES products (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """
+    )
+
+
+def _add_query_indexes(conn: sqlite3.Connection) -> None:
+    """Ajoute les index correspondant aux requêtes du catalogue et des commandes."""
+    # Catalogue trié par date (le rowid termine l'index : départage par id)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_products_created ON products (created_at)"
+    )
+    # Filtre par catégorie + tri par date
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_products_category_created "
+        "ON products (category, created_at)"
+    )
+    # Historique des commandes d'un utilisateur
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_orders_user_created "
+        "ON orders (user_id, created_at)"
+    )
+    # Articles d'une commande
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id)"
+    )
+    # Avis d'un produit, du plus récent au plus ancien
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_reviews_product_created "
+        "ON reviews (product_id, created_at)"
+    )
+
+
+def has_fts5(conn: sqlite3.Connection) -> bool:
+    """Vérifie que la version de SQLite embarque FTS5."""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp.fts5_probe")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def _create_product_search_triggers(conn: sqlite3.Connection) -> None:
+    """Triggers qui répercutent les écritures de `products` dans products_fts."""
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products
+        BEGIN
+            INSERT INTO products_fts (rowid, name, description, category)
+            VALUES (new.id, new.name, new.description, new.category);
+        END
+    """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products
+        BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, description, category)
+            VALUES ('delete', old.id, old.name, old.description, old.category);
+        END
+    """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS products_fts_update
+        AFTER UPDATE OF name, description, category ON products
+        BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, description, category)
+            VALUES ('delete', old.id, old.name, old.description, old.category);
+            INSERT INTO products_fts (rowid, name, description, category)
+            VALUES (new.id, new.name, new.description, new.category);
+        END
+    """
+    )
+
+
+def create_product_search_index(conn: sqlite3.Connection) -> None:
+    """Crée l'index plein texte des produits et ses triggers de synchronisation."""
+    if not has_fts5(conn):
+        # Sans FTS5, la recherche retombe sur LIKE (voir Database.search_products)
+        return
+
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+            name,
+            description,
+            category,
+            content='products',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """
+    )
+    _create_product_search_triggers(conn)
+    conn.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+
+
+def _rebuild_table(
+    conn: sqlite3.Connection, table: str, create_sql: str, select_sql: str
+) -> None:
+    """Recrée `table` avec un nouveau schéma en y recopiant ses lignes."""
+    conn.execute(create_sql.format(table=f"{table}_new"))
+    conn.execute(f"INSERT INTO {table}_new {select_sql}")
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
+
+def _epoch_timestamps(conn: sqlite3.Connection) -> None:
+    """Stocke les dates des produits, commandes et avis en secondes epoch."""
+    # ISO 8601 -> secondes epoch (la date naïve est lue comme UTC, sans décalage) ;
+    # une date illisible (NULL) prend la date de migration plutôt que de faire
+    # échouer la contrainte NOT NULL et toute la migration
+    epoch = (
+        "COALESCE(CAST(strftime('%s', {column}) AS INTEGER), "
+        "CAST(strftime('%s', 'now') AS INTEGER))"
+    )
+
+    _rebuild_table(
+        conn,
+        "products",
+        """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            price REAL NOT NULL,
+            image_url TEXT NOT NULL,
+            category TEXT NOT NULL,
+            stock INTEGER NOT NULL,
+            rating REAL DEFAULT 0.0,
+            reviews_count INTEGER DEFAULT 0,
+            created_at INTEGER NOT NULL
+        )
+    """,
+        "SELECT id, name, description, price, image_url, category, stock, rating, "
+        f"reviews_count, {epoch.format(column='created_at')} FROM products",
+    )
+    _rebuild_table(
+        conn,
+        "orders",
+        """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            total REAL NOT NULL,
+            status TEXT NOT NULL,
+            shipping_address TEXT NOT NULL,
+            created_at INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """,
+        "SELECT id, user_id, total, status, shipping_address, "
+        f"{epoch.format(column='created_at')}, {epoch.format(column='updated_at')} "
+        "FROM orders",
+    )
+    _rebuild_table(
+        conn,
+        "reviews",
+        """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            user_name TEXT NOT NULL,
+            rating INTEGER NOT NULL,
+            comment TEXT NOT NULL,
+            created_at INTEGER NOT NULL,
+            FOREIGN KEY (product_id) REFERENCES products (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """,
+        "SELECT id, product_id, user_id, user_name, rating, comment, "
+        f"{epoch.format(column='created_at')} FROM reviews",
+    )
+
+    # DROP TABLE a supprimé les index et triggers : on les recrée
+    _add_query_indexes(conn)
+    has_search_index = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'products_fts'"
+    ).fetchone()
+    if has_search_index:
+        _create_product_search_triggers(conn)
+
+
+def _add_rating_sums(conn: sqlite3.Connection) -> None:
+    """Somme des notes par produit : la moyenne se met à jour sans relire les avis."""
+    conn.execute("ALTER TABLE products ADD COLUMN rating_sum REAL NOT NULL DEFAULT 0")
+    # Les notes de départ (rating, reviews_count) servent de base aux agrégats
+    conn.execute("UPDATE products SET rating_sum = rating * reviews_count")
+    # Avis déjà enregistrés mais jamais comptés dans les agrégats
+    conn.execute(
+        """
+        UPDATE products
+        SET rating_sum = rating_sum + (
+                SELECT SUM(rating) FROM reviews WHERE product_id = products.id
+            ),
+            reviews_count = reviews_count + (
+                SELECT COUNT(*) FROM reviews WHERE product_id = products.id
+            )
+        WHERE id IN (SELECT product_id FROM reviews)
+    """
+    )
+    conn.execute(
+        "UPDATE products SET rating = ROUND(rating_sum / reviews_count, 2) "
+        "WHERE reviews_count > 0"
+    )
+
+
+def _add_product_skus(conn: sqlite3.Connection) -> None:
+    """Référence fournisseur des produits, clé des imports de catalogue."""
+    conn.execute("ALTER TABLE products ADD COLUMN sku TEXT")
+    # Index unique : plusieurs produits sans SKU (NULL) restent possibles
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_products_sku ON products (sku)")
+
+
+def _add_facet_indexes(conn: sqlite3.Connection) -> None:
+    """Index de la navigation par facettes (filtres et tris du catalogue)."""
+    # Comptes par facette (index couvrant) et filtre catégorie + tri par prix
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_products_facets "
+        "ON products (category, price, rating, stock)"
+    )
+    # Filtre catégorie + tri par note
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_products_category_rating "
+        "ON products (category, rating)"
+    )
+    # Tout le catalogue trié par prix ou par note
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_products_price ON products (price)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_products_rating ON products (rating)")
+
+
+def _add_catalog_version(conn: sqlite3.Connection) -> None:
+    """Compteur d'écritures du catalogue, incrémenté par triggers sur `products`."""
+    # Contrairement à PRAGMA data_version, les écritures des autres tables
+    # (utilisateurs, commandes, archivage) ne le changent pas
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS catalog_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """
+    )
+    conn.execute("INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS products_catalog_version_{event.lower()}
+            AFTER {event} ON products
+            BEGIN
+                UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+            END
+        """
+        )
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "Schéma initial", _create_base_schema),
+    Migration(2, "Index du catalogue et des commandes", _add_query_indexes),
+    Migration(
+        3, "Recherche plein texte des produits (FTS5)", create_product_search_index
+    ),
+    Migration(4, "Dates en secondes epoch (INTEGER)", _epoch_timestamps),
+    Migration(5, "Somme des notes par produit (avis)", _add_rating_sums),
+    Migration(6, "Tables de cumul des ventes", create_sales_rollups),
+    Migration(7, "Référence fournisseur (SKU) des produits", _add_product_skus),
+    Migration(8, "Index de la navigation par facettes", _add_facet_indexes),
+    Migration(9, "Version du catalogue (triggers sur products)", _add_catalog_version),
+]
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """Retourne la version du schéma (0 pour une base vierge)."""
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return int(row[0]) if row and row[0] is not None else 0
+
+
+def migrate(conn: sqlite3.Connection, migrations: list[Migration] | None = None) -> int:
+    """Applique les migrations en attente et retourne la version finale."""
+    steps = sorted(migrations or MIGRATIONS, key=lambda m: m.version)
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """
+    )
+    conn.commit()
+
+    for migration in steps:
+        if migration.version <= current_version(conn):
+            continue
+
+        # Verrou d'écriture : un seul processus applique chaque étape
+        with immediate_transaction(conn):
+            if migration.version > current_version(conn):
+                migration.apply(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (version, description, applied_at) "
+                    "VALUES (?, ?, ?)",
+                    (
+                        migration.version,
+                        migration.description,
+                        datetime.now().isoformat(),
+                    ),
+                )
+
+    return current_version(conn)
@@ -1,11 +1,20 @@
 """
 Modèles de données pour Shopify
 Tous les modèles sont typés pour passer MyPy
+
+Les modèles chargés en masse (produits, utilisateurs, paniers, commandes,
+avis) utilisent `__slots__` : pas de `__dict__` par instance. Ceux qu'aucun
+code ne modifie après construction sont de plus figés (`frozen`) ; on en
+dérive une copie modifiée avec `dataclasses.replace`.
 """
 
-from dataclasses import dataclass, field
-from datetime import datetime
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime
 from enum import Enum
+from typing import Any, Generic, TypeVar
+
+
+T = TypeVar("T")
 
 
 class OrderStatus(Enum):
@@ -18,6 +27,15 @@ class OrderStatus(Enum):
     CANCELLED = "cancelled"
 
 
+class ProductSort(Enum):
+    """Tri du catalogue filtré."""
+
+    NEWEST = "newest"
+    PRICE_ASC = "price_asc"
+    PRICE_DESC = "price_desc"
+    RATING = "rating"
+
+
 class UserRole(Enum):
     """Rôle d'un utilisateur."""
 
@@ -25,9 +43,9 @@ class UserRole(Enum):
     ADMIN = "admin"
 
 
-@dataclass
+@dataclass(slots=True)
 class Product:
-    """Modèle de produit."""
+    """Modèle de produit (modifiable : stock et note évoluent en mémoire)."""
 
     id: int
     name: str
@@ -39,12 +57,13 @@ class Product:
     rating: float = 0.0
     reviews_count: int = 0
     created_at: datetime = field(default_factory=datetime.now)
+    sku: str | None = None  # référence fournisseur (unique), clé des imports
 
     def is_available(self) -> bool:
         """Vérifie si le produit est disponible."""
         return self.stock > 0
 
-    def to_dict(self) -> dict[str, str | int | float]:
+    def to_dict(self) -> dict[str, str | int | float | None]:
         """Convertit le produit en dictionnaire."""
         return {
             "id": self.id,
@@ -57,10 +76,11 @@ class Product:
             "rating": self.rating,
             "reviews_count": self.reviews_count,
             "created_at": self.created_at.isoformat(),
+            "sku": self.sku,
         }
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class User:
     """Modèle d'utilisateur."""
 
@@ -81,7 +101,7 @@ class User:
         return f"{self.first_name} {self.last_name}"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CartItem:
     """Article dans le panier."""
 
@@ -107,7 +127,7 @@ class CartItem:
         }
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Order:
     """Modèle de commande."""
 
@@ -139,7 +159,7 @@ class Order:
         }
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Review:
     """Avis client sur un produit."""
 
@@ -163,3 +183,141 @@ class Review:
             "created_at": self.created_at.isoformat(),
         }
 
+
+@dataclass
+class SearchHit:
+    """Résultat de recherche : un produit et son extrait surligné."""
+
+    product: Product
+    snippet: str
+
+
+@dataclass(frozen=True)
+class ProductFilters:
+    """Filtres et tri du catalogue (prix minimal inclus, prix maximal exclu)."""
+
+    category: str | None = None
+    min_price: float | None = None
+    max_price: float | None = None
+    min_rating: int | None = None  # 1-4 étoiles et plus
+    in_stock: bool = False
+    sort: ProductSort = ProductSort.NEWEST
+
+    def is_plain(self) -> bool:
+        """Vrai sans autre filtre que la catégorie, trié par date."""
+        return (
+            self.min_price is None
+            and self.max_price is None
+            and self.min_rating is None
+            and not self.in_stock
+            and self.sort is ProductSort.NEWEST
+        )
+
+    def to_args(self) -> dict[str, str]:
+        """Paramètres d'URL des filtres actifs."""
+        args: dict[str, str] = {}
+        if self.category:
+            args["category"] = self.category
+        if self.min_price is not None:
+            args["min_price"] = f"{self.min_price:g}"
+        if self.max_price is not None:
+            args["max_price"] = f"{self.max_price:g}"
+        if self.min_rating is not None:
+            args["min_rating"] = str(self.min_rating)
+        if self.in_stock:
+            args["in_stock"] = "1"
+        if self.sort is not ProductSort.NEWEST:
+            args["sort"] = self.sort.value
+        return args
+
+    def args_with(self, **changes: Any) -> dict[str, str]:
+        """Paramètres d'URL après modification de certains filtres."""
+        return replace(self, **changes).to_args()
+
+
+@dataclass
+class PriceBucket:
+    """Tranche de prix [low, high) et nombre de produits."""
+
+    low: float
+    high: float | None  # None : pas de borne haute
+    count: int
+
+
+@dataclass
+class FacetCounts:
+    """Nombre de produits par valeur de chaque facette.
+
+    Chaque facette est comptée avec tous les filtres sauf le sien, pour que
+    l'on puisse changer de valeur ; les tranches de prix restent dans la
+    fourchette demandée.
+    """
+
+    total: int  # produits correspondant à tous les filtres
+    categories: list[tuple[str, int]]
+    price_buckets: list[PriceBucket]
+    ratings: list[tuple[int, int]]  # (étoiles minimales, nombre)
+    in_stock: int
+
+
+@dataclass
+class Page(Generic[T]):
+    """Page de résultats avec un curseur vers la page suivante."""
+
+    items: list[T]
+    next_cursor: str | None = None
+
+    def has_next(self) -> bool:
+        """Indique s'il reste des résultats après cette page."""
+        return self.next_cursor is not None
+
+
+@dataclass
+class DailySales:
+    """Ventes d'une journée."""
+
+    day: date
+    orders: int
+    units: int
+    revenue: float
+
+
+@dataclass
+class CategorySales:
+    """Ventes d'une catégorie sur une période."""
+
+    category: str
+    units: int
+    revenue: float
+
+
+@dataclass
+class ProductSales:
+    """Ventes cumulées d'un produit."""
+
+    product_id: int
+    product_name: str
+    units: int
+    revenue: float
+
+
+@dataclass
+class SalesReport:
+    """Tableau de bord des ventes : période récente et meilleurs produits."""
+
+    since: date
+    days: list[DailySales]
+    categories: list[CategorySales]
+    top_products: list[ProductSales]
+
+    def total_orders(self) -> int:
+        """Nombre de commandes sur la période."""
+        return sum(day.orders for day in self.days)
+
+    def total_units(self) -> int:
+        """Nombre d'articles vendus sur la période."""
+        return sum(day.units for day in self.days)
+
+    def total_revenue(self) -> float:
+        """Chiffre d'affaires de la période."""
+        return round(sum(day.revenue for day in self.days), 2)
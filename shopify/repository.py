@@ -0,0 +1,165 @@
+"""
+Contrat des moteurs de stockage Shopify
+`Database` (SQLite) et `MemoryDatabase` (dictionnaires en mémoire) l'implémentent
+"""
+
+from collections.abc import Callable, Iterable, Sequence
+from typing import Protocol
+
+from shopify.models import (
+    FacetCounts,
+    Order,
+    Page,
+    Product,
+    ProductFilters,
+    Review,
+    SalesReport,
+    SearchHit,
+    User,
+)
+
+
+class Repository(Protocol):
+    """Opérations sur les produits, utilisateurs, commandes et avis."""
+
+    # Cycle de vie
+
+    def close(self) -> None:
+        """Libère les ressources du moteur."""
+        ...
+
+    def add_catalog_listener(self, listener: Callable[[list[int]], None]) -> None:
+        """Abonne `listener` aux écritures du catalogue (ids des produits modifiés)."""
+        ...
+
+    def add_facet_listener(self, listener: Callable[[list[int]], None]) -> None:
+        """Abonne `listener` aux écritures qui peuvent changer les facettes.
+
+        Prix, note, catégorie, passage du stock à zéro ou nouveaux produits
+        (liste vide) ; une commande qui laisse du stock ne le prévient pas.
+        """
+        ...
+
+    # Produits
+
+    def add_product(self, product: Product) -> int:
+        """Ajoute un produit et retourne son id."""
+        ...
+
+    def add_products_bulk(self, products: Iterable[Product]) -> list[int]:
+        """Ajoute des produits et retourne leurs ids, dans l'ordre fourni."""
+        ...
+
+    def upsert_products(self, products: Iterable[Product]) -> tuple[int, int]:
+        """Ajoute ou met à jour des produits par SKU ; (ajoutés, mis à jour)."""
+        ...
+
+    def get_all_products(self) -> list[Product]:
+        """Tous les produits, du plus récent au plus ancien."""
+        ...
+
+    def get_product_by_id(self, product_id: int) -> Product | None:
+        """Un produit par son id."""
+        ...
+
+    def get_products_by_ids(self, product_ids: Sequence[int]) -> list[Product]:
+        """Les produits existants parmi `product_ids`, dans l'ordre demandé."""
+        ...
+
+    def get_products_by_category(self, category: str) -> list[Product]:
+        """Les produits d'une catégorie, du plus récent au plus ancien."""
+        ...
+
+    def count_products(self) -> int:
+        """Nombre total de produits."""
+        ...
+
+    def get_products_page(
+        self, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Une page du catalogue (description tronquée)."""
+        ...
+
+    def get_products_by_category_page(
+        self, category: str, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Une page des produits d'une catégorie."""
+        ...
+
+    def get_filtered_products_page(
+        self, filters: ProductFilters, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Une page du catalogue filtré et trié."""
+        ...
+
+    def get_facet_counts(self, filters: ProductFilters) -> FacetCounts:
+        """Nombre de produits par valeur de chaque facette."""
+        ...
+
+    def search_products(self, query: str) -> list[Product]:
+        """Produits dont le nom, la description ou la catégorie correspondent."""
+        ...
+
+    def search_products_with_snippets(self, query: str) -> list[SearchHit]:
+        """Résultats de recherche avec extraits surlignés."""
+        ...
+
+    def search_products_page(
+        self, query: str, limit: int = 24, cursor: str | None = None
+    ) -> Page[SearchHit]:
+        """Une page de résultats de recherche."""
+        ...
+
+    # Utilisateurs
+
+    def add_user(self, user: User) -> int:
+        """Ajoute un utilisateur (email unique) et retourne son id."""
+        ...
+
+    def add_users_bulk(self, users: Iterable[User]) -> list[int]:
+        """Ajoute des utilisateurs et retourne leurs ids."""
+        ...
+
+    def get_user_by_email(self, email: str) -> User | None:
+        """Un utilisateur par email."""
+        ...
+
+    # Commandes
+
+    def create_order(self, order: Order) -> int:
+        """Enregistre une commande sans toucher au stock."""
+        ...
+
+    def place_order(self, order: Order) -> int:
+        """Enregistre une commande en décrémentant le stock (OutOfStockError)."""
+        ...
+
+    def get_user_orders(self, user_id: int) -> list[Order]:
+        """Les commandes d'un utilisateur, de la plus récente à la plus ancienne."""
+        ...
+
+    def get_user_orders_page(
+        self, user_id: int, limit: int = 20, cursor: str | None = None
+    ) -> Page[Order]:
+        """Une page des commandes d'un utilisateur."""
+        ...
+
+    def get_sales_report(self, days: int = 30, top: int = 10) -> SalesReport:
+        """Ventes des `days` derniers jours et `top` meilleurs produits."""
+        ...
+
+    def rebuild_sales_rollups(self) -> None:
+        """Recalcule les statistiques de ventes depuis tout l'historique."""
+        ...
+
+    # Avis
+
+    def add_review(self, review: Review) -> int:
+        """Ajoute un avis, met à jour la note du produit et retourne l'id de l'avis."""
+        ...
+
+    def get_reviews(
+        self, product_id: int, limit: int = 20, cursor: str | None = None
+    ) -> Page[Review]:
+        """Une page des avis d'un produit, du plus récent au plus ancien."""
+        ...
@@ -0,0 +1,369 @@
+"""
+Instantané en mémoire du catalogue Shopify
+Lectures sans verrou ni SQL sur une copie immuable, reconstruite en arrière-plan
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from bisect import insort
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, replace
+from typing import Any
+
+from shopify.database import IN_BATCH_SIZE, Database, catalog_version
+from shopify.keyset import SortKey, keyset_page, recency_key
+from shopify.mapping import (
+    LIST_DESCRIPTION_LENGTH,
+    PRODUCT_CREATED_AT,
+    PRODUCT_DESCRIPTION,
+    PRODUCT_DETAIL,
+    PRODUCT_ID,
+    fetch_rows,
+    product_from_row,
+)
+from shopify.models import Page, Product
+
+
+logger = logging.getLogger(__name__)
+
+
+def listing_view(product: Product) -> Product:
+    """Version « liste » d'un produit (description tronquée comme PRODUCT_LIST)."""
+    if len(product.description) <= LIST_DESCRIPTION_LENGTH:
+        return product
+    return replace(product, description=product.description[:LIST_DESCRIPTION_LENGTH])
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Catalogue figé, partagé entre threads : ni lui ni ses produits ne changent.
+
+    Une écriture produit un nouvel instantané ; les lecteurs en cours gardent
+    l'ancien jusqu'à la fin de leur lecture.
+    """
+
+    products: Mapping[int, Product]
+    listing: Mapping[int, Product]
+    keys: tuple[SortKey, ...]  # tout le catalogue, du plus récent au plus ancien
+    category_keys: Mapping[str, tuple[SortKey, ...]]
+    catalog_version: int
+    built_at: float
+
+    @classmethod
+    def from_rows(
+        cls, rows: Sequence[Sequence[Any]], version: int
+    ) -> "CatalogSnapshot":
+        """Construit un instantané depuis des lignes PRODUCT_DETAIL."""
+        products: dict[int, Product] = {}
+        listing: dict[int, Product] = {}
+        category_of: dict[int, str] = {}
+        keys: list[SortKey] = []
+        for row in rows:
+            product = product_from_row(row)
+            products[product.id] = product
+            description = row[PRODUCT_DESCRIPTION]
+            listing[product.id] = (
+                product
+                if len(description) <= LIST_DESCRIPTION_LENGTH
+                else product_from_row(
+                    (
+                        *row[:PRODUCT_DESCRIPTION],
+                        description[:LIST_DESCRIPTION_LENGTH],
+                        *row[PRODUCT_DESCRIPTION + 1 :],
+                    )
+                )
+            )
+            category_of[product.id] = product.category
+            keys.append((-row[PRODUCT_CREATED_AT], -row[PRODUCT_ID]))
+        keys.sort()
+
+        # Parcours dans l'ordre global : chaque liste de catégorie est déjà triée
+        category_keys: dict[str, list[SortKey]] = {}
+        for key in keys:
+            category_keys.setdefault(category_of[-key[1]], []).append(key)
+
+        return cls(
+            products=products,
+            listing=listing,
+            keys=tuple(keys),
+            category_keys={c: tuple(k) for c, k in category_keys.items()},
+            catalog_version=version,
+            built_at=time.time(),
+        )
+
+    def with_products(
+        self, products: Sequence[Product], version: int
+    ) -> "CatalogSnapshot | None":
+        """Copie mise à jour avec des produits modifiés ou nouveaux.
+
+        Retourne None si un produit existant a changé de catégorie ou de date :
+        il faut alors tout reconstruire.
+        """
+        updated = dict(self.products)
+        listing = dict(self.listing)
+        keys: list[SortKey] | None = None
+        category_keys = dict(self.category_keys)
+
+        for product in products:
+            current = self.products.get(product.id)
+            if current is None:
+                key = recency_key(product.created_at, product.id)
+                if keys is None:
+                    keys = list(self.keys)
+                insort(keys, key)
+                in_category = list(category_keys.get(product.category, ()))
+                insort(in_category, key)
+                category_keys[product.category] = tuple(in_category)
+            elif (
+                current.category != product.category
+                or current.created_at != product.created_at
+            ):
+                return None
+            updated[product.id] = product
+            listing[product.id] = listing_view(product)
+
+        return CatalogSnapshot(
+            products=updated,
+            listing=listing,
+            keys=self.keys if keys is None else tuple(keys),
+            category_keys=category_keys,
+            catalog_version=version,
+            built_at=time.time(),
+        )
+
+    def page(
+        self, keys: Sequence[SortKey], limit: int, cursor: str | None
+    ) -> Page[Product]:
+        """Page de produits (vue liste) parmi `keys`, curseur de `Database`."""
+        ids, next_cursor = keyset_page(keys, limit, cursor)
+        listing = self.listing
+        return Page(items=[listing[pid] for pid in ids], next_cursor=next_cursor)
+
+
+@dataclass
+class SnapshotStats:
+    """Compteurs de reconstruction de l'instantané."""
+
+    full_builds: int = 0
+    patches: int = 0
+    failures: int = 0
+    last_build_ms: float = 0.0
+
+
+class SnapshotCatalog:
+    """Lectures du catalogue servies par un `CatalogSnapshot` devant `Database`.
+
+    Les écritures de ce processus (listeners de `Database`) et celles des autres
+    processus (détectées par la version du catalogue, voir `catalog_version`)
+    déclenchent la construction d'un nouvel instantané sur un thread dédié,
+    puis un simple échange de référence. Les produits retournés sont partagés :
+    ne pas les modifier.
+    """
+
+    def __init__(self, db: Database, poll_interval: float = 1.0) -> None:
+        """Construit le premier instantané et démarre le thread de mise à jour."""
+        self.db = db
+        self.poll_interval = poll_interval
+        self.stats_counters = SnapshotStats()
+        # Connexion dédiée à la relecture du catalogue
+        self._conn = db.connections.connect()
+        self._build_lock = threading.Lock()
+        self._state = threading.Condition()
+        self._pending: set[int] | None = set()  # None : reconstruction complète
+        self._pending_bumps = 0  # incréments de version attendus pour `_pending`
+        self._requested = 0  # écritures signalées
+        self._applied = 0  # écritures prises en compte par l'instantané
+        self._closed = False
+
+        with self._build_lock:
+            self.snapshot = self._full_build()
+        db.add_catalog_listener(self._on_write)
+        self._thread = threading.Thread(
+            target=self._run, name="shopify-catalog-snapshot", daemon=True
+        )
+        self._thread.start()
+
+    # Lectures (sans verrou : une seule lecture de self.snapshot par appel)
+
+    def get_product_by_id(self, product_id: int) -> Product | None:
+        """Récupère un produit."""
+        return self.snapshot.products.get(product_id)
+
+    def get_all_products(self) -> list[Product]:
+        """Tous les produits, du plus récent au plus ancien."""
+        snapshot = self.snapshot
+        return [snapshot.products[-key[1]] for key in snapshot.keys]
+
+    def get_products_by_category(self, category: str) -> list[Product]:
+        """Les produits d'une catégorie, du plus récent au plus ancien."""
+        snapshot = self.snapshot
+        keys = snapshot.category_keys.get(category, ())
+        return [snapshot.products[-key[1]] for key in keys]
+
+    def count_products(self) -> int:
+        """Nombre de produits."""
+        return len(self.snapshot.products)
+
+    def get_products_page(
+        self, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Une page du catalogue."""
+        snapshot = self.snapshot
+        return snapshot.page(snapshot.keys, limit, cursor)
+
+    def get_products_by_category_page(
+        self, category: str, limit: int = 24, cursor: str | None = None
+    ) -> Page[Product]:
+        """Une page d'une catégorie."""
+        snapshot = self.snapshot
+        return snapshot.page(snapshot.category_keys.get(category, ()), limit, cursor)
+
+    # Mise à jour
+
+    def _on_write(self, product_ids: list[int]) -> None:
+        """Listener de `Database` : note les produits à relire et réveille le thread."""
+        with self._state:
+            if not product_ids:
+                self._pending = None
+            elif self._pending is not None:
+                self._pending.update(product_ids)
+            # Les triggers incrémentent la version une fois par ligne écrite
+            self._pending_bumps += len(product_ids)
+            self._requested += 1
+            self._state.notify_all()
+
+    def wait_for_refresh(self, timeout: float = 1.0) -> bool:
+        """Attend que les écritures déjà signalées soient visibles dans l'instantané.
+
+        Permet à un écrivain de relire ses propres écritures ; retourne False si
+        le délai expire.
+        """
+        with self._state:
+            target = self._requested
+            return self._state.wait_for(lambda: self._applied >= target, timeout)
+
+    def refresh(self) -> None:
+        """Reconstruit immédiatement l'instantané complet."""
+        with self._state:
+            target = self._requested
+            self._pending, self._pending_bumps = set(), 0
+        self._apply(None)
+        self._mark_applied(target)
+
+    def close(self) -> None:
+        """Arrête le thread de mise à jour et ferme la connexion dédiée."""
+        with self._state:
+            self._closed = True
+            self._state.notify_all()
+        self._thread.join(timeout=5)
+        self._conn.close()
+
+    def _mark_applied(self, target: int) -> None:
+        """Signale aux threads en attente que l'instantané est à jour."""
+        with self._state:
+            self._applied = max(self._applied, target)
+            self._state.notify_all()
+
+    def _run(self) -> None:
+        """Boucle du thread : écritures signalées, sinon scrutation de la version."""
+        while True:
+            with self._state:
+                self._state.wait_for(
+                    lambda: self._closed or self._requested > self._applied,
+                    self.poll_interval,
+                )
+                if self._closed:
+                    return
+                pending, self._pending = self._pending, set()
+                bumps, self._pending_bumps = self._pending_bumps, 0
+                target = self._requested
+
+            try:
+                if pending is None or pending:
+                    self._apply(pending, bumps)
+                elif self._catalog_version() != self.snapshot.catalog_version:
+                    # Écriture d'un autre processus : on ne sait pas quoi relire
+                    self._apply(None)
+            except sqlite3.Error:
+                self.stats_counters.failures += 1
+                logger.exception("Échec de la mise à jour de l'instantané du catalogue")
+            self._mark_applied(target)
+
+    def _apply(self, product_ids: set[int] | None, bumps: int = 0) -> None:
+        """Remplace l'instantané (par patch si possible, sinon complet).
+
+        `bumps` : incréments de version produits par les écritures de `product_ids`.
+        """
+        with self._build_lock:
+            if product_ids:
+                patched = self._patch(sorted(product_ids), bumps)
+                if patched is not None:
+                    self.snapshot = patched
+                    return
+            self.snapshot = self._full_build()
+
+    def _catalog_version(self) -> int:
+        """Version du catalogue en base (écritures de `products` uniquement)."""
+        with self._build_lock:
+            return catalog_version(self._conn)
+
+    def _full_build(self) -> CatalogSnapshot:
+        """Relit tout le catalogue (verrou de construction déjà pris)."""
+        start = time.perf_counter()
+        # Version lue avant les lignes : au pire une reconstruction de trop
+        version = catalog_version(self._conn)
+        rows = fetch_rows(self._conn, f"SELECT {PRODUCT_DETAIL.select()} FROM products")
+        snapshot = CatalogSnapshot.from_rows(rows, version)
+        self.stats_counters.full_builds += 1
+        self.stats_counters.last_build_ms = (time.perf_counter() - start) * 1000
+        return snapshot
+
+    def _patch(self, product_ids: list[int], bumps: int) -> CatalogSnapshot | None:
+        """Relit quelques produits et les applique à une copie de l'instantané.
+
+        Retourne None si la version en base a avancé plus que les `bumps`
+        attendus des écritures locales : un autre processus a écrit, on ne sait
+        pas quoi relire.
+        """
+        start = time.perf_counter()
+        rows: list[tuple[Any, ...]] = []
+        version = self.snapshot.catalog_version + bumps
+        if catalog_version(self._conn) != version:
+            return None
+        for offset in range(0, len(product_ids), IN_BATCH_SIZE):
+            batch = product_ids[offset : offset + IN_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            rows += fetch_rows(
+                self._conn,
+                f"SELECT {PRODUCT_DETAIL.select()} FROM products "
+                f"WHERE id IN ({placeholders})",
+                batch,
+            )
+
+        if len(rows) != len(product_ids):
+            return None  # produit supprimé : reconstruction complète
+        snapshot = self.snapshot.with_products(
+            [product_from_row(row) for row in rows], version
+        )
+        if snapshot is not None:
+            self.stats_counters.patches += 1
+            self.stats_counters.last_build_ms = (time.perf_counter() - start) * 1000
+        return snapshot
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        """État de l'instantané et compteurs de reconstruction."""
+        snapshot = self.snapshot
+        return {
+            "snapshot": {
+                "products": len(snapshot.products),
+                "categories": len(snapshot.category_keys),
+                "catalog_version": snapshot.catalog_version,
+                "age_s": round(time.time() - snapshot.built_at, 3),
+                "full_builds": self.stats_counters.full_builds,
+                "patches": self.stats_counters.patches,
+                "failures": self.stats_counters.failures,
+                "last_build_ms": round(self.stats_counters.last_build_ms, 3),
+            }
+        }
@@ -0,0 +1,69 @@
+"""
+Configuration commune des tests
+"""
+
+import asyncio
+import inspect
+import os
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any, cast
+
+import pytest
+
+from shopify.async_database import AsyncDatabase
+from shopify.database import Database
+from shopify.memory import MemoryDatabase
+from shopify.repository import Repository
+from tests.factories import make_product
+
+
+# L'application crée sa base à l'import : en mémoire, jamais shopify/shopify.db
+os.environ.setdefault("SHOPIFY_BACKEND", "memory")
+
+
+class BlockingAsyncDatabase:
+    """`AsyncDatabase` utilisée comme un `Repository` : chaque coroutine est attendue."""
+
+    def __init__(self, db: Repository) -> None:
+        """Enveloppe `db` dans la façade asynchrone."""
+        self.facade = AsyncDatabase(db)
+
+    def __getattr__(self, name: str) -> Any:
+        """Méthode de la façade ; les coroutines tournent jusqu'à leur résultat."""
+        method = getattr(self.facade, name)
+        if not inspect.iscoroutinefunction(method):
+            return method
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            return asyncio.run(method(*args, **kwargs))
+
+        return call
+
+    def close(self) -> None:
+        """Arrête les threads de la façade puis ferme le moteur."""
+        asyncio.run(self.facade.close())
+        self.facade.db.close()
+
+
+ENGINES: dict[str, Callable[[Path], Repository]] = {
+    "sqlite": lambda tmp_path: Database(str(tmp_path / "shop.db")),
+    "memory": lambda tmp_path: MemoryDatabase(),
+    "async": lambda tmp_path: cast(
+        Repository, BlockingAsyncDatabase(Database(str(tmp_path / "shop.db")))
+    ),
+}
+
+
+@pytest.fixture(params=list(ENGINES))
+def repo(request: pytest.FixtureRequest, tmp_path: Path) -> Iterator[Repository]:
+    """Moteur vide : SQLite migrée, mémoire, ou SQLite derrière `AsyncDatabase`."""
+    database = ENGINES[request.param](tmp_path)
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def catalog(repo: Repository) -> list[int]:
+    """30 produits (ids dans l'ordre d'insertion)."""
+    return repo.add_products_bulk(make_product(index) for index in range(30))
@@ -0,0 +1,46 @@
+"""
+Données de test déterministes : produits, clients et commandes
+"""
+
+from datetime import datetime, timedelta
+
+from shopify.models import CartItem, Order, OrderStatus, Product, User, UserRole
+
+
+CATEGORIES = ("Mode", "Sport", "Maison")
+# Microsecondes : produits, commandes et avis sont gardés à la seconde
+BASE = datetime(2024, 3, 1, 12, 0, 0, 654_321)
+
+
+def make_product(index: int, **fields: object) -> Product:
+    """Produit déterministe ; les dates avancent d'une seconde tous les 2 produits."""
+    product = Product(
+        id=0,
+        name=f"Produit {index}",
+        description=f"Description détaillée du produit numéro {index}. " * 5,
+        price=round(5 + (index * 7.31) % 195, 2),
+        image_url=f"https://example.com/images/{index}.jpg",
+        category=CATEGORIES[index % len(CATEGORIES)],
+        stock=10,
+        created_at=BASE + timedelta(seconds=index // 2),
+        sku=f"SKU-{index}",
+    )
+    for name, value in fields.items():
+        setattr(product, name, value)
+    return product
+
+
+def make_user(email: str = "client@example.com") -> User:
+    """Client de test."""
+    return User(0, email, "hash", "Cli", "Ent", UserRole.CUSTOMER, BASE)
+
+
+def make_order(user_id: int, *items: tuple[int, int], seconds: int = 0) -> Order:
+    """Commande payée de `(produit, quantité)`."""
+    cart = [
+        CartItem(product_id, f"Produit {product_id}", 2.5, "image.jpg", quantity)
+        for product_id, quantity in items
+    ]
+    created_at = BASE + timedelta(seconds=seconds)
+    total = sum(item.product_price * item.quantity for item in cart)
+    return Order(0, user_id, cart, total, OrderStatus.PAID, "Adresse", created_at)
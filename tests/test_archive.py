@@ -0,0 +1,48 @@
+"""
+Archive des commandes : lectures et ventes identiques avant et après archivage
+"""
+
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from shopify.database import Database
+from tests.factories import BASE, make_order, make_product, make_user
+
+
+@pytest.fixture
+def db(tmp_path: Path) -> Iterator[Database]:
+    """Base SQLite et son archive, 5 produits."""
+    database = Database(str(tmp_path / "shop.db"))
+    database.add_products_bulk(make_product(index) for index in range(5))
+    yield database
+    database.close()
+
+
+def test_archived_orders_round_trip(db: Database) -> None:
+    """Commandes anciennes déplacées : historique, pages et ventes inchangés."""
+    user_id = db.add_user(make_user())
+    recent = int((datetime.now() - BASE).total_seconds()) - 60
+    for seconds, product_id in ((0, 1), (60, 2), (recent, 3)):
+        db.place_order(make_order(user_id, (product_id, 2), seconds=seconds))
+    days = (datetime.now() - BASE).days + 5
+    orders = db.get_user_orders(user_id)
+    report = db.get_sales_report(days=days)
+
+    assert db.archive_orders() == 2
+    with db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM main.orders").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM archive.orders").fetchone()[0] == 2
+    assert db.archive_orders() == 0
+
+    assert db.get_user_orders(user_id) == orders
+    first = db.get_user_orders_page(user_id, 2)
+    assert first.next_cursor is not None
+    rest = db.get_user_orders_page(user_id, 2, first.next_cursor)
+    assert first.items + rest.items == orders
+    # Les cumuls recalculés lisent la base et l'archive
+    db.rebuild_sales_rollups()
+    assert db.get_sales_report(days=days) == report
+    assert report.total_orders() == 3
@@ -0,0 +1,54 @@
+"""
+Sauvegarde en ligne : la base et l'archive restaurées relisent les mêmes données
+"""
+
+import gzip
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from shopify.backup import BackupSettings, backup_database
+from shopify.database import Database
+from tests.factories import BASE, make_order, make_product, make_user
+
+
+@pytest.mark.parametrize("compress", [False, True], ids=["db", "gzip"])
+def test_backup_restores_database_and_archive(tmp_path: Path, compress: bool) -> None:
+    """Copie pas à pas (éventuellement compressée) : base et archive restaurées."""
+    db = Database(str(tmp_path / "shop.db"))
+    try:
+        product_ids = db.add_products_bulk(make_product(index) for index in range(200))
+        user_id = db.add_user(make_user())
+        for product_id in product_ids[:3]:
+            db.place_order(make_order(user_id, (product_id, 1)))
+        assert db.archive_orders() == 3  # commandes de 2024 : archivées
+        recent = int((datetime.now() - BASE).total_seconds())
+        db.place_order(make_order(user_id, (product_ids[3], 1), seconds=recent))
+        settings = BackupSettings(
+            str(tmp_path / "backups"), pages_per_step=1, pause=0, compress=compress
+        )
+
+        result = backup_database(db, settings)
+
+        assert result.steps > 2  # une page par pas
+        products = db.get_all_products()
+        orders = db.get_user_orders(user_id)
+    finally:
+        db.close()
+
+    main, archive = (Path(name) for name in result.files)
+    assert main.name.endswith(".db.gz" if compress else ".db")
+    restored = tmp_path / "restored"
+    restored.mkdir()
+    for source, name in ((main, "shop.db"), (archive, "shop-archive.db")):
+        data = source.read_bytes()
+        (restored / name).write_bytes(gzip.decompress(data) if compress else data)
+
+    copy = Database(str(restored / "shop.db"))
+    try:
+        assert copy.get_all_products() == products
+        assert copy.get_user_orders(user_id) == orders
+        assert len(orders) == 4
+    finally:
+        copy.close()
@@ -0,0 +1,81 @@
+"""
+Caches de lecture du catalogue : invalidation par les écritures de la base
+"""
+
+import json
+import threading
+
+import pytest
+
+from shopify.cache import CatalogCache, ProductJSONCache
+from shopify.mapping import LIST_DESCRIPTION_LENGTH
+from shopify.memory import MemoryDatabase
+from shopify.models import ProductFilters
+from shopify.repository import Repository
+from tests.factories import make_product
+
+
+def test_mixed_upsert_invalidates_updated_products(
+    repo: Repository, catalog: list[int]
+) -> None:
+    """Un lot d'upsert mêlant ajouts et mises à jour invalide les produits modifiés."""
+    cache = CatalogCache(repo)
+    api = ProductJSONCache(repo)
+    cached = cache.get_product_by_id(catalog[0])
+    assert cached is not None and cached.price != 99.0
+    assert api.product(catalog[0]) is not None
+    page = cache.get_products_page(50)
+
+    added, updated = repo.upsert_products(
+        [make_product(0, price=99.0), make_product(100)]
+    )
+
+    assert (added, updated) == (1, 1)
+    product = cache.get_product_by_id(catalog[0])
+    assert product is not None and product.price == 99.0
+    body = api.product(catalog[0])
+    assert body is not None and b'"price":99.0' in body.body
+    # Nouveau produit : les pages sont relues
+    assert len(cache.get_products_page(50).items) == len(page.items) + 1
+
+
+def test_json_pages_name_the_description_excerpt(
+    repo: Repository, catalog: list[int]
+) -> None:
+    """Pages : extrait sous `description_excerpt` ; fiche : description complète."""
+    api = ProductJSONCache(repo)
+    page = json.loads(api.page(ProductFilters(), 5, None).body)
+    item = page["items"][0]
+    assert "description" not in item
+    assert len(item["description_excerpt"]) == LIST_DESCRIPTION_LENGTH
+    detail = api.product(item["id"])
+    assert detail is not None
+    assert json.loads(detail.body)["description"].startswith(
+        item["description_excerpt"]
+    )
+
+
+def test_write_between_version_check_and_put_is_not_cached(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Une écriture qui invalide pendant l'ajout au cache n'y laisse pas l'ancien produit."""
+    repo = MemoryDatabase()
+    [product_id] = repo.add_products_bulk([make_product(0)])
+    cache = CatalogCache(repo)
+    put = cache.products.put
+    writer = threading.Thread(
+        target=repo.upsert_products, args=([make_product(0, price=99.0)],)
+    )
+
+    def put_during_write(key: int, value: object) -> None:
+        writer.start()
+        writer.join(timeout=0.2)  # bloquée par le cache si la garde est correcte
+        put(key, value)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(cache.products, "put", put_during_write)
+    cache.get_product_by_id(product_id)
+    writer.join()
+    monkeypatch.undo()
+
+    product = cache.get_product_by_id(product_id)
+    assert product is not None and product.price == 99.0
@@ -0,0 +1,104 @@
+"""
+Index en colonnes du catalogue (NumPy) : mêmes pages et comptes que SQLite
+"""
+
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from shopify.columnar import NUMPY_AVAILABLE, ColumnarCatalog, ColumnarIndex
+from shopify.database import Database, encode_cursor
+from shopify.models import ProductFilters, ProductSort, Review
+from tests.factories import make_product
+
+
+pytestmark = pytest.mark.skipif(not NUMPY_AVAILABLE, reason="NumPy non installé")
+
+
+@pytest.fixture
+def db(tmp_path: Path) -> Iterator[Database]:
+    """Base SQLite de 60 produits."""
+    database = Database(str(tmp_path / "shop.db"))
+    database.add_products_bulk(make_product(index) for index in range(60))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def columnar(db: Database) -> Iterator[ColumnarCatalog]:
+    """Index construit par son thread."""
+    catalog = ColumnarCatalog(db, poll_interval=0.05)
+    assert catalog.wait_for_refresh()
+    yield catalog
+    catalog.close()
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        encode_cursor("12.5", 3),
+        encode_cursor(12.5, "3"),
+        encode_cursor(12.5, 3.5),
+        encode_cursor(12.5),
+    ],
+)
+def test_tampered_cursor_raises_value_error(
+    columnar: ColumnarCatalog, cursor: str
+) -> None:
+    """Un curseur qui n'est pas (nombre, id) lève ValueError (400), pas TypeError."""
+    for sort in ProductSort:
+        with pytest.raises(ValueError):
+            columnar.get_filtered_products_page(ProductFilters(sort=sort), 5, cursor)
+
+
+def test_failed_build_falls_back_to_database(
+    db: Database, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Une construction qui échoue (hors SQLite) ne bloque pas les lectures."""
+
+    def fail(*args: Any) -> ColumnarIndex:
+        raise MemoryError("index trop grand")
+
+    monkeypatch.setattr(ColumnarIndex, "from_rows", fail)
+    catalog = ColumnarCatalog(db, poll_interval=0.05, ready_timeout=1.0)
+    try:
+        filters = ProductFilters(category="Mode", sort=ProductSort.PRICE_ASC)
+        page = catalog.get_filtered_products_page(filters, 5)
+        assert page == db.get_filtered_products_page(filters, 5)
+        assert catalog.get_facet_counts(filters) == db.get_facet_counts(filters)
+        assert catalog.stats()["columnar"]["failures"] >= 1
+        # Le thread survit : l'index est construit dès que possible
+        monkeypatch.undo()
+        catalog.refresh()
+        assert catalog.get_filtered_products_page(filters, 5) == page
+    finally:
+        catalog.close()
+
+
+def test_foreign_write_before_local_patch_is_not_lost(tmp_path: Path) -> None:
+    """Une écriture d'un autre processus juste avant une écriture locale est vue."""
+    local = Database(str(tmp_path / "shop.db"))
+    other = Database(str(tmp_path / "shop.db"))
+    first, second = local.add_products_bulk(make_product(index) for index in range(2))
+    # Scrutation lente : seule l'écriture locale réveille le thread
+    catalog = ColumnarCatalog(local, poll_interval=60)
+    changed: list[list[int]] = []
+    try:
+        assert catalog.wait_for_refresh()
+        catalog.add_facet_listener(changed.append)
+        other.add_review(Review(0, first, 1, "Cli Ent", 2, "Avis"))
+        local.add_review(Review(0, second, 1, "Cli Ent", 4, "Avis"))
+        assert catalog.wait_for_refresh()
+        assert catalog.index.rating.tolist() == [2.0, 4.0]
+        assert changed == [[]]  # reconstruction complète
+        # Écriture locale seule : simple patch
+        local.add_review(Review(0, second, 1, "Cli Ent", 5, "Avis"))
+        assert catalog.wait_for_refresh()
+        assert catalog.index.rating.tolist() == [2.0, 4.5]
+        assert catalog.stats()["columnar"]["patches"] == 1
+    finally:
+        catalog.close()
+        other.close()
+        local.close()
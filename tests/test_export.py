@@ -0,0 +1,88 @@
+"""
+Export en flux : filtre par période, en NDJSON comme en CSV
+"""
+
+import csv
+import io
+import json
+from collections.abc import Iterator
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from shopify.database import Database
+from shopify.export import DateRange, export_chunks
+from tests.factories import BASE, make_order, make_product, make_user
+
+
+DAY = 24 * 3600
+
+
+@pytest.fixture
+def db(tmp_path: Path) -> Iterator[Database]:
+    """Base SQLite : un produit et une commande par jour sur 4 jours.
+
+    Les commandes des jours 0, 1 et 3 sont archivées, celle du jour 2 non.
+    """
+    database = Database(str(tmp_path / "shop.db"))
+    product_ids = database.add_products_bulk(
+        make_product(index, created_at=BASE + timedelta(days=index))
+        for index in range(4)
+    )
+    user_id = database.add_user(make_user())
+    for day in (0, 1, 3):
+        database.place_order(
+            make_order(user_id, (product_ids[day], 1), seconds=day * DAY)
+        )
+    assert database.archive_orders() == 3
+    database.place_order(make_order(user_id, (product_ids[2], 2), seconds=2 * DAY))
+    yield database
+    database.close()
+
+
+def read_export(
+    db: Database, kind: str, fmt: str, dates: DateRange
+) -> list[dict[str, Any]]:
+    """Export relu en dictionnaires (lignes NDJSON ou CSV), lots de 1 ligne."""
+    text = "".join(export_chunks(db, kind, fmt, dates, batch_size=1))
+    if fmt == "ndjson":
+        return [json.loads(line) for line in text.splitlines()]
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_products_export_is_filtered_by_date_range(db: Database, fmt: str) -> None:
+    """Bornes incluses, au jour près."""
+    start = BASE.date() + timedelta(days=1)
+    dates = DateRange.parse(start.isoformat(), (start + timedelta(days=1)).isoformat())
+
+    records = read_export(db, "products", fmt, dates)
+
+    assert [record["name"] for record in records] == ["Produit 1", "Produit 2"]
+    assert [record["created_at"][:10] for record in records] == [
+        start.isoformat(),
+        (start + timedelta(days=1)).isoformat(),
+    ]
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_orders_export_is_filtered_by_date_range(db: Database, fmt: str) -> None:
+    """Commandes de l'archive et de la base principale, dans la période."""
+    since = (BASE.date() + timedelta(days=1)).isoformat()
+
+    records = read_export(db, "orders", fmt, DateRange.parse(since, None))
+
+    # Archive d'abord (jours 1 et 3), puis la base principale (jour 2)
+    days = [record["created_at"][:10] for record in records]
+    assert days == [
+        (BASE.date() + timedelta(days=day)).isoformat() for day in (1, 3, 2)
+    ]
+    if fmt == "ndjson":
+        assert [len(record["items"]) for record in records] == [1, 1, 1]
+        assert records[-1]["items"][0]["quantity"] == 2
+    else:
+        assert [int(record["quantity"]) for record in records] == [1, 1, 2]
+    everything = read_export(db, "orders", fmt, DateRange())
+    assert len(everything) == 4
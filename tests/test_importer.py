@@ -0,0 +1,39 @@
+"""
+Import en masse : les lignes illisibles sont rejetées sans interrompre l'import
+"""
+
+import io
+import json
+
+from shopify.importer import SOURCE_ERRORS, import_products
+from shopify.memory import MemoryDatabase
+
+
+def test_unreadable_csv_rows_are_rejected() -> None:
+    """Ligne CSV invalide et octets non UTF-8 : rejetés, le lot est écrit."""
+    data = (
+        b"name,price,category,description\n"
+        b"Lampe,10,Maison,ok\n"
+        b"Table,15,Maison,caf\xe9\n"
+        b"Tapis,20,Maison," + b"x" * 200_000 + b"\n"
+    )
+    source = io.TextIOWrapper(
+        io.BytesIO(data), encoding="utf-8-sig", errors=SOURCE_ERRORS, newline=""
+    )
+    lines = list(source)
+    # Retour chariot hors guillemets : csv.Error levée par le lecteur
+    lines.insert(2, "Chaise,12,Maison,a\rb\n")
+    rejects = io.StringIO()
+    db = MemoryDatabase()
+
+    report = import_products(db, lines, "csv", rejects)
+
+    assert (report.rows, report.inserted, report.rejected) == (4, 2, 2)
+    assert sorted(product.name for product in db.get_all_products()) == [
+        "Lampe",
+        "Tapis",
+    ]
+    entries = [json.loads(line) for line in rejects.getvalue().splitlines()]
+    assert [entry["line"] for entry in entries] == [3, 4]
+    assert entries[0]["record"] is None
+    assert entries[1]["record"]["description"] == "caf\udce9"
@@ -0,0 +1,67 @@
+"""
+Migrations : mise à niveau d'une base créée par le schéma d'origine
+"""
+
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+
+from shopify.database import Database
+from shopify.mapping import to_epoch
+from shopify.migrations import MIGRATIONS, current_version, migrate
+
+
+def test_epoch_migration_converts_legacy_iso_dates(tmp_path: Path) -> None:
+    """Dates ISO des anciennes lignes converties ; une date illisible ne bloque rien."""
+    path = str(tmp_path / "shop.db")
+    conn = sqlite3.connect(path)
+    migrate(conn, MIGRATIONS[:1])
+    legacy = datetime(2024, 3, 1, 12, 0, 0, 654_321)
+    iso = legacy.isoformat()  # format écrit par le schéma d'origine
+    conn.executemany(
+        "INSERT INTO products (name, description, price, image_url, category, "
+        "stock, rating, reviews_count, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            ("Lampe", "Lampe", 10.0, "lampe.jpg", "Maison", 5, 0.0, 0, iso),
+            ("Table", "Table", 20.0, "table.jpg", "Maison", 5, 0.0, 0, "hier"),
+        ],
+    )
+    conn.execute(
+        "INSERT INTO users (email, password_hash, first_name, last_name, role, "
+        "created_at) VALUES ('client@example.com', 'hash', 'Cli', 'Ent', "
+        "'customer', ?)",
+        (iso,),
+    )
+    conn.execute(
+        "INSERT INTO orders (user_id, total, status, shipping_address, created_at, "
+        "updated_at) VALUES (1, 10.0, 'paid', 'Adresse', ?, '')",
+        (iso,),
+    )
+    conn.execute(
+        "INSERT INTO reviews (product_id, user_id, user_name, rating, comment, "
+        "created_at) VALUES (1, 1, 'Cli Ent', 4, 'Bien', ?)",
+        (iso,),
+    )
+    conn.commit()
+    conn.close()
+
+    before = int(time.time())
+    db = Database(path)
+    try:
+        with db.connection() as conn:
+            assert current_version(conn) == MIGRATIONS[-1].version
+            order_dates = conn.execute(
+                "SELECT created_at, updated_at FROM main.orders"
+            ).fetchone()
+        lamp = db.get_product_by_id(1)
+        table = db.get_product_by_id(2)
+        assert lamp is not None and lamp.created_at == legacy.replace(microsecond=0)
+        assert table is not None and to_epoch(table.created_at) >= before
+        assert order_dates[0] == to_epoch(legacy)
+        assert order_dates[1] >= before
+        [review] = db.get_reviews(1).items
+        assert review.created_at == legacy.replace(microsecond=0)
+        assert (lamp.rating, lamp.reviews_count) == (4.0, 1)
+    finally:
+        db.close()
@@ -0,0 +1,56 @@
+"""
+Curseurs de pagination : jetons opaques, refusés s'ils ont été modifiés
+"""
+
+from collections.abc import Callable
+
+import pytest
+
+from shopify.database import decode_cursor, encode_cursor
+from shopify.models import ProductFilters, ProductSort
+from shopify.repository import Repository
+from tests.factories import make_user
+
+
+TAMPERED = [
+    "pas-du-base64!",
+    encode_cursor(),
+    encode_cursor([1, 2], 3),
+    encode_cursor({"a": 1}, 3),
+    encode_cursor(None, 3),
+    encode_cursor(True, 3),
+]
+
+
+def test_cursor_round_trip() -> None:
+    """Un curseur rend les valeurs encodées."""
+    assert decode_cursor(encode_cursor(1_700_000_000, 42)) == [1_700_000_000, 42]
+    assert decode_cursor(encode_cursor(4.5, "x")) == [4.5, "x"]
+
+
+@pytest.mark.parametrize("cursor", TAMPERED[2:])
+def test_decode_rejects_non_scalar_values(cursor: str) -> None:
+    """Listes, objets, null ou booléens : ValueError."""
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("cursor", TAMPERED)
+def test_pages_reject_tampered_cursors(
+    repo: Repository, catalog: list[int], cursor: str
+) -> None:
+    """Chaque lecture paginée lève ValueError (400), jamais une erreur SQL."""
+    user_id = repo.add_user(make_user())
+    reads: list[Callable[[], object]] = [
+        lambda: repo.get_products_page(5, cursor),
+        lambda: repo.get_products_by_category_page("Mode", 5, cursor),
+        lambda: repo.get_filtered_products_page(
+            ProductFilters(sort=ProductSort.PRICE_ASC), 5, cursor
+        ),
+        lambda: repo.search_products_page("produit", 5, cursor),
+        lambda: repo.get_user_orders_page(user_id, 5, cursor),
+        lambda: repo.get_reviews(catalog[0], 5, cursor),
+    ]
+    for read in reads:
+        with pytest.raises(ValueError):
+            read()
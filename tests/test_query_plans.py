@@ -0,0 +1,159 @@
+"""
+Plans d'exécution des requêtes chaudes sur une base migrée
+Chaque lecture doit passer par l'index prévu (pas de balayage ni de tri temporaire)
+"""
+
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pytest
+
+from shopify.database import Database
+from shopify.instrumentation import InstrumentationSettings
+from shopify.models import (
+    CartItem,
+    Order,
+    OrderStatus,
+    Product,
+    ProductFilters,
+    ProductSort,
+    Review,
+    User,
+)
+
+
+CATEGORIES = ("Mode", "Sport", "Maison")
+
+
+@pytest.fixture
+def db(tmp_path: Path) -> Iterator[Database]:
+    """Base migrée dont chaque requête est journalisée avec son plan."""
+    # Seuil à 0 ms : toutes les requêtes passent par le journal des lentes
+    settings = InstrumentationSettings(slow_query_ms=0, slow_log_size=1_000)
+    database = Database(str(tmp_path / "plans.db"), instrumentation=settings)
+    database.add_products_bulk(
+        Product(
+            id=0,
+            name=f"Produit {index}",
+            description="Description",
+            price=5.0 + index,
+            image_url="https://example.com/image.jpg",
+            category=CATEGORIES[index % len(CATEGORIES)],
+            stock=index % 4,
+            rating=(index % 5) + 0.5,
+        )
+        for index in range(60)
+    )
+    user_id = database.add_user(User(0, "client@example.com", "hash", "Cli", "Ent"))
+    item = CartItem(3, "Produit 3", 8.0, "https://example.com/image.jpg", 1)
+    database.place_order(Order(0, user_id, [item], 8.0, OrderStatus.PAID, "Adresse"))
+    database.add_review(Review(0, 3, user_id, "Cli Ent", 4, "Très bien"))
+    yield database
+    database.close()
+
+
+def query_plans(db: Database, call: Callable[[], object]) -> dict[str, list[str]]:
+    """Plans (`EXPLAIN QUERY PLAN`) des requêtes émises par `call`."""
+    db.queries.reset()
+    call()
+    return {query.sql: query.plan for query in db.queries.slow_queries}
+
+
+def plan_of(plans: dict[str, list[str]], fragment: str) -> list[str]:
+    """Plan de la seule requête qui contient `fragment`."""
+    matching = [plan for sql, plan in plans.items() if fragment in sql]
+    assert len(matching) == 1, (fragment, list(plans))
+    return matching[0]
+
+
+def assert_uses_index(plan: list[str], step: str) -> None:
+    """Le plan contient `step` et ne trie pas dans un B-tree temporaire."""
+    assert any(line.startswith(step) for line in plan), plan
+    assert not any("TEMP B-TREE FOR ORDER BY" in line for line in plan), plan
+
+
+def test_catalog_page_uses_created_index(db: Database) -> None:
+    """Pages du catalogue : index par date, la suivante reprend après le curseur."""
+    first = db.get_products_page(10)
+    plans = query_plans(db, lambda: db.get_products_page(10))
+    assert_uses_index(
+        plan_of(plans, "FROM products"),
+        "SCAN products USING INDEX idx_products_created",
+    )
+    plans = query_plans(db, lambda: db.get_products_page(10, first.next_cursor))
+    assert_uses_index(
+        plan_of(plans, "FROM products"),
+        "SEARCH products USING INDEX idx_products_created",
+    )
+
+
+def test_search_page_uses_fts_index(db: Database) -> None:
+    """Recherche : index plein texte, puis produits par clé primaire."""
+    plans = query_plans(db, lambda: db.search_products_page("produit", 10))
+    plan = plan_of(plans, "MATCH")
+    assert any(line.startswith("SCAN products_fts VIRTUAL TABLE") for line in plan)
+    assert "SEARCH p USING INTEGER PRIMARY KEY (rowid=?)" in plan, plan
+
+
+def test_category_page_uses_category_index(db: Database) -> None:
+    """Page d'une catégorie : index (catégorie, date), dans l'ordre de l'index."""
+    plans = query_plans(db, lambda: db.get_products_by_category_page("Mode", 10))
+    plan = plan_of(plans, "FROM products")
+    assert_uses_index(plan, "SEARCH products USING INDEX idx_products_category_created")
+
+
+def test_user_orders_use_user_index(db: Database) -> None:
+    """Commandes d'un client : index (client, date), sans tri."""
+    plans = query_plans(db, lambda: db.get_user_orders_page(1, 10))
+    plan = plan_of(plans, "FROM main.orders")
+    assert_uses_index(plan, "SEARCH main.orders USING INDEX idx_orders_user_created")
+
+
+def test_order_items_use_order_index(db: Database) -> None:
+    """Articles des commandes : recherche par commande."""
+    plans = query_plans(db, lambda: db.get_user_orders(1))
+    plan = plan_of(plans, "FROM main.order_items")
+    assert_uses_index(plan, "SEARCH main.order_items USING INDEX idx_order_items_order")
+
+
+def test_reviews_use_product_index(db: Database) -> None:
+    """Avis d'un produit : index (produit, date), sans tri."""
+    plans = query_plans(db, lambda: db.get_reviews(3))
+    plan = plan_of(plans, "FROM reviews")
+    assert_uses_index(plan, "SEARCH reviews USING INDEX idx_reviews_product_created")
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        ProductFilters(),
+        ProductFilters(category="Mode"),
+        ProductFilters(category="Mode", min_rating=4),
+        ProductFilters(min_price=10, max_price=50, in_stock=True),
+    ],
+    ids=["catalogue", "categorie", "categorie-note", "prix-stock"],
+)
+def test_facet_counts_read_an_index(db: Database, filters: ProductFilters) -> None:
+    """Comptes par facette : lus dans un index, jamais dans la table."""
+    plans = query_plans(db, lambda: db.get_facet_counts(filters))
+    plan = plan_of(plans, "FROM products")
+    reads = [line for line in plan if line.startswith(("SCAN", "SEARCH"))]
+    assert reads, plan
+    assert all("INDEX" in line for line in reads), plan
+
+
+@pytest.mark.parametrize(
+    ("sort", "index"),
+    [
+        (ProductSort.NEWEST, "idx_products_category_created"),
+        (ProductSort.RATING, "idx_products_category_rating"),
+    ],
+)
+def test_filtered_category_page_is_index_ordered(
+    db: Database, sort: ProductSort, index: str
+) -> None:
+    """Page filtrée d'une catégorie : déjà triée par l'index du tri demandé."""
+    filters = ProductFilters(category="Mode", sort=sort)
+    plans = query_plans(db, lambda: db.get_filtered_products_page(filters, 10))
+    plan = plan_of(plans, "FROM products")
+    assert_uses_index(plan, f"SEARCH products USING INDEX {index}")
@@ -0,0 +1,416 @@
+"""
+Contrat de `Repository` : mêmes résultats avec SQLite, en mémoire et en asynchrone
+Chaque test tourne sur `Database`, `MemoryDatabase` puis `AsyncDatabase`
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from shopify.async_database import AsyncDatabase
+from shopify.database import (
+    HIGHLIGHT_END,
+    HIGHLIGHT_START,
+    Database,
+    OutOfStockError,
+    decode_cursor,
+    encode_cursor,
+)
+from shopify.mapping import LIST_DESCRIPTION_LENGTH, to_epoch
+from shopify.memory import MemoryDatabase
+from shopify.models import ProductFilters, ProductSort, Review
+from shopify.repository import Repository
+from tests.factories import BASE, make_order, make_product, make_user
+
+
+def walk_pages(repo: Repository, limit: int) -> list[int]:
+    """Ids de tout le catalogue, page par page."""
+    ids: list[int] = []
+    cursor = None
+    while True:
+        page = repo.get_products_page(limit, cursor)
+        ids += [product.id for product in page.items]
+        cursor = page.next_cursor
+        if cursor is None:
+            return ids
+
+
+# Produits
+
+
+def test_add_product_keeps_dates_to_the_second(repo: Repository) -> None:
+    """Un produit relu est identique, à la date tronquée à la seconde près."""
+    product_id = repo.add_product(make_product(1))
+    stored = repo.get_product_by_id(product_id)
+    assert stored is not None
+    assert stored.created_at == BASE.replace(microsecond=0)
+    expected = make_product(1, id=product_id, created_at=stored.created_at)
+    assert stored.to_dict() == expected.to_dict()
+    assert repo.get_product_by_id(product_id + 1) is None
+
+
+def test_bulk_insert_returns_ids_in_order(repo: Repository, catalog: list[int]) -> None:
+    """Les ids du lot suivent l'ordre fourni ; le compte inclut tout le lot."""
+    assert catalog == sorted(catalog)
+    assert repo.count_products() == 30
+    first = repo.get_product_by_id(catalog[0])
+    assert first is not None and first.name == "Produit 0"
+
+
+def test_bulk_insert_rejects_duplicate_sku(repo: Repository) -> None:
+    """Un SKU déjà utilisé lève IntegrityError sans rien ajouter."""
+    repo.add_product(make_product(1))
+    with pytest.raises(sqlite3.IntegrityError):
+        repo.add_products_bulk([make_product(2), make_product(1)])
+    assert repo.count_products() == 1
+
+
+def test_upsert_inserts_then_updates_by_sku(repo: Repository) -> None:
+    """Upsert : ajout des SKU inconnus, mise à jour des autres."""
+    assert repo.upsert_products([make_product(1), make_product(2)]) == (2, 0)
+    assert repo.upsert_products([make_product(1, price=99.0)]) == (0, 1)
+    assert repo.count_products() == 2
+    prices = {product.sku: product.price for product in repo.get_all_products()}
+    assert prices == {"SKU-1": 99.0, "SKU-2": make_product(2).price}
+
+
+def test_all_products_newest_first(repo: Repository, catalog: list[int]) -> None:
+    """Catalogue complet du plus récent au plus ancien, description entière."""
+    products = repo.get_all_products()
+    keys = [(product.created_at, product.id) for product in products]
+    assert keys == sorted(keys, reverse=True)
+    assert products[0].description == make_product(29).description
+
+
+def test_products_by_ids_keep_requested_order(
+    repo: Repository, catalog: list[int]
+) -> None:
+    """Ordre demandé conservé, ids inconnus ignorés."""
+    wanted = [catalog[9], catalog[3], 999, catalog[1]]
+    found = repo.get_products_by_ids(wanted)
+    assert [product.id for product in found] == [catalog[9], catalog[3], catalog[1]]
+
+
+def test_products_by_category(repo: Repository, catalog: list[int]) -> None:
+    """Produits d'une catégorie, du plus récent au plus ancien."""
+    products = repo.get_products_by_category("Sport")
+    assert {product.category for product in products} == {"Sport"}
+    assert len(products) == 10
+    keys = [(product.created_at, product.id) for product in products]
+    assert keys == sorted(keys, reverse=True)
+    assert repo.get_products_by_category("Inconnue") == []
+
+
+def test_pages_truncate_descriptions(repo: Repository, catalog: list[int]) -> None:
+    """Les listes paginées tronquent la description ; le détail la garde."""
+    full = make_product(0).description
+    assert len(full) > LIST_DESCRIPTION_LENGTH
+    pages = [
+        repo.get_products_page(50),
+        repo.get_products_by_category_page("Mode", 50),
+        repo.get_filtered_products_page(ProductFilters(min_price=1), 50),
+    ]
+    for page in pages:
+        assert page.items
+        for product in page.items:
+            assert len(product.description) == LIST_DESCRIPTION_LENGTH
+    detail = repo.get_product_by_id(catalog[0])
+    assert detail is not None and detail.description == full
+
+
+def test_products_page_cursor_format(repo: Repository, catalog: list[int]) -> None:
+    """Curseur : (date en secondes epoch, id) du dernier produit de la page."""
+    page = repo.get_products_page(7)
+    last = page.items[-1]
+    assert page.next_cursor is not None
+    assert decode_cursor(page.next_cursor) == [to_epoch(last.created_at), last.id]
+    assert walk_pages(repo, 7) == [p.id for p in repo.get_all_products()]
+
+
+def test_category_page_walks_the_category(repo: Repository, catalog: list[int]) -> None:
+    """Les pages d'une catégorie couvrent toute la catégorie, sans doublon."""
+    first = repo.get_products_by_category_page("Sport", 4)
+    assert first.next_cursor is not None
+    rest = repo.get_products_by_category_page("Sport", 10, first.next_cursor)
+    ids = [product.id for product in first.items + rest.items]
+    assert ids == [p.id for p in repo.get_products_by_category("Sport")]
+    assert rest.next_cursor is None
+    assert repo.get_products_by_category_page("Inconnue", 4).items == []
+
+
+@pytest.mark.parametrize("sort", list(ProductSort))
+def test_filtered_pages_follow_filters_and_sort(
+    repo: Repository, catalog: list[int], sort: ProductSort
+) -> None:
+    """Pages filtrées : produits conformes aux filtres, tous, dans l'ordre du tri."""
+    filters = ProductFilters(category="Mode", min_price=20, sort=sort)
+    products = []
+    cursor = None
+    while True:
+        page = repo.get_filtered_products_page(filters, 3, cursor)
+        products += page.items
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    expected = [p for p in repo.get_products_by_category("Mode") if p.price >= 20]
+    assert sorted(p.id for p in products) == sorted(p.id for p in expected)
+    prices = [product.price for product in products]
+    if sort is ProductSort.PRICE_ASC:
+        assert prices == sorted(prices)
+    elif sort is ProductSort.PRICE_DESC:
+        assert prices == sorted(prices, reverse=True)
+
+
+@pytest.mark.parametrize(
+    "cursor", [encode_cursor(12.5), encode_cursor(12.5, 3, 4), "pas-un-curseur"]
+)
+def test_filtered_page_rejects_malformed_cursor(
+    repo: Repository, catalog: list[int], cursor: str
+) -> None:
+    """Curseur de page filtrée mal formé : ValueError (400) sur chaque moteur."""
+    with pytest.raises(ValueError):
+        repo.get_filtered_products_page(ProductFilters(), 5, cursor)
+
+
+@pytest.mark.parametrize("cursor", [encode_cursor("12.5", 3), encode_cursor(12.5, "3")])
+def test_memory_filtered_page_rejects_non_numeric_cursor(cursor: str) -> None:
+    """Clé comparée en Python : une valeur non numérique lève ValueError, pas TypeError."""
+    repo = MemoryDatabase()
+    repo.add_products_bulk(make_product(index) for index in range(10))
+    for sort in ProductSort:
+        with pytest.raises(ValueError):
+            repo.get_filtered_products_page(ProductFilters(sort=sort), 5, cursor)
+
+
+def test_facet_counts(repo: Repository, catalog: list[int]) -> None:
+    """Comptes par facette : total filtré, toutes catégories proposées."""
+    counts = repo.get_facet_counts(ProductFilters(category="Mode"))
+    assert counts.total == 10
+    assert dict(counts.categories) == {"Mode": 10, "Sport": 10, "Maison": 10}
+    assert counts.in_stock == 10
+    assert sum(bucket.count for bucket in counts.price_buckets) == 10
+
+
+def test_search(repo: Repository, catalog: list[int]) -> None:
+    """Recherche par début de mot, avec extraits et pagination."""
+    found = {product.id for product in repo.search_products("Produit 1")}
+    assert catalog[1] in found and catalog[10] in found
+    assert repo.search_products("") == []
+    hits = repo.search_products_with_snippets("numéro")
+    assert len(hits) == 30 and all(hit.snippet for hit in hits)
+    ids: list[int] = []
+    cursor = None
+    while True:
+        page = repo.search_products_page("numéro", 8, cursor)
+        ids += [hit.product.id for hit in page.items]
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert sorted(ids) == catalog
+
+
+def test_search_highlights_the_whole_description(repo: Repository) -> None:
+    """Mot trouvé après la partie tronquée des pages : surligné quand même."""
+    description = "x" * (LIST_DESCRIPTION_LENGTH + 10) + " zebulon"
+    repo.add_product(make_product(0, description=description))
+    for hits in (
+        repo.search_products_with_snippets("zebulon"),
+        repo.search_products_page("zebulon").items,
+    ):
+        assert len(hits) == 1
+        assert f"{HIGHLIGHT_START}zebulon{HIGHLIGHT_END}" in hits[0].snippet
+        assert len(hits[0].product.description) == LIST_DESCRIPTION_LENGTH
+
+
+def test_like_search_highlights_the_whole_description(tmp_path: Path) -> None:
+    """Repli sans FTS5 : extrait de la description complète, même loin du début."""
+    repo = Database(str(tmp_path / "shop.db"))
+    repo.has_fts = False
+    for padding in (LIST_DESCRIPTION_LENGTH + 10, 1_000):
+        repo.add_product(make_product(padding, description="x" * padding + " zebulon"))
+    try:
+        for hits in (
+            repo.search_products_with_snippets("zebulon"),
+            repo.search_products_page("zebulon").items,
+        ):
+            assert len(hits) == 2
+            assert all(
+                f"{HIGHLIGHT_START}zebulon{HIGHLIGHT_END}" in hit.snippet
+                for hit in hits
+            )
+            assert all(
+                len(hit.product.description) == LIST_DESCRIPTION_LENGTH for hit in hits
+            )
+    finally:
+        repo.close()
+
+
+# Utilisateurs
+
+
+def test_users_and_duplicate_email(repo: Repository) -> None:
+    """Email unique : un doublon lève IntegrityError."""
+    user_id = repo.add_user(make_user())
+    with pytest.raises(sqlite3.IntegrityError):
+        repo.add_user(make_user())
+    user = repo.get_user_by_email("client@example.com")
+    assert user is not None and user.id == user_id
+    assert user.created_at == BASE  # date d'inscription gardée entière
+    assert repo.get_user_by_email("inconnu@example.com") is None
+
+
+def test_add_users_bulk(repo: Repository) -> None:
+    """Ids attribués dans l'ordre ; un doublon dans le lot n'ajoute rien."""
+    emails = [f"u{index}@example.com" for index in range(3)]
+    ids = repo.add_users_bulk(make_user(email) for email in emails)
+    assert ids == sorted(ids) and len(ids) == 3
+    with pytest.raises(sqlite3.IntegrityError):
+        repo.add_users_bulk([make_user("neuf@example.com"), make_user(emails[0])])
+    assert repo.get_user_by_email("neuf@example.com") is None
+
+
+# Commandes
+
+
+def test_place_order_decrements_stock(repo: Repository, catalog: list[int]) -> None:
+    """Une commande passée décrémente le stock ; create_order n'y touche pas."""
+    user_id = repo.add_user(make_user())
+    repo.place_order(make_order(user_id, (catalog[0], 3), (catalog[1], 10)))
+    repo.create_order(make_order(user_id, (catalog[2], 50)))
+    stocks = [p.stock for p in repo.get_products_by_ids(catalog[:3])]
+    assert stocks == [7, 0, 10]
+
+
+def test_place_order_is_all_or_nothing(repo: Repository, catalog: list[int]) -> None:
+    """Un article en rupture annule toute la commande (stock et commande)."""
+    user_id = repo.add_user(make_user())
+    order = make_order(user_id, (catalog[0], 2), (catalog[1], 11))
+    with pytest.raises(OutOfStockError) as error:
+        repo.place_order(order)
+    assert error.value.product_id == catalog[1]
+    assert [p.stock for p in repo.get_products_by_ids(catalog[:2])] == [10, 10]
+    assert repo.get_user_orders(user_id) == []
+
+
+def test_user_orders(repo: Repository, catalog: list[int]) -> None:
+    """Commandes du plus récent au plus ancien, articles et dates à la seconde."""
+    user_id = repo.add_user(make_user())
+    for seconds in range(5):
+        repo.place_order(make_order(user_id, (catalog[seconds], 1), seconds=seconds))
+    orders = repo.get_user_orders(user_id)
+    assert [order.created_at for order in orders] == [
+        (BASE + timedelta(seconds=seconds)).replace(microsecond=0)
+        for seconds in reversed(range(5))
+    ]
+    assert [order.items[0].product_id for order in orders] == catalog[4::-1]
+    first = repo.get_user_orders_page(user_id, 3)
+    assert first.next_cursor is not None
+    rest = repo.get_user_orders_page(user_id, 3, first.next_cursor)
+    assert [o.id for o in first.items + rest.items] == [o.id for o in orders]
+    assert rest.next_cursor is None
+
+
+def test_sales_report_matches_rebuild(repo: Repository, catalog: list[int]) -> None:
+    """Le rapport tenu à jour égale celui recalculé depuis l'historique."""
+    user_id = repo.add_user(make_user())
+    repo.place_order(make_order(user_id, (catalog[0], 2), (catalog[1], 1)))
+    repo.place_order(make_order(user_id, (catalog[0], 1), seconds=90_000))
+    days = (datetime.now() - BASE).days + 5
+    report = repo.get_sales_report(days=days)
+    assert report.total_orders() == 2
+    assert report.total_units() == 4
+    assert report.top_products[0].product_id == catalog[0]
+    repo.rebuild_sales_rollups()
+    assert repo.get_sales_report(days=days) == report
+
+
+# Avis
+
+
+def test_reviews_update_rating(repo: Repository, catalog: list[int]) -> None:
+    """Un avis met à jour la note du produit ; pages du plus récent au plus ancien."""
+    user_id = repo.add_user(make_user())
+    for index, rating in enumerate((5, 4, 3, 4)):
+        review = Review(
+            0,
+            catalog[3],
+            user_id,
+            "Cli Ent",
+            rating,
+            f"Avis {index}",
+            BASE + timedelta(seconds=index // 2),
+        )
+        repo.add_review(review)
+    product = repo.get_product_by_id(catalog[3])
+    assert product is not None
+    assert (product.rating, product.reviews_count) == (4.0, 4)
+    first = repo.get_reviews(catalog[3], 3)
+    assert first.next_cursor is not None
+    rest = repo.get_reviews(catalog[3], 3, first.next_cursor)
+    comments = [review.comment for review in first.items + rest.items]
+    assert comments == ["Avis 3", "Avis 2", "Avis 1", "Avis 0"]
+    assert repo.get_reviews(catalog[4]).items == []
+
+
+@pytest.mark.parametrize(("product", "rating"), [(0, 6), (999, 3)])
+def test_invalid_review_is_rejected(
+    repo: Repository, catalog: list[int], product: int, rating: int
+) -> None:
+    """Note hors 1-5 ou produit inconnu : ValueError."""
+    product_id = catalog[product] if product < len(catalog) else product
+    with pytest.raises(ValueError):
+        repo.add_review(Review(0, product_id, 1, "Cli Ent", rating, "Avis"))
+
+
+# Listeners
+
+
+def test_listeners(repo: Repository, catalog: list[int]) -> None:
+    """Écritures signalées : produits modifiés, facettes seulement si touchées."""
+    changed: list[list[int]] = []
+    facets: list[list[int]] = []
+    repo.add_catalog_listener(changed.append)
+    repo.add_facet_listener(facets.append)
+    user_id = repo.add_user(make_user())
+    repo.place_order(make_order(user_id, (catalog[0], 1)))
+    assert changed == [[catalog[0]]] and facets == []
+    repo.place_order(make_order(user_id, (catalog[1], 10)))
+    assert facets == [[catalog[1]]]
+    repo.add_product(make_product(100))
+    assert facets[-1] == []
+
+
+# Parité entre moteurs
+
+
+def test_cursors_are_interchangeable(tmp_path: Path) -> None:
+    """Un curseur d'un moteur donne la même page suivante sur l'autre."""
+    sqlite = Database(str(tmp_path / "shop.db"))
+    memory = MemoryDatabase()
+    try:
+        for repo in (sqlite, memory):
+            repo.add_products_bulk(make_product(index) for index in range(30))
+        cursor = sqlite.get_products_page(5).next_cursor
+        assert cursor == memory.get_products_page(5).next_cursor
+        assert cursor is not None
+        after_sqlite = sqlite.get_products_page(5, cursor)
+        after_memory = memory.get_products_page(5, cursor)
+        assert [p.to_dict() for p in after_sqlite.items] == [
+            p.to_dict() for p in after_memory.items
+        ]
+        assert after_sqlite.next_cursor == after_memory.next_cursor
+    finally:
+        sqlite.close()
+        memory.close()
+
+
+def test_async_facade_covers_the_contract() -> None:
+    """`AsyncDatabase` expose chaque méthode de `Repository`."""
+    methods = {
+        name
+        for name, member in vars(Repository).items()
+        if callable(member) and not name.startswith("_")
+    }
+    assert methods <= set(dir(AsyncDatabase))
@@ -0,0 +1,72 @@
+"""
+Requêtes SQL par page : l'utilisateur connecté est chargé une fois par requête
+Cache des utilisateurs désactivé, pour compter les lectures en base
+"""
+
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+from flask import Flask, request_finished
+from flask.testing import FlaskClient
+
+from shopify import app as shopify_app
+from shopify.database import Database
+from shopify.instrumentation import current_request_queries
+from shopify.models import Product, User, UserRole
+
+
+EMAIL = "admin@example.com"
+PASSWORD = "secret"
+
+PAGES = ["/", "/products", "/product/1", "/cart", "/checkout", "/orders", "/admin"]
+
+
+@pytest.fixture
+def client(tmp_path: Path) -> Iterator[FlaskClient]:
+    """Client connecté en admin, panier non vide, sans aucun cache."""
+    previous = shopify_app.db
+    database = Database(str(tmp_path / "shop.db"))
+    database.add_products_bulk(
+        Product(0, f"Produit {index}", "Description", 10.0, "image.jpg", "Mode", 5)
+        for index in range(5)
+    )
+    password_hash = shopify_app.hash_password(PASSWORD)
+    database.add_user(User(0, EMAIL, password_hash, "Ad", "Min", UserRole.ADMIN))
+    shopify_app.use_database(database, cache=False)
+    client = shopify_app.app.test_client()
+    client.post("/login", data={"email": EMAIL, "password": PASSWORD})
+    client.post("/cart/add/1")
+    yield client
+    shopify_app.use_database(previous)
+    database.close()
+
+
+def user_lookups(client: FlaskClient, path: str) -> int:
+    """Lectures d'un utilisateur par email pendant le rendu de `path`."""
+    lookups: list[int] = []
+
+    def record(sender: Flask, **extra: Any) -> None:
+        # Signal émis après les after_request, avant la fin du comptage
+        queries = current_request_queries()
+        assert queries is not None
+        lookups.append(
+            sum(
+                count
+                for sql, count in queries.statements.items()
+                if "FROM users WHERE email" in sql
+            )
+        )
+
+    with request_finished.connected_to(record, shopify_app.app):
+        response = client.get(path)
+    assert response.status_code == 200, (path, response.status_code)
+    assert len(lookups) == 1
+    return lookups[0]
+
+
+@pytest.mark.parametrize("path", PAGES)
+def test_current_user_is_loaded_once(client: FlaskClient, path: str) -> None:
+    """Une seule lecture de l'utilisateur, quel que soit le nombre d'appels."""
+    assert user_lookups(client, path) <= 1
@@ -0,0 +1,35 @@
+"""
+Instantané du catalogue : écritures de ce processus et des autres
+"""
+
+from pathlib import Path
+
+from shopify.database import Database
+from shopify.models import Review
+from shopify.snapshot import SnapshotCatalog
+from tests.factories import make_product
+
+
+def test_foreign_write_before_local_patch_is_not_lost(tmp_path: Path) -> None:
+    """Une écriture d'un autre processus juste avant une écriture locale est vue."""
+    local = Database(str(tmp_path / "shop.db"))
+    other = Database(str(tmp_path / "shop.db"))
+    first, second = local.add_products_bulk(make_product(index) for index in range(2))
+    # Scrutation lente : seule l'écriture locale réveille le thread
+    catalog = SnapshotCatalog(local, poll_interval=60)
+    try:
+        other.add_review(Review(0, first, 1, "Cli Ent", 2, "Avis"))
+        local.add_review(Review(0, second, 1, "Cli Ent", 4, "Avis"))
+        assert catalog.wait_for_refresh()
+        assert catalog.get_product_by_id(first) == local.get_product_by_id(first)
+        assert catalog.get_product_by_id(second) == local.get_product_by_id(second)
+        assert catalog.stats()["snapshot"]["full_builds"] == 2
+        # Écriture locale seule : simple patch
+        local.add_review(Review(0, second, 1, "Cli Ent", 5, "Avis"))
+        assert catalog.wait_for_refresh()
+        assert catalog.get_product_by_id(second) == local.get_product_by_id(second)
+        assert catalog.stats()["snapshot"]["patches"] == 1
+    finally:
+        catalog.close()
+        other.close()
+        local.close()